@@ -16,7 +16,8 @@ from datetime import datetime
 # 添加腳本路徑
 sys.path.insert(0, '/action/scripts')
 
-from community_reporter import GitHubClient, ContributionAnalyzer, ReportGenerator
+from community_reporter import GitHubClient, GraphQLClient, ContributionAnalyzer, ReportGenerator
+from github_http import get_transport
 
 # 設定日誌
 logging.basicConfig(
@@ -129,6 +130,7 @@ def main():
         interval_str = get_env_variable('INTERVAL', default='30')
         output_file = get_env_variable('OUTPUT_FILE', default='COMMUNITY_REPORT.md')
         include_stats_str = get_env_variable('INCLUDE_STATS', default='true')
+        data_source = get_env_variable('DATA_SOURCE', default='rest').lower()
         
         # 解析配置
         interval_days = parse_interval(interval_str)
@@ -137,10 +139,14 @@ def main():
         logger.info(f"📊 倉庫: {repo_owner}/{repo_name}")
         logger.info(f"📅 分析期間: 過去 {interval_days} 天")
         logger.info(f"📄 輸出文件: {output_file}")
+        logger.info(f"🔌 資料來源: {data_source}")
         
         # 初始化組件
         logger.info("🔧 初始化 GitHub 客戶端...")
-        github_client = GitHubClient(token=github_token)
+        if data_source == 'graphql':
+            github_client = GraphQLClient(token=github_token)
+        else:
+            github_client = GitHubClient(token=github_token)
         
         logger.info("📈 初始化分析器...")
         analyzer = ContributionAnalyzer(github_client, repo_owner, repo_name)
@@ -152,6 +158,17 @@ def main():
         logger.info("🔍 開始分析貢獻數據...")
         analysis = analyzer.analyze_period(days=interval_days)
         
+        transport = get_transport()
+        if transport.scheduler is not None:
+            rate_stats = transport.scheduler.stats()
+            logger.info(f"🚦 API 請求: {rate_stats['requests']} 次，限速等待 {rate_stats['throttled']} 次，"
+                        f"速率限制重試 {rate_stats['retries']} 次（共等待 {rate_stats['wait_seconds']:.1f} 秒）")
+        cache = transport.cache
+        if cache is not None:
+            cache_stats = cache.stats()
+            logger.info(f"🗄️ HTTP 快取: 命中 {cache_stats['hits']}，未命中 {cache_stats['misses']}"
+                        f"（命中率 {cache_stats['hit_rate']:.0%}）")
+        
         # 生成報告
         logger.info("📄 生成報告...")
         report = reporter.generate_report(analysis, include_stats=include_stats)
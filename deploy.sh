@@ -64,6 +64,10 @@ GitHub Pages CDN 通常需要 5-10 分鐘更新
 EOF
 fi
 
+# 從故事 JSON 產生網頁版的故事資料
+echo "📖 同步網頁版故事資料..."
+python3 scripts/build-web.py || exit 1
+
 # 創建部署目錄
 echo "📁 創建部署目錄..."
 mkdir -p deploy/github-pages
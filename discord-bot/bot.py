@@ -9,15 +9,21 @@ Tsext Adventure Discord Bot
 """
 
 import os
+import sys
 import json
 import asyncio
+import functools
 import logging
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
 import discord
 from discord.ext import commands, tasks
-import requests
+
+# 共用的 HTTP 傳輸層：容器中與本檔案同目錄，原始碼樹中位於 scripts/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from github_http import get_transport
+from github_ratelimit import BATCH, INTERACTIVE
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -134,12 +140,17 @@ class GitHubIntegration:
         }
         self.headers = {k: v for k, v in self.headers.items() if v is not None}
     
-    async def get_contributor_level(self, username: str) -> Optional[str]:
-        """獲取貢獻者等級"""
+    async def get_contributor_level(self, username: str, priority: int = INTERACTIVE) -> Optional[str]:
+        """
+        獲取貢獻者等級
+
+        指令預設以 INTERACTIVE 優先權查詢，排在定期更新（BATCH）之前；
+        請求在背景執行緒中送出，等待速率限制時不會卡住事件迴圈。
+        """
         try:
             # 獲取用戶的 PR 和 Issue 數據
-            prs = await self._get_user_prs(username)
-            issues = await self._get_user_issues(username)
+            prs = await self._get_user_prs(username, priority)
+            issues = await self._get_user_issues(username, priority)
             
             # 計算貢獻分數
             total_score = len(prs) * 3 + len(issues)
@@ -158,7 +169,7 @@ class GitHubIntegration:
             logger.error(f"獲取貢獻者等級時發生錯誤: {e}")
             return None
     
-    async def _get_user_prs(self, username: str) -> List[Dict]:
+    async def _get_user_prs(self, username: str, priority: int = INTERACTIVE) -> List[Dict]:
         """獲取用戶的 PR 列表"""
         url = f"{self.base_url}/search/issues"
         params = {
@@ -167,7 +178,8 @@ class GitHubIntegration:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                get_transport().get, url, headers=self.headers, params=params, priority=priority))
             response.raise_for_status()
             data = response.json()
             return data.get('items', [])
@@ -175,7 +187,7 @@ class GitHubIntegration:
             logger.error(f"獲取 PR 數據時發生錯誤: {e}")
             return []
     
-    async def _get_user_issues(self, username: str) -> List[Dict]:
+    async def _get_user_issues(self, username: str, priority: int = INTERACTIVE) -> List[Dict]:
         """獲取用戶的 Issue 列表"""
         url = f"{self.base_url}/search/issues"
         params = {
@@ -184,7 +196,8 @@ class GitHubIntegration:
         }
         
         try:
-            response = requests.get(url, headers=self.headers, params=params)
+            response = await asyncio.get_running_loop().run_in_executor(None, functools.partial(
+                get_transport().get, url, headers=self.headers, params=params, priority=priority))
             response.raise_for_status()
             data = response.json()
             return data.get('items', [])
@@ -391,7 +404,7 @@ class TsextAdventureBot(commands.Bot):
                     if not member:
                         continue
                     
-                    contributor_level = await self.github.get_contributor_level(github_username)
+                    contributor_level = await self.github.get_contributor_level(github_username, BATCH)
                     if contributor_level:
                         await self.role_manager.assign_role(guild, member, contributor_level)
                         logger.info(f"更新 {member.display_name} 的角色為 {contributor_level}")
@@ -9,6 +9,7 @@ GitHub Webhook 處理器
 """
 
 import os
+import sys
 import json
 import hmac
 import hashlib
@@ -17,7 +18,10 @@ import logging
 from datetime import datetime
 from typing import Dict, Optional
 from flask import Flask, request, jsonify
-import requests
+
+# 共用的 HTTP 傳輸層：容器中與本檔案同目錄，原始碼樹中位於 scripts/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from github_http import get_transport
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -129,7 +133,7 @@ class GitHubWebhookHandler:
         }
         
         try:
-            response = requests.get(url, headers=self.github_headers, params=params)
+            response = get_transport().get(url, headers=self.github_headers, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('items', [])
@@ -146,7 +150,7 @@ class GitHubWebhookHandler:
         }
         
         try:
-            response = requests.get(url, headers=self.github_headers, params=params)
+            response = get_transport().get(url, headers=self.github_headers, params=params)
             response.raise_for_status()
             data = response.json()
             return data.get('items', [])
@@ -196,7 +200,7 @@ class GitHubWebhookHandler:
         }
         
         try:
-            response = requests.post(self.discord_webhook_url, json=payload)
+            response = get_transport().post(self.discord_webhook_url, json=payload)
             response.raise_for_status()
             logger.info(f"成功發送 Discord 通知: {action} {item_type}")
         except Exception as e:
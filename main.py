@@ -10,70 +10,233 @@ Tsext Adventure: Halloween Haunt
 
 import json
 import os
-import random
 import sys
-from typing import Dict, List, Any
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Any, Optional
+
+# 啟動計時的起點：在匯入故事引擎之前，引擎的匯入時間計入 imports 階段
+_PROCESS_STARTED = time.perf_counter()
+
+# 只匯入故事圖；讀取故事（load_story、load_binary）與畫面快取在用到時
+# 才匯入，快速啟動時這些匯入與玩家輸入名字重疊
+from story_engine import StoryGraph, StoryFormatError, NO_SCENE  # noqa: E402
+
+if TYPE_CHECKING:
+    # 進度與遊玩紀錄只在有設定時才匯入（見 load_progress、open_recorder）
+    from story_engine.progress import PlayerProgress, ProgressStore
+    from story_engine.replay import SessionRecorder, SessionTrace
+
+_IMPORTS_FINISHED = time.perf_counter()
+
+STORY_FILE = 'stories/halloween.json'
 
 
 class HalloweenAdventure:
     """萬聖節冒險遊戲主類別"""
     
-    def __init__(self):
-        self.story_data = {}
+    def __init__(self, progress_db: Optional[str] = None, session_log: Optional[str] = None,
+                 fast_start: bool = False, snapshot: Optional[str] = None,
+                 startup_log: Optional[str] = None):
+        self.stories_loaded = False
+        self.graph: StoryGraph = StoryGraph()
         self.current_scene = "start"
         self.player_name = ""
         self.score = 0
         self.visited_scenes = set()
+        # 跨遊戲的進度（設定 progress_db 時才會保存）
+        self.progress_db = progress_db
+        self.progress_store: Optional['ProgressStore'] = None
+        self.progress: Optional['PlayerProgress'] = None
+        # 遊玩紀錄（設定 session_log 時才會記錄，供新版故事重播驗證）
+        self.session_log = session_log
+        self.recorder: Optional['SessionRecorder'] = None
+        self.trace: Optional['SessionTrace'] = None
+        # 快速啟動：玩家輸入名字時在背景執行緒載入故事（snapshot 為預編譯
+        # 的 .tsxs 檔，設定時直接載入，不讀取故事 JSON）
+        self.fast_start = fast_start
+        self.snapshot = snapshot
+        self._loader: Optional[threading.Thread] = None
+        self._loaded_graph: Optional[StoryGraph] = None
+        self._load_error: Optional[BaseException] = None
+        # 啟動計時（自行程啟動起的秒數），設定 startup_log 時寫入一行 JSON
+        self.startup_log = startup_log
+        self.startup_marks: Dict[str, float] = {
+            'imports': _IMPORTS_FINISHED - _PROCESS_STARTED,
+            'init': time.perf_counter() - _PROCESS_STARTED
+        }
         
+    def mark(self, name: str):
+        """記錄啟動階段的時間點，只記錄第一次"""
+        self.startup_marks.setdefault(name, time.perf_counter() - _PROCESS_STARTED)
+    
+    def startup_report(self) -> Dict[str, Any]:
+        """
+        啟動計時報告
+        
+        Returns:
+            各階段距開始匯入故事引擎的毫秒數，以及玩家按下 Enter 後等待第一個場景的毫秒數
+        """
+        marks = {name: round(seconds * 1000, 2) for name, seconds in self.startup_marks.items()}
+        report: Dict[str, Any] = {
+            'fast_start': self.fast_start,
+            'snapshot': self.snapshot,
+            'marks': marks
+        }
+        if 'first_scene' in marks and 'start_pressed' in marks:
+            report['wait_ms'] = round(marks['first_scene'] - marks['start_pressed'], 2)
+        return report
+    
+    def write_startup_log(self):
+        """將啟動計時附加到 startup_log"""
+        if not self.startup_log or 'first_scene' not in self.startup_marks:
+            return
+        try:
+            with open(self.startup_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.startup_report(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            print(f"⚠️  無法寫入啟動計時: {e}")
+        
+    @property
+    def story_data(self) -> Dict[str, Any]:
+        """原始故事資料（唯讀），遊戲流程只用故事圖，需要時才解析 JSON"""
+        if not self.stories_loaded:
+            return {}
+        from story_engine import load_story_data
+        return load_story_data(STORY_FILE)
+    
+    def read_story(self) -> StoryGraph:
+        """讀取故事圖（有設定 snapshot 時直接載入預編譯檔）"""
+        if self.snapshot:
+            from story_engine.binary import load_binary
+            return load_binary(self.snapshot)
+        # 同一行程內的所有遊戲實例共用同一份資料，有最新的預編譯檔時
+        # 直接以 mmap 載入
+        from story_engine import load_story
+        return load_story(STORY_FILE)
+    
+    def preload_stories(self):
+        """在背景執行緒開始載入故事，load_stories() 會等待載入完成"""
+        if self._loader is None and not self.stories_loaded:
+            self._loader = threading.Thread(target=self._background_load, name='story-loader', daemon=True)
+            self._loader.start()
+    
+    def _background_load(self):
+        try:
+            graph = self.read_story()
+            # 順便組合第一個場景的畫面
+            start = graph.index_of(self.current_scene)
+            if start != NO_SCENE:
+                from story_engine.frames import frame_cache
+                frame_cache(graph).frame(start)
+            self._loaded_graph = graph
+        except BaseException as e:
+            # 錯誤留到 load_stories() 在主執行緒處理
+            self._load_error = e
+        self.mark('story_loaded')
+    
     def load_stories(self):
         """載入故事資料"""
         try:
-            # 載入萬聖節故事
-            with open('stories/halloween.json', 'r', encoding='utf-8') as f:
-                self.story_data = json.load(f)
+            # 載入萬聖節故事（已在背景開始載入時等待完成）
+            if self._loader is not None:
+                self._loader.join()
+                self._loader = None
+                if self._load_error is not None:
+                    error, self._load_error = self._load_error, None
+                    raise error
+                self.graph = self._loaded_graph
+            else:
+                self.graph = self.read_story()
+                self.mark('story_loaded')
+            self.stories_loaded = True
             print("✅ 故事資料載入成功！")
-        except FileNotFoundError:
-            print("❌ 找不到 stories/halloween.json 檔案")
+            if self.progress_db:
+                self.load_progress()
+            if self.session_log:
+                self.open_recorder()
+        except FileNotFoundError as e:
+            print(f"❌ 找不到 {e.filename or STORY_FILE} 檔案")
             sys.exit(1)
         except json.JSONDecodeError as e:
             print(f"❌ JSON 格式錯誤: {e}")
             sys.exit(1)
+        except StoryFormatError as e:
+            print(f"❌ 故事資料錯誤: {e}")
+            sys.exit(1)
+    
+    def load_progress(self):
+        """載入玩家跨遊戲的進度"""
+        from story_engine.progress import PlayerProgress, ProgressError, ProgressLayout, ProgressStore
+        self.progress_store = ProgressStore(self.progress_db, ProgressLayout.for_graph(self.graph))
+        try:
+            self.progress = self.progress_store.get(self.player_name)
+        except ProgressError as e:
+            print(f"⚠️  無法讀取遊戲進度，將重新記錄: {e}")
+            self.progress = PlayerProgress(self.progress_store.layout)
+    
+    def open_recorder(self):
+        """開啟遊玩紀錄檔"""
+        from story_engine.replay import ReplayError, SessionRecorder
+        try:
+            self.recorder = SessionRecorder(self.session_log)
+        except (OSError, ReplayError) as e:
+            print(f"⚠️  無法開啟遊玩紀錄檔，本次不記錄: {e}")
     
-    def display_scene(self, scene_id: str):
-        """顯示場景內容"""
-        if scene_id not in self.story_data:
+    def end_trace(self):
+        """寫入目前的遊玩紀錄"""
+        if self.trace is not None:
+            self.recorder.end(self.trace)
+            self.trace = None
+    
+    def close_recorder(self):
+        """寫入進行中的遊玩紀錄並關閉紀錄檔"""
+        if self.recorder is not None:
+            self.end_trace()
+            self.recorder.close()
+            self.recorder = None
+    
+    def close_progress(self):
+        """寫入尚未保存的進度"""
+        if self.progress_store is not None:
+            self.progress_store.close()
+            self.progress_store = None
+    
+    def display_scene(self, scene_id: str) -> bool:
+        """顯示場景內容，結局場景回傳玩家是否要重新開始"""
+        scene = self.graph.index_of(scene_id)
+        if scene == NO_SCENE:
             print("❌ 找不到場景資料")
-            return
+            return False
         
-        scene = self.story_data[scene_id]
+        graph = self.graph
         
-        # 顯示場景標題
-        print(f"\n{'='*50}")
-        print(f"🎃 {scene.get('title', scene_id.upper())} 🎃")
-        print(f"{'='*50}")
-        
-        # 顯示場景描述
-        if 'description' in scene:
-            print(f"\n{scene['description']}")
-        
-        # 顯示選擇選項
-        if 'choices' in scene:
-            print(f"\n你的選擇：")
-            for i, choice in enumerate(scene['choices'], 1):
-                print(f"{i}. {choice['option']}")
+        # 顯示場景標題、描述與選擇選項（畫面只組合一次，並以單次寫入輸出）
+        from story_engine.frames import frame_cache
+        print(frame_cache(graph).frame(scene), end='', flush=True)
+        self.mark('first_scene')
         
         # 如果是結局
-        if scene.get('is_ending', False):
-            self.handle_ending(scene)
-            return
+        if graph.is_ending(scene):
+            if self.progress is not None:
+                self.progress.finish(scene_id, graph.scores[scene])
+                self.progress_store.save(self.player_name, self.progress)
+            return self.handle_ending({
+                'title': graph.titles[scene] or '未知結局',
+                'outcome': graph.outcomes[scene],
+                'score': graph.scores[scene]
+            })
         
         # 記錄已訪問的場景
         self.visited_scenes.add(scene_id)
+        if self.progress is not None:
+            self.progress.visit(scene_id)
+        return False
     
-    def handle_ending(self, scene: Dict[str, Any]):
-        """處理結局"""
+    def handle_ending(self, scene: Dict[str, Any]) -> bool:
+        """處理結局，回傳 True 表示玩家要重新開始"""
         print(f"\n🎭 結局：{scene.get('title', '未知結局')}")
-        if 'outcome' in scene:
+        if scene.get('outcome'):
             print(f"\n{scene['outcome']}")
         
         # 計算分數
@@ -82,38 +245,38 @@ class HalloweenAdventure:
         
         print(f"\n🏆 你的分數：{self.score}")
         print(f"📍 探索場景數：{len(self.visited_scenes)}")
+        if self.progress is not None:
+            print(f"📚 累計解鎖結局：{len(self.progress.unlocked_endings())}（共遊玩 {self.progress.play_count} 次）")
         
         # 詢問是否重新開始
         while True:
             choice = input("\n是否要重新開始？(y/n): ").lower().strip()
             if choice in ['y', 'yes', '是']:
-                self.restart_game()
-                break
+                return True
             elif choice in ['n', 'no', '否']:
                 print("👻 感謝遊玩！萬聖節快樂！")
                 return False  # 返回 False 表示遊戲結束
             else:
                 print("請輸入 y 或 n")
     
-    def restart_game(self):
-        """重新開始遊戲"""
+    def reset_state(self):
+        """重設遊戲狀態"""
         self.current_scene = "start"
         self.score = 0
         self.visited_scenes.clear()
         print("\n🔄 重新開始遊戲...")
-        return self.play()
     
-    def get_user_choice(self, choices: List[Dict[str, Any]]) -> str:
-        """獲取用戶選擇"""
+    def get_user_choice(self, choice_count: int) -> int:
+        """獲取用戶選擇，回傳選項索引（從 0 開始）"""
         while True:
             try:
-                choice_num = input(f"\n請選擇 (1-{len(choices)}): ").strip()
+                choice_num = input(f"\n請選擇 (1-{choice_count}): ").strip()
                 choice_index = int(choice_num) - 1
                 
-                if 0 <= choice_index < len(choices):
-                    return choices[choice_index]['next_scene']
+                if 0 <= choice_index < choice_count:
+                    return choice_index
                 else:
-                    print(f"請輸入 1 到 {len(choices)} 之間的數字")
+                    print(f"請輸入 1 到 {choice_count} 之間的數字")
             except ValueError:
                 print("請輸入有效的數字")
             except KeyboardInterrupt:
@@ -122,25 +285,46 @@ class HalloweenAdventure:
     
     def play(self):
         """主要遊戲循環"""
+        graph = self.graph
         while True:
+            if self.recorder is not None and self.trace is None:
+                self.trace = self.recorder.begin(graph, graph.index_of(self.current_scene))
+            
             # 顯示當前場景
-            self.display_scene(self.current_scene)
+            restart = self.display_scene(self.current_scene)
+            
+            scene = graph.index_of(self.current_scene)
+            if scene == NO_SCENE:
+                break
             
-            # 檢查是否為結局
-            if self.story_data.get(self.current_scene, {}).get('is_ending', False):
+            # 檢查是否為結局（重新開始時留在迴圈內，不再遞迴呼叫 play）
+            if graph.is_ending(scene):
+                self.end_trace()
+                if restart:
+                    self.reset_state()
+                    continue
                 break
             
             # 獲取選擇
-            scene = self.story_data[self.current_scene]
-            if 'choices' in scene:
-                next_scene = self.get_user_choice(scene['choices'])
-                self.current_scene = next_scene
+            if graph.has_choices(scene):
+                choice_index = self.get_user_choice(graph.choice_count(scene))
+                next_scene = graph.next_scene(scene, choice_index)
+                if next_scene == NO_SCENE:
+                    # 非嚴格模式編譯的故事可能含有斷裂連結
+                    print("❌ 找不到場景資料")
+                    self.end_trace()
+                    break
+                if self.trace is not None:
+                    self.trace.step(choice_index, next_scene)
+                self.current_scene = graph.scene_ids[next_scene]
             else:
                 print("❌ 場景沒有選擇選項")
                 break
     
     def start(self):
         """開始遊戲"""
+        if self.fast_start:
+            self.preload_stories()
         print("🎃" * 20)
         print("    Tsext Adventure: Halloween Haunt")
         print("        萬聖節瑟瑟冒險遊戲")
@@ -165,6 +349,7 @@ class HalloweenAdventure:
         
         try:
             start_input = input().strip().lower()
+            self.mark('start_pressed')
             if start_input == 'start' or start_input == '':
                 self.load_stories()
                 self.play()
@@ -172,11 +357,23 @@ class HalloweenAdventure:
                 print("👻 感謝遊玩！")
         except (EOFError, KeyboardInterrupt):
             print("\n👻 遊戲結束！")
+        finally:
+            self.close_progress()
+            self.close_recorder()
+            self.write_startup_log()
 
 
 def main():
     """主函數"""
-    game = HalloweenAdventure()
+    # 設定 TSEXT_PROGRESS_DB 時以 SQLite 保存跨遊戲的進度，
+    # 設定 TSEXT_SESSION_LOG 時記錄每次遊玩的選擇序列；
+    # TSEXT_FAST_START 在輸入名字時於背景載入故事，TSEXT_STORY_SNAPSHOT
+    # 指定預編譯的 .tsxs 故事檔，TSEXT_STARTUP_LOG 記錄啟動計時
+    game = HalloweenAdventure(progress_db=os.getenv('TSEXT_PROGRESS_DB'),
+                              session_log=os.getenv('TSEXT_SESSION_LOG'),
+                              fast_start=os.getenv('TSEXT_FAST_START', '').lower() in ('1', 'true', 'yes'),
+                              snapshot=os.getenv('TSEXT_STORY_SNAPSHOT'),
+                              startup_log=os.getenv('TSEXT_STARTUP_LOG'))
     try:
         game.start()
     except KeyboardInterrupt:
@@ -10,7 +10,6 @@
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
@@ -23,6 +22,7 @@ sys.path.insert(0, current_dir)
 from monthly_stats import MonthlyStatsAnalyzer
 from award_system import AwardSystem
 from github_api import GitHubAPI
+from github_http import get_transport
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -176,14 +176,14 @@ class AnnouncementSystem:
                 chunks = self._split_message(announcement, 2000)
                 for chunk in chunks:
                     payload = {"content": chunk}
-                    response = requests.post(
+                    response = get_transport().post(
                         self.announcement_config['discord_webhook_url'],
                         json=payload
                     )
                     response.raise_for_status()
             else:
                 payload = {"content": announcement}
-                response = requests.post(
+                response = get_transport().post(
                     self.announcement_config['discord_webhook_url'],
                     json=payload
                 )
@@ -214,7 +214,7 @@ class AnnouncementSystem:
                 'User-Agent': 'Tsext-Adventure-Announcement-System'
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = get_transport().post(url, json=payload, headers=headers)
             response.raise_for_status()
             
             logger.info("成功發布到 GitHub Discussion")
@@ -242,7 +242,7 @@ class AnnouncementSystem:
                 'User-Agent': 'Tsext-Adventure-Announcement-System'
             }
             
-            response = requests.post(url, json=payload, headers=headers)
+            response = get_transport().post(url, json=payload, headers=headers)
             response.raise_for_status()
             
             logger.info("成功發布到 GitHub Issue")
@@ -291,7 +291,7 @@ class AnnouncementSystem:
         
         try:
             payload = {"content": notification}
-            response = requests.post(
+            response = get_transport().post(
                 self.announcement_config['discord_webhook_url'],
                 json=payload
             )
@@ -334,7 +334,7 @@ class AnnouncementSystem:
         
         try:
             payload = {"content": notification}
-            response = requests.post(
+            response = get_transport().post(
                 self.announcement_config['discord_webhook_url'],
                 json=payload
             )
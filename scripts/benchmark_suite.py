@@ -0,0 +1,480 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效能基準測試
+離線量測遊戲引擎、場景檢查器與社群統計在不同資料量下的執行時間，
+並與記錄的基準比較，找出效能退化
+
+用法:
+    python scripts/benchmark_suite.py [--quick] [--only 名稱[,名稱...]]
+                                      [--repeat N] [--output 結果檔]
+                                      [--threshold 比例] [--update-baseline]
+
+所有輸入都是以固定種子產生的合成資料（故事由 story_engine.generate
+產生），不需要網路。--quick 只測試每個項目最小的兩種資料量；
+--output 將完整結果寫成 JSON。
+
+結果與 config/benchmark_baseline.json 比較時，會以校準迴圈的時間
+換算不同機器的速度差異；任何項目比基準慢超過門檻（預設 0.5，即慢
+50%）時以狀態碼 1 結束。--update-baseline 以這次的結果更新基準。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import builtins
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest.mock import patch
+
+# 添加專案根目錄與 scripts 目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.insert(0, project_root)
+sys.path.insert(0, current_dir)
+
+from story_engine import clear_cache
+from story_engine.generate import StoryGenerator, generate_story
+
+BASELINE_FILE = os.path.join(project_root, 'config', 'benchmark_baseline.json')
+RESULT_VERSION = 1
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.5
+# --quick 時每個項目只測試的資料量數
+QUICK_SIZES = 2
+# 場景轉移測試中每次執行的回合數
+TRANSITION_TURNS = 20000
+CALIBRATION_LOOPS = 200000
+
+PR_TITLES = [
+    'Add new story scene', 'Fix broken ending link', 'Improve scene loading performance',
+    'Update UI design for mobile', 'Add documentation for story format', 'Refactor analyzer',
+    '新增萬聖節劇情場景', '修復結局分數錯誤', '優化網頁介面設計'
+]
+LABELS = ['story', 'bug', 'enhancement', 'feature', 'documentation', 'ui']
+
+
+def synthetic_activity(count: int, days: int = 30,
+                       seed: int = 0) -> Tuple[List[Dict], List[Dict], List[Dict]]:
+    """
+    產生合成的 PR、Issue 與 Commit，欄位與 GitHub API 回應相同
+
+    Args:
+        count: 每種資料的筆數
+        days: 建立時間分布的天數
+        seed: 亂數種子
+
+    Returns:
+        (PR 列表, Issue 列表, Commit 列表)
+    """
+    rng = random.Random(seed)
+    contributors = [f"contributor{i}" for i in range(max(5, count // 20))]
+    now = datetime(2026, 1, 31, 12, 0, 0)
+
+    def timestamp() -> str:
+        return (now - timedelta(seconds=rng.randint(0, days * 86400))).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    prs = []
+    for i in range(count):
+        created = timestamp()
+        prs.append({
+            'number': i + 1,
+            'title': rng.choice(PR_TITLES),
+            'user': {'login': rng.choice(contributors)},
+            'labels': [{'name': name} for name in rng.sample(LABELS, rng.randint(0, 2))],
+            'created_at': created,
+            'merged_at': created if rng.random() < 0.7 else None,
+            'html_url': f"https://github.com/example/repo/pull/{i + 1}",
+            'comments': rng.randint(0, 10),
+            'changed_files': rng.randint(1, 20)
+        })
+    issues = [{
+        'number': count + i + 1,
+        'title': rng.choice(PR_TITLES),
+        'user': {'login': rng.choice(contributors)},
+        'labels': [{'name': name} for name in rng.sample(LABELS, rng.randint(0, 2))],
+        'created_at': timestamp(),
+        'comments': rng.randint(0, 10)
+    } for i in range(count)]
+    commits = [{
+        'sha': f"{i:040x}",
+        'author': {'login': rng.choice(contributors)} if rng.random() < 0.95 else None
+    } for i in range(count)]
+    return prs, issues, commits
+
+
+class OfflineGitHub:
+    """以合成資料回應的 GitHub 客戶端，介面與 GitHubAPI、GitHubClient 相同"""
+
+    def __init__(self, count: int, seed: int = 0):
+        self.prs, self.issues, self.commits = synthetic_activity(count, seed=seed)
+
+    def get_pull_requests(self, owner: str, repo: str, state: str = 'all', since=None) -> List[Dict]:
+        return self.prs
+
+    def get_issues(self, owner: str, repo: str, state: str = 'all', since=None) -> List[Dict]:
+        return self.issues
+
+    def get_commits(self, owner: str, repo: str, since=None) -> List[Dict]:
+        return self.commits
+
+
+class _TurnsExhausted(Exception):
+    """場景轉移測試的回合數用完"""
+
+
+def _write_story(workdir: str, size: int) -> str:
+    path = os.path.join(workdir, f"story_{size}.json")
+    if not os.path.exists(path):
+        generate_story(path, size)
+    return path
+
+
+def _bench_load_stories(size: int, workdir: str) -> Callable[[], Any]:
+    """HalloweenAdventure.load_stories：解析並編譯故事 JSON"""
+    import main
+
+    path = _write_story(workdir, size)
+
+    def run():
+        clear_cache()
+        game = main.HalloweenAdventure()
+        with patch.object(main, 'STORY_FILE', path):
+            game.load_stories()
+        return game
+    return run
+
+
+def _bench_scene_transitions(size: int, workdir: str) -> Callable[[], Any]:
+    """HalloweenAdventure.play：以腳本輸入連續遊玩固定回合數"""
+    import main
+    from story_engine import load_story
+    from story_engine.frames import clear_frame_caches
+
+    graph = load_story(_write_story(workdir, size))
+
+    def run():
+        clear_frame_caches()
+        game = main.HalloweenAdventure()
+        game.graph = graph
+        game.stories_loaded = True
+        rng = random.Random(size)
+        turns = [0]
+
+        def scripted_input(prompt=''):
+            turns[0] += 1
+            if turns[0] > TRANSITION_TURNS:
+                raise _TurnsExhausted()
+            if '重新開始' in prompt:
+                return 'y'
+            count = int(prompt.rsplit('-', 1)[1].split(')')[0])
+            return str(rng.randint(1, count))
+
+        with patch.object(builtins, 'input', scripted_input):
+            try:
+                game.play()
+            except _TurnsExhausted:
+                pass
+        return turns[0]
+    return run
+
+
+def _bench_scenario_check(size: int, workdir: str) -> Callable[[], Any]:
+    """ScenarioChecker.run_check：從 HTML 擷取 storyData 並完整檢查"""
+    import importlib.util
+
+    spec = importlib.util.spec_from_file_location(
+        'check_scenario_completeness', os.path.join(current_dir, 'check-scenario-completeness.py')
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    html_path = os.path.join(workdir, f"index_{size}.html")
+    with open(html_path, 'w', encoding='utf-8') as f:
+        f.write('<script>\n        const storyData = ')
+        StoryGenerator(size).write(f)
+        f.write(';\n</script>\n')
+
+    def run():
+        return module.ScenarioChecker(html_path).run_check()
+    return run
+
+
+def _bench_contribution_analysis(size: int, workdir: str) -> Callable[[], Any]:
+    """ContributionAnalyzer.analyze_period"""
+    from community_reporter import ContributionAnalyzer
+
+    analyzer = ContributionAnalyzer(OfflineGitHub(size), 'owner', 'repo')
+    return lambda: analyzer.analyze_period(30)
+
+
+def _bench_monthly_stats(size: int, workdir: str) -> Callable[[], Any]:
+    """MonthlyStatsAnalyzer.analyze_monthly_contributions"""
+    from monthly_stats import MonthlyStatsAnalyzer
+
+    analyzer = MonthlyStatsAnalyzer(OfflineGitHub(size), 'owner', 'repo')
+    return lambda: analyzer.analyze_monthly_contributions(30)
+
+
+def _bench_monthly_awards(size: int, workdir: str) -> Callable[[], Any]:
+    """AwardSystem.evaluate_monthly_awards（含月度分析）"""
+    from award_system import AwardSystem
+
+    system = AwardSystem(OfflineGitHub(size), 'owner', 'repo')
+    return lambda: system.evaluate_monthly_awards(30)
+
+
+def _bench_community_report(size: int, workdir: str) -> Callable[[], Any]:
+    """ReportGenerator.generate_report（不含分析）"""
+    from community_reporter import ContributionAnalyzer, ReportGenerator
+
+    analysis = ContributionAnalyzer(OfflineGitHub(size), 'owner', 'repo').analyze_period(30)
+    generator = ReportGenerator('owner', 'repo')
+    return lambda: generator.generate_report(analysis)
+
+
+# 名稱 -> (建立測試函數, 資料量)；故事項目的資料量是場景數，社群項目是每種資料的筆數
+BENCHMARKS: Dict[str, Tuple[Callable[[int, str], Callable[[], Any]], Tuple[int, ...]]] = {
+    'load_stories': (_bench_load_stories, (1000, 10000, 100000)),
+    'scene_transitions': (_bench_scene_transitions, (1000, 10000, 100000)),
+    'scenario_check': (_bench_scenario_check, (100, 1000, 10000)),
+    'contribution_analysis': (_bench_contribution_analysis, (1000, 10000, 100000)),
+    'monthly_stats': (_bench_monthly_stats, (1000, 10000, 100000)),
+    'monthly_awards': (_bench_monthly_awards, (1000, 10000, 100000)),
+    'community_report': (_bench_community_report, (1000, 10000, 100000)),
+}
+
+
+def calibrate(repeat: int = DEFAULT_REPEAT) -> float:
+    """量測固定的純 Python 工作量，用來換算不同機器的速度"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        table: Dict[int, int] = {}
+        for i in range(CALIBRATION_LOOPS):
+            table[i % 1000] = table.get(i % 1000, 0) + len(str(i))
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(name: str, size: int, workdir: str, repeat: int = DEFAULT_REPEAT) -> Dict[str, Any]:
+    """
+    執行單一測試項目
+
+    準備資料的時間不計入；每次執行的輸出導向 os.devnull，日誌暫時停用。
+    與 timeit 相同，執行期間停用垃圾回收，避免前面項目留下的物件影響結果。
+
+    Returns:
+        包含最佳、中位數與每次執行時間（秒）的字典
+    """
+    setup, _ = BENCHMARKS[name]
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            run = setup(size, workdir)
+            timings = []
+            for _ in range(repeat):
+                gc.collect()
+                gc.disable()
+                try:
+                    started = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - started)
+                finally:
+                    gc.enable()
+    finally:
+        logging.disable(logging.NOTSET)
+        clear_cache()
+    return {
+        'name': name,
+        'size': size,
+        'best': min(timings),
+        'median': statistics.median(timings),
+        'timings': timings
+    }
+
+
+def run_suite(names: Optional[List[str]] = None, quick: bool = False,
+              repeat: int = DEFAULT_REPEAT, progress: Optional[Callable[[Dict], None]] = None) -> Dict[str, Any]:
+    """
+    執行測試套件
+
+    Args:
+        names: 要執行的項目，未指定時執行全部
+        quick: 只測試每個項目最小的幾種資料量
+        repeat: 每個項目執行的次數
+        progress: 每完成一個項目時呼叫，參數為該項目的結果
+
+    Raises:
+        KeyError: 未知的項目名稱
+    """
+    names = list(BENCHMARKS) if names is None else names
+    for name in names:
+        if name not in BENCHMARKS:
+            raise KeyError(name)
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name in names:
+            sizes = BENCHMARKS[name][1]
+            for size in sizes[:QUICK_SIZES] if quick else sizes:
+                result = run_benchmark(name, size, workdir, repeat)
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return {
+        'version': RESULT_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'calibration': calibrate(),
+        'results': results
+    }
+
+
+def compare(suite: Dict[str, Any], baseline: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    與基準比較
+
+    兩邊的最佳時間先除以各自的校準時間，再計算比例。
+
+    Returns:
+        每個有基準的項目：name、size、baseline、current、ratio 與 regressed
+    """
+    recorded = {(item['name'], item['size']): item['best'] for item in baseline.get('results', [])}
+    scale = suite['calibration'] / baseline['calibration'] if baseline.get('calibration') else 1.0
+    comparisons = []
+    for result in suite['results']:
+        key = (result['name'], result['size'])
+        if key not in recorded:
+            continue
+        expected = recorded[key] * scale
+        ratio = result['best'] / expected if expected > 0 else 1.0
+        comparisons.append({
+            'name': result['name'],
+            'size': result['size'],
+            'baseline': expected,
+            'current': result['best'],
+            'ratio': ratio,
+            'regressed': ratio > 1 + threshold
+        })
+    return comparisons
+
+
+def load_baseline(path: str = BASELINE_FILE) -> Optional[Dict[str, Any]]:
+    """載入基準，不存在或格式不符時回傳 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(baseline, dict) or baseline.get('version') != RESULT_VERSION:
+        return None
+    return baseline
+
+
+def merge_baseline(baseline: Optional[Dict[str, Any]], suite: Dict[str, Any]) -> Dict[str, Any]:
+    """以這次的結果更新基準，沒有執行的項目保留原本的數值（依校準時間換算）"""
+    merged = {key: value for key, value in suite.items() if key != 'results'}
+    current = {(item['name'], item['size']) for item in suite['results']}
+    results = [{'name': item['name'], 'size': item['size'], 'best': item['best']} for item in suite['results']]
+    if baseline:
+        scale = suite['calibration'] / baseline['calibration'] if baseline.get('calibration') else 1.0
+        for item in baseline.get('results', []):
+            if (item['name'], item['size']) not in current:
+                results.append({'name': item['name'], 'size': item['size'], 'best': item['best'] * scale})
+    order = list(BENCHMARKS)
+    results.sort(key=lambda item: (order.index(item['name']) if item['name'] in order else len(order), item['size']))
+    merged['results'] = results
+    return merged
+
+
+def parse_args(args: List[str]) -> Dict[str, Any]:
+    """解析命令列參數"""
+    options: Dict[str, Any] = {
+        'quick': False, 'only': None, 'repeat': DEFAULT_REPEAT, 'output': None,
+        'threshold': DEFAULT_THRESHOLD, 'update_baseline': False
+    }
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == '--quick':
+            options['quick'] = True
+        elif arg == '--update-baseline':
+            options['update_baseline'] = True
+        elif arg in ('--only', '--repeat', '--output', '--threshold') and i + 1 < len(args):
+            value = args[i + 1]
+            if arg == '--only':
+                options['only'] = value.split(',')
+            elif arg == '--repeat':
+                options['repeat'] = int(value)
+            elif arg == '--threshold':
+                options['threshold'] = float(value)
+            else:
+                options['output'] = value
+            i += 1
+        else:
+            raise ValueError(f"未知的參數: {arg}")
+        i += 1
+    return options
+
+
+def main():
+    """主函數"""
+    try:
+        options = parse_args(sys.argv[1:])
+    except ValueError:
+        print(__doc__)
+        sys.exit(1)
+
+    def report(result):
+        print(f"⏱️  {result['name']:<24} {result['size']:>8}  最佳 {result['best'] * 1000:10.2f} ms"
+              f"  中位數 {result['median'] * 1000:10.2f} ms", flush=True)
+
+    try:
+        suite = run_suite(options['only'], options['quick'], options['repeat'], report)
+    except KeyError as e:
+        print(f"❌ 未知的測試項目: {e.args[0]}（可用: {', '.join(BENCHMARKS)}）")
+        sys.exit(1)
+
+    baseline = load_baseline()
+    regressions = []
+    if baseline is not None:
+        suite['comparison'] = compare(suite, baseline, options['threshold'])
+        regressions = [item for item in suite['comparison'] if item['regressed']]
+        print(f"\n與基準比較（校準 {suite['calibration'] * 1000:.1f} ms，基準 {baseline['calibration'] * 1000:.1f} ms）:")
+        for item in suite['comparison']:
+            mark = '❌' if item['regressed'] else '✅'
+            print(f"   {mark} {item['name']:<24} {item['size']:>8}  {item['ratio']:6.2f}x")
+    elif not options['update_baseline']:
+        print("\n⚠️  沒有基準，請以 --update-baseline 建立")
+
+    if options['output']:
+        with open(options['output'], 'w', encoding='utf-8') as f:
+            json.dump(suite, f, ensure_ascii=False, indent=2)
+        print(f"📄 結果已保存到 {options['output']}")
+
+    if options['update_baseline']:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(merge_baseline(baseline, suite), f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"📌 基準已更新: {BASELINE_FILE}")
+    elif regressions:
+        print(f"\n❌ {len(regressions)} 個項目比基準慢超過 {options['threshold']:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
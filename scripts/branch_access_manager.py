@@ -10,7 +10,6 @@
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Set
 import logging
@@ -21,6 +20,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from github_api import GitHubAPI, ContributorTracker
+from github_http import get_transport
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -231,7 +231,7 @@ class BranchAccessManager:
             protection_config = self.branch_protection_config[branch_name]
             url = f"https://api.github.com/repos/{self.owner}/{self.repo}/branches/{branch_name}/protection"
             
-            response = requests.put(url, json=protection_config, headers=self.github_api.headers)
+            response = get_transport().request('PUT', url, json=protection_config, headers=self.github_api.headers)
             response.raise_for_status()
             
             logger.info(f"成功設定分支 {branch_name} 的保護規則")
@@ -273,7 +273,7 @@ class BranchAccessManager:
             url = f"https://api.github.com/repos/{self.owner}/{self.repo}/branches/{branch_name}/protection/restrictions/users"
             payload = {'users': [username]}
             
-            response = requests.post(url, json=payload, headers=self.github_api.headers)
+            response = get_transport().post(url, json=payload, headers=self.github_api.headers)
             response.raise_for_status()
             
             logger.info(f"成功授予用戶 {username} 對分支 {branch_name} 的直接存取權限")
@@ -318,7 +318,7 @@ class BranchAccessManager:
                 'base': branch_name
             }
             
-            response = requests.post(url, json=payload, headers=self.github_api.headers)
+            response = get_transport().post(url, json=payload, headers=self.github_api.headers)
             response.raise_for_status()
             
             logger.info(f"成功為用戶 {username} 創建分支 {branch_name} 的存取 PR")
@@ -334,7 +334,7 @@ class BranchAccessManager:
             # 從分支保護規則中移除用戶
             url = f"https://api.github.com/repos/{self.owner}/{self.repo}/branches/{branch_name}/protection/restrictions/users/{username}"
             
-            response = requests.delete(url, headers=self.github_api.headers)
+            response = get_transport().request('DELETE', url, headers=self.github_api.headers)
             response.raise_for_status()
             
             logger.info(f"成功撤銷用戶 {username} 對分支 {branch_name} 的存取權限")
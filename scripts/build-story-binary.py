@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預編譯故事建置腳本
+將故事 JSON 編譯成以 mmap 載入的二進位故事檔（.tsxs）
+
+用法:
+    python scripts/build-story-binary.py
+
+輸出位置為來源檔旁的 build/ 目錄，例如 stories/build/halloween.tsxs。
+遊戲與伺服器在預編譯檔比 JSON 新時會自動使用它。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import compile_story, StoryFormatError
+from story_engine.binary import default_binary_path, write_binary
+
+# (來源檔案, 起始場景)
+STORY_SOURCES = [
+    ('stories/halloween.json', 'start'),
+    ('christmas_scenes.json', 'christmas_entrance'),
+]
+
+
+def build_story(source: str, start: str) -> bool:
+    """
+    編譯單一故事檔
+
+    Returns:
+        是否建置成功
+    """
+    try:
+        with open(source, 'r', encoding='utf-8') as f:
+            story_data = json.load(f)
+        graph = compile_story(story_data, start=start, strict=False)
+    except (OSError, json.JSONDecodeError, StoryFormatError) as e:
+        print(f"❌ {source}: {e}")
+        return False
+
+    output = default_binary_path(source)
+    size = write_binary(graph, output)
+    print(f"✅ {source} → {output}（{len(graph)} 個場景，{size} 位元組）")
+    if graph.broken_links:
+        print(f"   ⚠️  {len(graph.broken_links)} 個選項連接到不存在的場景")
+    return True
+
+
+def main():
+    """主函數"""
+    print("🎃 建置預編譯故事檔")
+    print("=" * 50)
+
+    results = [build_story(source, start) for source, start in STORY_SOURCES]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
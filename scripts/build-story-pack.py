@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事包建置腳本
+將故事 JSON 轉成按需解析場景的故事包（.tspack）
+
+用法:
+    python scripts/build-story-pack.py <故事.json> [起始場景] [輸出路徑]
+
+未指定輸出路徑時寫到來源檔旁，例如 stories/halloween.tspack。
+伺服器可將 STORY_FILE 指向故事包直接使用。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import StoryFormatError, write_pack
+from story_engine.pack import PACK_SUFFIX
+
+
+def main():
+    """主函數"""
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    source = sys.argv[1]
+    start = sys.argv[2] if len(sys.argv) > 2 else 'start'
+    output = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(source)[0] + PACK_SUFFIX
+
+    try:
+        with open(source, 'r', encoding='utf-8') as f:
+            story_data = json.load(f)
+        size = write_pack(story_data, output, start=start)
+    except (OSError, json.JSONDecodeError, StoryFormatError) as e:
+        print(f"❌ {source}: {e}")
+        sys.exit(1)
+
+    print(f"✅ {source} → {output}（{len(story_data)} 個場景，{size} 位元組）")
+
+
+if __name__ == "__main__":
+    main()
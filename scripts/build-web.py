@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+網頁版建置腳本
+以故事 JSON 為唯一資料來源，更新所有 HTML 目標中的 storyData
+
+用法:
+    python scripts/build-web.py           # 增量建置，只重新渲染有變更的故事包
+    python scripts/build-web.py --force   # 忽略快取全部重建
+    python scripts/build-web.py --check   # 只檢查，目標過期時以狀態碼 1 結束
+
+請修改 stories/*.json 或 christmas_scenes.json，不要直接修改 HTML 中的
+storyData；下次建置時 HTML 中的修改會被覆蓋。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import StoryFormatError
+from story_engine.bundle import BundleBuilder
+
+
+def main():
+    """主函數"""
+    args = sys.argv[1:]
+    unknown = [arg for arg in args if arg not in ('--force', '--check')]
+    if unknown:
+        print(__doc__)
+        sys.exit(1)
+
+    # 路徑相對於專案根目錄
+    os.chdir(os.path.dirname(current_dir))
+    builder = BundleBuilder()
+
+    try:
+        if '--check' in args:
+            stale = builder.stale_targets()
+            if stale:
+                for path in stale:
+                    print(f"❌ {path} 的故事資料已過期，請執行 scripts/build-web.py")
+                sys.exit(1)
+            print("✅ 所有 HTML 目標都與故事 JSON 一致")
+            return
+
+        result = builder.build(force='--force' in args)
+    except (OSError, KeyError, StoryFormatError) as e:
+        print(f"❌ 建置失敗: {e}")
+        sys.exit(1)
+
+    for path, status in result['packs'].items():
+        print(f"📦 {path}: {'重新渲染' if status == 'rebuilt' else '使用快取'}")
+    for path, status in result['targets'].items():
+        print(f"{'✅' if status == 'written' else '⏭️ '} {path}: {'已更新' if status == 'written' else '沒有變更'}")
+    print(f"共 {result['scenes']} 個場景，內容雜湊 {result['story_hash'][:12]}")
+    if result['broken_links']:
+        print(f"⚠️  {result['broken_links']} 個選項連接到不存在的場景")
+
+
+if __name__ == "__main__":
+    main()
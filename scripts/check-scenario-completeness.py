@@ -3,11 +3,21 @@
 檢查遊戲場景完整性 - 確保所有場景都有對應的結局
 """
 
-import json
-import re
 import os
+import sys
 from typing import Dict, Set, List, Tuple
 
+# 添加專案根目錄到 Python 路徑
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from story_engine import compile_story, StoryFormatError
+from story_engine.analysis import StoryAnalyzer
+from story_engine.jsliteral import extract_variable, JSLiteralError
+from story_engine.markov import absorption_analysis
+
+# 報告中列出的最常見與最罕見結局數量
+LISTED_ENDINGS = 5
+
 class ScenarioChecker:
     def __init__(self, html_file="web/index.html"):
         self.html_file = html_file
@@ -16,6 +26,9 @@ class ScenarioChecker:
         self.choices = {}
         self.orphaned_scenarios = set()
         self.unreachable_scenarios = set()
+        self.analysis = {}
+        self.graph = None
+        self.absorption = {}
         
     def extract_scenarios(self):
         """從 HTML 檔案中提取場景資料"""
@@ -26,77 +39,21 @@ class ScenarioChecker:
         with open(self.html_file, 'r', encoding='utf-8') as f:
             content = f.read()
         
-        # 尋找 storyData 物件
-        pattern = r'const storyData = ({.*?});'
-        match = re.search(pattern, content, re.DOTALL)
-        
-        if not match:
+        # 以 JavaScript 常值解析器單次掃描擷取 storyData 物件
+        try:
+            self.scenarios = extract_variable(content, 'storyData')
+        except KeyError:
             print("錯誤: 找不到 storyData 物件")
             return False
-            
-        try:
-            # 解析 JSON 資料
-            story_data_str = match.group(1)
-            
-            # 更強健的 JSON 修正
-            # 1. 移除尾隨逗號
-            story_data_str = re.sub(r',(\s*[}\]])', r'\1', story_data_str)
-            
-            # 2. 為未加引號的鍵加上引號
-            story_data_str = re.sub(r'(\w+):', r'"\1":', story_data_str)
-            
-            # 3. 修正可能的 JavaScript 註釋
-            story_data_str = re.sub(r'//.*?\n', '\n', story_data_str)
-            
-            # 4. 修正可能的單引號
-            story_data_str = re.sub(r"'([^']*)':", r'"\1":', story_data_str)
-            
-            # 5. 處理可能的 undefined 值
-            story_data_str = re.sub(r':\s*undefined', ': null', story_data_str)
-            
-            self.scenarios = json.loads(story_data_str)
-            print(f"成功提取 {len(self.scenarios)} 個場景")
-            return True
-            
-        except json.JSONDecodeError as e:
-            print(f"JSON 解析錯誤: {e}")
-            print("嘗試手動分析場景...")
-            
-            # 如果 JSON 解析失敗，嘗試手動分析
-            return self.manual_scenario_analysis(story_data_str)
-    
-    def manual_scenario_analysis(self, story_data_str):
-        """手動分析場景資料"""
-        print("使用手動分析方法...")
-        
-        # 使用正則表達式找出所有場景
-        scene_pattern = r'"([^"]+)":\s*{'
-        scenes = re.findall(scene_pattern, story_data_str)
-        
-        print(f"找到 {len(scenes)} 個場景:")
-        for scene in scenes:
-            print(f"  - {scene}")
-        
-        # 找出結局場景
-        ending_pattern = r'"is_ending":\s*true'
-        endings = re.findall(ending_pattern, story_data_str)
-        
-        print(f"找到 {len(endings)} 個結局場景")
-        
-        # 簡單的場景統計
-        self.scenarios = {scene: {} for scene in scenes}
-        self.endings = set()
+        except JSLiteralError as e:
+            print(f"storyData 解析錯誤: {e}")
+            return False
         
-        # 嘗試找出結局場景
-        for scene in scenes:
-            scene_block_pattern = rf'"{scene}":\s*{{(.*?)}}'
-            scene_match = re.search(scene_block_pattern, story_data_str, re.DOTALL)
-            if scene_match:
-                scene_content = scene_match.group(1)
-                if '"is_ending":\s*true' in scene_content:
-                    self.endings.add(scene)
+        if not isinstance(self.scenarios, dict):
+            print("錯誤: storyData 不是物件")
+            return False
         
-        print(f"成功分析 {len(self.scenarios)} 個場景，其中 {len(self.endings)} 個是結局")
+        print(f"成功提取 {len(self.scenarios)} 個場景")
         return True
     
     def analyze_scenarios(self):
@@ -157,33 +114,23 @@ class ScenarioChecker:
         """找出無法到達的場景"""
         print("\n檢查不可達場景...")
         
-        # 從起始場景開始進行深度優先搜索
-        visited = set()
-        
-        def dfs(scene_id):
-            if scene_id in visited:
-                return
-            visited.add(scene_id)
-            
-            if scene_id in self.choices:
-                for target in self.choices[scene_id]:
-                    dfs(target)
-        
-        # 從可能的起始場景開始
+        # 從可能的起始場景開始，找不到時從第一個場景開始
         start_scenarios = ['start', 'beginning', 'intro']
-        for start_scene in start_scenarios:
-            if start_scene in self.scenarios:
-                dfs(start_scene)
-                break
+        start_scene = next((scene for scene in start_scenarios if scene in self.scenarios), None)
+        if start_scene is None and self.scenarios:
+            start_scene = next(iter(self.scenarios))
         
-        # 如果找不到起始場景，嘗試從第一個場景開始
-        if not visited and self.scenarios:
-            first_scene = list(self.scenarios.keys())[0]
-            dfs(first_scene)
+        # 以編譯後的故事圖做迭代分析，避免遞迴深度限制
+        try:
+            graph = compile_story(self.scenarios, start=start_scene, strict=False)
+        except StoryFormatError as e:
+            print(f"[錯誤] 無法分析場景結構: {e}")
+            self.unreachable_scenarios = set(self.scenarios.keys())
+            return
         
-        # 找出不可達場景
-        all_scenarios = set(self.scenarios.keys())
-        self.unreachable_scenarios = all_scenarios - visited
+        self.graph = graph
+        self.analysis = StoryAnalyzer(graph).analyze()
+        self.unreachable_scenarios = set(self.analysis['unreachable'])
         
         if self.unreachable_scenarios:
             print("[警告] 發現不可達場景:")
@@ -192,6 +139,37 @@ class ScenarioChecker:
                 print(f"  - {scene_id}: {scene_data.get('title', '無標題')}")
         else:
             print("[OK] 沒有發現不可達場景")
+        
+        if self.analysis['cycles']:
+            print(f"[資訊] 發現 {len(self.analysis['cycles'])} 個循環:")
+            for cycle in self.analysis['cycles']:
+                print(f"  - {' ↔ '.join(cycle)}")
+        
+        print(f"[資訊] 可到達結局: {len(self.analysis['endings'])}，"
+              f"遊玩路線: {self.analysis['total_playthroughs']}"
+              f"{'（含循環，實際無上限）' if self.analysis['unbounded_playthroughs'] else ''}")
+    
+    def analyze_ending_probabilities(self):
+        """以吸收馬可夫鏈計算每個結局的精確機率（每個選項機率相同）"""
+        print("\n計算結局機率...")
+        if self.graph is None:
+            print("[錯誤] 沒有可分析的故事圖")
+            return
+        
+        self.absorption = absorption_analysis(self.graph)
+        endings = self.absorption['endings']
+        for ending in endings:
+            print(f"  {ending['id']}: {ending['probability']:.4%}")
+        
+        if self.absorption['dead_ends']:
+            print("[警告] 遊玩可能停在沒有選項的場景:")
+            for scene_id, probability in self.absorption['dead_ends'].items():
+                print(f"  - {scene_id}: {probability:.4%}")
+        if self.absorption['broken_links']:
+            print(f"[警告] 遊玩走到斷裂連結的機率: {self.absorption['broken_links']:.4%}")
+        if self.absorption['trapped']:
+            print(f"[警告] 遊玩困在沒有出口的循環中的機率: {self.absorption['trapped']:.4%}")
+            print(f"  - 循環場景: {', '.join(self.absorption['trapped_scenes'])}")
     
     def check_scenario_continuity(self):
         """檢查場景的連續性"""
@@ -230,6 +208,26 @@ class ScenarioChecker:
         print(f"  孤兒場景: {len(self.orphaned_scenarios)}")
         print(f"  不可達場景: {len(self.unreachable_scenarios)}")
         
+        if self.absorption:
+            endings = self.absorption['endings']
+            expected_steps = self.absorption['expected_steps']
+            print(f"\n結局機率（吸收馬可夫鏈，每個選項機率相同）:")
+            print(f"  可到達結局: {len(endings)}")
+            if expected_steps is None:
+                print("  期望步數: 無上限（可能困在循環中）")
+            else:
+                print(f"  期望步數: {expected_steps:.2f}")
+            print(f"  期望分數: {self.absorption['expected_score']:.1f}")
+            if endings:
+                print(f"  最常見的結局:")
+                for ending in endings[:LISTED_ENDINGS]:
+                    print(f"    - {ending['id']}: {ending['probability']:.4%}")
+                print(f"  最罕見的結局:")
+                for ending in endings[-LISTED_ENDINGS:][::-1]:
+                    print(f"    - {ending['id']}: {ending['probability']:.4%}（約每 {1 / ending['probability']:.0f} 次遊玩一次）")
+            unfinished = self.absorption['broken_links'] + self.absorption['trapped'] + sum(self.absorption['dead_ends'].values())
+            print(f"  無法正常結束的機率: {unfinished:.4%}")
+        
         # 計算完整性分數
         total_issues = len(self.orphaned_scenarios) + len(self.unreachable_scenarios)
         completeness_score = max(0, 100 - (total_issues * 10))
@@ -250,6 +248,8 @@ class ScenarioChecker:
             print(f"  - 修復 {len(self.orphaned_scenarios)} 個孤兒場景")
         if self.unreachable_scenarios:
             print(f"  - 修復 {len(self.unreachable_scenarios)} 個不可達場景")
+        if self.absorption and (self.absorption['dead_ends'] or self.absorption['broken_links'] or self.absorption['trapped']):
+            print("  - 修復會讓遊玩無法正常結束的死路、斷裂連結或沒有出口的循環")
         if completeness_score == 100:
             print("  - 場景結構完美，無需修復")
         
@@ -266,6 +266,7 @@ class ScenarioChecker:
         self.analyze_scenarios()
         self.find_orphaned_scenarios()
         self.find_unreachable_scenarios()
+        self.analyze_ending_probabilities()
         self.check_scenario_continuity()
         
         score = self.generate_report()
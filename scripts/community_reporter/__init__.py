@@ -8,6 +8,7 @@ Community Pulse Reporter
 - 獲取並分析貢獻者數據
 - 生成月度/週期性報告
 - 產生排行榜和統計數據
+- 以 GraphQL 批次下載 PR、Issue 與 Commit（GraphQLClient）
 
 作者: Tsext Adventure Team
 授權: MIT License
@@ -17,8 +18,9 @@ __version__ = '1.0.0'
 __author__ = 'Tsext Adventure Team'
 
 from .github_client import GitHubClient
+from .graphql_client import GraphQLClient
 from .analyzer import ContributionAnalyzer
 from .reporter import ReportGenerator
 
-__all__ = ['GitHubClient', 'ContributionAnalyzer', 'ReportGenerator']
+__all__ = ['GitHubClient', 'GraphQLClient', 'ContributionAnalyzer', 'ReportGenerator']
 
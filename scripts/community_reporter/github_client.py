@@ -9,25 +9,38 @@ GitHub API 客戶端
 """
 
 import os
-import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import logging
 
+from github_http import HTTPTransport, get_transport
+from github_pagination import paginate
+
 logger = logging.getLogger(__name__)
 
 
+def _created_before(since: Optional[datetime]) -> Optional[Callable[[Dict], bool]]:
+    """產生分頁的截止條件：項目建立時間早於 since（沒有時區的 since 視為本地時間）"""
+    if since is None:
+        return None
+    if since.tzinfo is None:
+        since = since.astimezone()
+    return lambda item: datetime.fromisoformat(item['created_at'].replace('Z', '+00:00')) < since
+
+
 class GitHubClient:
     """GitHub API 客戶端類別"""
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, transport: Optional[HTTPTransport] = None):
         """
         初始化 GitHub API 客戶端
         
         Args:
             token: GitHub Personal Access Token
+            transport: HTTP 傳輸層，預設使用行程內共用的連線池
         """
         self.token = token or os.getenv('GITHUB_TOKEN')
+        self.transport = transport or get_transport()
         if not self.token:
             logger.warning("未提供 GitHub Token，API 請求可能受到限制")
         
@@ -52,7 +65,7 @@ class GitHubClient:
             倉庫資訊字典
         """
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
@@ -68,29 +81,8 @@ class GitHubClient:
             貢獻者列表
         """
         url = f"{self.base_url}/repos/{owner}/{repo}/contributors"
-        all_contributors = []
-        page = 1
-        
-        while True:
-            response = requests.get(
-                url, 
-                headers=self.headers, 
-                params={'per_page': 100, 'page': page}
-            )
-            response.raise_for_status()
-            
-            contributors = response.json()
-            if not contributors:
-                break
-                
-            all_contributors.extend(contributors)
-            page += 1
-            
-            # 限制最多 1000 個貢獻者
-            if len(all_contributors) >= 1000:
-                break
-        
-        return all_contributors
+        # 限制最多 1000 個貢獻者
+        return paginate(self.transport, url, headers=self.headers)
     
     def get_pull_requests(
         self, 
@@ -114,39 +106,9 @@ class GitHubClient:
         url = f"{self.base_url}/repos/{owner}/{repo}/pulls"
         params = {'state': state, 'per_page': 100, 'sort': 'created', 'direction': 'desc'}
         
-        all_prs = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            prs = response.json()
-            if not prs:
-                break
-            
-            # 如果指定了 since，過濾日期
-            if since:
-                filtered_prs = [
-                    pr for pr in prs 
-                    if datetime.fromisoformat(pr['created_at'].replace('Z', '+00:00')) >= since
-                ]
-                all_prs.extend(filtered_prs)
-                
-                # 如果這一頁有 PR 早於 since，說明後面的都更早，可以停止
-                if len(filtered_prs) < len(prs):
-                    break
-            else:
-                all_prs.extend(prs)
-            
-            page += 1
-            
-            # 限制
-            if len(all_prs) >= 1000:
-                break
-        
-        return all_prs
+        # 依建立時間由新到舊排序，遇到早於 since 的 PR 即停止
+        return paginate(self.transport, url, params=params, headers=self.headers,
+                        cutoff=_created_before(since))
     
     def get_issues(
         self,
@@ -170,40 +132,10 @@ class GitHubClient:
         url = f"{self.base_url}/repos/{owner}/{repo}/issues"
         params = {'state': state, 'per_page': 100, 'sort': 'created', 'direction': 'desc'}
         
-        all_issues = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            issues = response.json()
-            if not issues:
-                break
-            
-            # 過濾掉 PR（GitHub API 的 issues endpoint 會包含 PR）
-            issues = [issue for issue in issues if 'pull_request' not in issue]
-            
-            # 如果指定了 since，過濾日期
-            if since:
-                filtered_issues = [
-                    issue for issue in issues
-                    if datetime.fromisoformat(issue['created_at'].replace('Z', '+00:00')) >= since
-                ]
-                all_issues.extend(filtered_issues)
-                
-                if len(filtered_issues) < len(issues):
-                    break
-            else:
-                all_issues.extend(issues)
-            
-            page += 1
-            
-            if len(all_issues) >= 1000:
-                break
-        
-        return all_issues
+        # 過濾掉 PR（GitHub API 的 issues endpoint 會包含 PR）
+        return paginate(self.transport, url, params=params, headers=self.headers,
+                        select=lambda issue: 'pull_request' not in issue,
+                        cutoff=_created_before(since))
     
     def get_commits(
         self,
@@ -232,23 +164,5 @@ class GitHubClient:
         if until:
             params['until'] = until.isoformat()
         
-        all_commits = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            commits = response.json()
-            if not commits:
-                break
-                
-            all_commits.extend(commits)
-            page += 1
-            
-            if len(all_commits) >= 1000:
-                break
-        
-        return all_commits
+        return paginate(self.transport, url, params=params, headers=self.headers)
 
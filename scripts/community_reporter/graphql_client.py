@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub GraphQL 客戶端
+以批次 GraphQL 查詢一次取得 PR、Issue 與 Commit，提供與 GitHubClient 相同的介面
+
+REST 的列表端點需要分別掃描 PR、Issue 與 Commit，而且 PR 列表沒有
+changed_files、評論數等欄位。這裡每一輪只送出一個查詢，同時取得三個
+連線（connection）的下一頁，各自以游標分頁；PR 與 Issue 依建立時間由新
+到舊排序，遇到早於 since 的項目即停止該連線。結果轉換成 REST 的欄位
+格式，ContributionAnalyzer 與 MonthlyStatsAnalyzer 可以直接使用。
+
+同一個倉庫與起始時間的結果會保留在記憶體中，分析器接連呼叫
+get_pull_requests、get_issues、get_commits 時只會下載一次。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from github_http import HTTPTransport
+from github_pagination import MAX_ITEMS
+from .github_client import GitHubClient
+
+logger = logging.getLogger(__name__)
+
+# 每一頁的項目數（GraphQL 的上限）
+PAGE_SIZE = 100
+
+PAGE_INFO = 'pageInfo { hasNextPage endCursor }'
+LABELS = 'labels(first: 20) { nodes { name } }'
+
+# 連線名稱 -> (游標變數, 查詢片段)；SIZE 在組合查詢時替換成每頁項目數
+CONNECTIONS = {
+    'pull_requests': ('prCursor', (
+        'pullRequests(first: SIZE, after: $prCursor, orderBy: {field: CREATED_AT, direction: DESC}) { '
+        + PAGE_INFO + ' nodes { number title url state createdAt mergedAt closedAt '
+        'changedFiles additions deletions author { login } ' + LABELS + ' comments { totalCount } } }'
+    )),
+    'issues': ('issueCursor', (
+        'issues(first: SIZE, after: $issueCursor, orderBy: {field: CREATED_AT, direction: DESC}) { '
+        + PAGE_INFO + ' nodes { number title url state createdAt closedAt author { login } '
+        + LABELS + ' comments { totalCount } } }'
+    )),
+    'commits': ('commitCursor', (
+        'defaultBranchRef { target { ... on Commit { '
+        'history(first: SIZE, after: $commitCursor, since: $since) { '
+        + PAGE_INFO + ' nodes { oid url message authoredDate committedDate '
+        'author { name email user { login } } } } } } }'
+    )),
+}
+
+
+class GraphQLError(Exception):
+    """GraphQL 查詢回傳錯誤"""
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    """沒有時區的時間視為本地時間"""
+    if value is not None and value.tzinfo is None:
+        return value.astimezone()
+    return value
+
+
+def _user(author: Optional[Dict]) -> Dict:
+    # 已刪除的帳號在 GraphQL 中為 null，REST 則回傳 ghost
+    return {'login': author['login'] if author else 'ghost'}
+
+
+def _pull_request(node: Dict) -> Dict:
+    """轉換成 REST PR 的欄位格式（另外包含評論數與變更統計）"""
+    return {
+        'number': node['number'],
+        'title': node['title'],
+        'html_url': node['url'],
+        'state': 'open' if node['state'] == 'OPEN' else 'closed',
+        'created_at': node['createdAt'],
+        'merged_at': node['mergedAt'],
+        'closed_at': node['closedAt'],
+        'user': _user(node.get('author')),
+        'labels': [{'name': label['name']} for label in node['labels']['nodes']],
+        'comments': node['comments']['totalCount'],
+        'changed_files': node['changedFiles'],
+        'additions': node['additions'],
+        'deletions': node['deletions']
+    }
+
+
+def _issue(node: Dict) -> Dict:
+    """轉換成 REST Issue 的欄位格式"""
+    return {
+        'number': node['number'],
+        'title': node['title'],
+        'html_url': node['url'],
+        'state': node['state'].lower(),
+        'created_at': node['createdAt'],
+        'closed_at': node['closedAt'],
+        'user': _user(node.get('author')),
+        'labels': [{'name': label['name']} for label in node['labels']['nodes']],
+        'comments': node['comments']['totalCount']
+    }
+
+
+def _commit(node: Dict) -> Dict:
+    """轉換成 REST Commit 的欄位格式"""
+    author = node.get('author') or {}
+    return {
+        'sha': node['oid'],
+        'html_url': node['url'],
+        'commit': {
+            'message': node['message'],
+            'author': {'name': author.get('name'), 'email': author.get('email'), 'date': node['authoredDate']},
+            'committer': {'date': node['committedDate']}
+        },
+        'author': {'login': author['user']['login']} if author.get('user') else None
+    }
+
+
+CONVERTERS = {'pull_requests': _pull_request, 'issues': _issue, 'commits': _commit}
+
+
+class GraphQLClient(GitHubClient):
+    """以 GraphQL 批次下載貢獻數據的 GitHub 客戶端"""
+
+    def __init__(self, token: Optional[str] = None, transport: Optional[HTTPTransport] = None,
+                 page_size: int = PAGE_SIZE, max_items: int = MAX_ITEMS):
+        """
+        初始化 GraphQL 客戶端
+
+        Args:
+            token: GitHub Personal Access Token（GraphQL API 必須驗證）
+            transport: HTTP 傳輸層，預設使用行程內共用的連線池
+            page_size: 每一頁的項目數
+            max_items: 每種項目最多下載的數量
+        """
+        super().__init__(token=token, transport=transport)
+        self.graphql_url = f"{self.base_url}/graphql"
+        self.page_size = page_size
+        self.max_items = max_items
+        self.query_count = 0
+        self._results: Dict[Tuple[str, str, Optional[datetime]], Dict[str, List[Dict]]] = {}
+
+    def query(self, query: str, variables: Dict) -> Dict:
+        """
+        送出 GraphQL 查詢
+
+        Args:
+            query: 查詢字串
+            variables: 查詢變數
+
+        Returns:
+            回應的 data
+
+        Raises:
+            requests.HTTPError: HTTP 請求失敗
+            GraphQLError: 查詢回傳錯誤
+        """
+        response = self.transport.post(self.graphql_url, json={'query': query, 'variables': variables},
+                                       headers=self.headers)
+        response.raise_for_status()
+        self.query_count += 1
+        body = response.json()
+        if body.get('errors'):
+            raise GraphQLError('; '.join(error.get('message', str(error)) for error in body['errors']))
+        return body['data']
+
+    def _build_query(self, names: List[str]) -> str:
+        """組合這一輪需要的連線（只宣告用到的變數）"""
+        variables = ['$owner: String!', '$name: String!']
+        selections = []
+        for name in names:
+            cursor, selection = CONNECTIONS[name]
+            variables.append(f'${cursor}: String')
+            if name == 'commits':
+                variables.append('$since: GitTimestamp')
+            selections.append(selection.replace('SIZE', str(self.page_size)))
+        return (f"query({', '.join(variables)}) {{ repository(owner: $owner, name: $name) {{ "
+                f"{' '.join(selections)} }} }}")
+
+    def fetch_all(self, owner: str, repo: str, since: Optional[datetime] = None) -> Dict[str, List[Dict]]:
+        """
+        以批次查詢下載 PR、Issue 與 Commit
+
+        Args:
+            owner: 倉庫擁有者
+            repo: 倉庫名稱
+            since: 開始時間（沒有時區時視為本地時間）
+
+        Returns:
+            'pull_requests'、'issues'、'commits' -> REST 格式的項目列表
+            （PR 與 Issue 由新到舊）
+        """
+        key = (owner, repo, since)
+        if key in self._results:
+            return self._results[key]
+
+        since = _aware(since)
+        results: Dict[str, List[Dict]] = {name: [] for name in CONNECTIONS}
+        cursors: Dict[str, Optional[str]] = {name: None for name in CONNECTIONS}
+        active = list(CONNECTIONS)
+        queries_before = self.query_count
+        while active:
+            variables = {'owner': owner, 'name': repo}
+            for name in active:
+                variables[CONNECTIONS[name][0]] = cursors[name]
+            if 'commits' in active:
+                variables['since'] = since.isoformat() if since else None
+            repository = self.query(self._build_query(active), variables).get('repository')
+            if repository is None:
+                raise GraphQLError(f"找不到倉庫 {owner}/{repo}")
+
+            for name in list(active):
+                connection = self._connection(repository, name)
+                finished = connection is None
+                for node in (connection or {}).get('nodes', []):
+                    if since is not None and name != 'commits' and _parse_time(node['createdAt']) < since:
+                        finished = True
+                        break
+                    results[name].append(CONVERTERS[name](node))
+                if (finished or len(results[name]) >= self.max_items
+                        or not connection['pageInfo']['hasNextPage']):
+                    active.remove(name)
+                    results[name] = results[name][:self.max_items]
+                else:
+                    cursors[name] = connection['pageInfo']['endCursor']
+
+        logger.info(f"GraphQL 下載 {len(results['pull_requests'])} 個 PR、{len(results['issues'])} 個 Issue、"
+                    f"{len(results['commits'])} 個 Commit，共 {self.query_count - queries_before} 次查詢")
+        self._results[key] = results
+        return results
+
+    @staticmethod
+    def _connection(repository: Dict, name: str) -> Optional[Dict]:
+        if name == 'pull_requests':
+            return repository['pullRequests']
+        if name == 'issues':
+            return repository['issues']
+        # 空倉庫沒有預設分支
+        branch = repository.get('defaultBranchRef')
+        return ((branch or {}).get('target') or {}).get('history')
+
+    def get_pull_requests(self, owner: str, repo: str, state: str = 'all',
+                          since: Optional[datetime] = None) -> List[Dict]:
+        """
+        獲取 Pull Request 列表（包含 changed_files、additions、deletions 與評論數）
+
+        Args:
+            owner: 倉庫擁有者
+            repo: 倉庫名稱
+            state: PR 狀態 ('open', 'closed', 'all')
+            since: 開始時間
+
+        Returns:
+            PR 列表
+        """
+        prs = self.fetch_all(owner, repo, since)['pull_requests']
+        return prs if state == 'all' else [pr for pr in prs if pr['state'] == state]
+
+    def get_issues(self, owner: str, repo: str, state: str = 'all',
+                   since: Optional[datetime] = None) -> List[Dict]:
+        """
+        獲取 Issue 列表（不包含 PR）
+
+        Args:
+            owner: 倉庫擁有者
+            repo: 倉庫名稱
+            state: Issue 狀態
+            since: 開始時間
+
+        Returns:
+            Issue 列表
+        """
+        issues = self.fetch_all(owner, repo, since)['issues']
+        return issues if state == 'all' else [issue for issue in issues if issue['state'] == state]
+
+    def get_commits(self, owner: str, repo: str, since: Optional[datetime] = None,
+                    until: Optional[datetime] = None) -> List[Dict]:
+        """
+        獲取預設分支的 Commit 列表
+
+        Args:
+            owner: 倉庫擁有者
+            repo: 倉庫名稱
+            since: 開始時間
+            until: 結束時間
+
+        Returns:
+            Commit 列表
+        """
+        commits = self.fetch_all(owner, repo, since)['commits']
+        until = _aware(until)
+        if until is None:
+            return commits
+        return [commit for commit in commits if _parse_time(commit['commit']['committer']['date']) <= until]
@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
 """
 格式化聖誕節場景為 HTML 格式
+
+網頁版的 storyData 已改由 scripts/build-web.py 從故事 JSON 產生，
+這個腳本只用來預覽單一檔案的格式化結果。
 """
 
 import json
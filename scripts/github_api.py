@@ -10,11 +10,13 @@ GitHub API 整合腳本
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import logging
 
+from github_http import HTTPTransport, get_transport
+from github_pagination import paginate
+
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -22,14 +24,16 @@ logger = logging.getLogger(__name__)
 class GitHubAPI:
     """GitHub API 整合類別"""
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, transport: Optional[HTTPTransport] = None):
         """
         初始化 GitHub API 客戶端
         
         Args:
             token: GitHub Personal Access Token
+            transport: HTTP 傳輸層，預設使用行程內共用的連線池
         """
         self.token = token or os.getenv('GITHUB_TOKEN')
+        self.transport = transport or get_transport()
         self.base_url = 'https://api.github.com'
         self.headers = {
             'Authorization': f'token {self.token}' if self.token else None,
@@ -42,14 +46,14 @@ class GitHubAPI:
     def get_repo_info(self, owner: str, repo: str) -> Dict:
         """獲取倉庫資訊"""
         url = f"{self.base_url}/repos/{owner}/{repo}"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
     def get_contributors(self, owner: str, repo: str) -> List[Dict]:
         """獲取貢獻者列表"""
         url = f"{self.base_url}/repos/{owner}/{repo}/contributors"
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
@@ -62,26 +66,8 @@ class GitHubAPI:
         if since:
             params['since'] = since.isoformat()
         
-        all_prs = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            prs = response.json()
-            if not prs:
-                break
-                
-            all_prs.extend(prs)
-            page += 1
-            
-            # GitHub API 限制
-            if len(all_prs) >= 1000:
-                break
-        
-        return all_prs
+        # GitHub API 限制最多 1000 筆
+        return paginate(self.transport, url, params=params, headers=self.headers)
     
     def get_issues(self, owner: str, repo: str, state: str = 'all',
                   since: Optional[datetime] = None) -> List[Dict]:
@@ -92,25 +78,7 @@ class GitHubAPI:
         if since:
             params['since'] = since.isoformat()
         
-        all_issues = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            
-            issues = response.json()
-            if not issues:
-                break
-                
-            all_issues.extend(issues)
-            page += 1
-            
-            if len(all_issues) >= 1000:
-                break
-        
-        return all_issues
+        return paginate(self.transport, url, params=params, headers=self.headers)
     
     def get_user_pr_count(self, owner: str, repo: str, username: str) -> int:
         """獲取特定用戶的 PR 數量"""
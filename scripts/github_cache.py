@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub API 條件式請求快取
+以 SQLite 保存 GET 回應的 ETag / Last-Modified 與內容，跨執行重複使用
+
+再次請求同一個網址時帶上 If-None-Match / If-Modified-Since；資料沒有
+變更時 GitHub 回傳沒有內容的 304，不計入速率限制，直接使用快取的
+內容。快取鍵由完整網址（含查詢參數）、Accept 與授權的雜湊組成，不同
+權杖看到的資料不會混用。內容以 zlib 壓縮，超過大小或筆數上限時淘汰
+最久未使用的項目。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_CACHE_FILE = os.path.join('build', 'http-cache', 'github.sqlite')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 20000
+# 與回應內容一起保存的標頭（分頁需要 Link）
+CACHED_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'Link')
+
+
+class ResponseCache:
+    """以 ETag / Last-Modified 驗證的持久化回應快取（LRU 淘汰）"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_FILE, max_bytes: int = DEFAULT_MAX_BYTES,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        初始化快取（第一次使用時才開啟資料庫）
+
+        Args:
+            path: SQLite 資料庫路徑（':memory:' 表示只存在記憶體中）
+            max_bytes: 壓縮後內容的總大小上限
+            max_entries: 項目數上限
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        self._total_bytes = 0
+        self._entry_count = 0
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path != ':memory:':
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # 分頁會在多個執行緒中同時讀寫，存取一律以 _lock 保護
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                connection.execute(
+                    'CREATE TABLE IF NOT EXISTS responses '
+                    '(key TEXT PRIMARY KEY, url TEXT NOT NULL, headers TEXT NOT NULL, '
+                    'body BLOB NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)'
+                )
+                connection.execute('CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used)')
+            self._entry_count, self._total_bytes = connection.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses'
+            ).fetchone()
+            self._connection = connection
+        return self._connection
+
+    def _now(self) -> float:
+        """最近使用時間（遞增，時鐘解析度不足時也能分出先後；呼叫者持有 _lock）"""
+        self._last_used = max(time.time(), self._last_used + 1e-6)
+        return self._last_used
+
+    @staticmethod
+    def key(url: str, params: Optional[Mapping[str, Any]] = None,
+            headers: Optional[Mapping[str, str]] = None) -> str:
+        """
+        計算快取鍵
+
+        Args:
+            url: 網址
+            params: 查詢參數
+            headers: 請求標頭（使用 Accept 與 Authorization）
+
+        Returns:
+            十六進位 SHA-256
+        """
+        full_url = requests.Request('GET', url, params=params).prepare().url
+        headers = CaseInsensitiveDict(headers or {})
+        token = hashlib.sha256(headers.get('Authorization', '').encode('utf-8')).hexdigest()
+        text = f"{full_url}\n{headers.get('Accept', '')}\n{token}"
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def validators(self, key: str) -> Dict[str, str]:
+        """
+        取得條件式請求的標頭
+
+        Returns:
+            If-None-Match / If-Modified-Since，沒有快取時為空字典
+        """
+        with self._lock:
+            row = self.connection.execute('SELECT headers FROM responses WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return {}
+        headers = json.loads(row[0])
+        conditions = {}
+        if 'ETag' in headers:
+            conditions['If-None-Match'] = headers['ETag']
+        if 'Last-Modified' in headers:
+            conditions['If-Modified-Since'] = headers['Last-Modified']
+        return conditions
+
+    def load(self, key: str, response: requests.Response) -> Optional[requests.Response]:
+        """
+        以快取內容組成 304 回應對應的完整回應，並更新最近使用時間
+
+        Args:
+            key: 快取鍵
+            response: 伺服器回傳的 304 回應
+
+        Returns:
+            狀態碼 200、內容來自快取的回應；快取已被淘汰時回傳 None
+        """
+        with self._lock:
+            row = self.connection.execute(
+                'SELECT headers, body FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            with self.connection:
+                self.connection.execute('UPDATE responses SET last_used = ? WHERE key = ?', (self._now(), key))
+            self.hits += 1
+
+        cached = requests.Response()
+        cached.status_code = 200
+        cached.reason = 'OK'
+        cached._content = zlib.decompress(row[1])
+        cached.headers = CaseInsensitiveDict(json.loads(row[0]))
+        # 速率限制等每次不同的標頭以這次的回應為準
+        for name, value in response.headers.items():
+            if name not in cached.headers:
+                cached.headers[name] = value
+        cached.url = response.url
+        cached.request = response.request
+        cached.encoding = response.encoding or 'utf-8'
+        cached.elapsed = response.elapsed
+        cached.from_cache = True
+        return cached
+
+    def store(self, key: str, response: requests.Response):
+        """保存帶有 ETag 或 Last-Modified 的 200 回應，其他回應只計入未命中"""
+        with self._lock:
+            self.misses += 1
+        if response.status_code != 200 or not ('ETag' in response.headers or 'Last-Modified' in response.headers):
+            return
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        body = zlib.compress(response.content)
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            connection = self.connection
+            with connection:
+                previous = connection.execute('SELECT size FROM responses WHERE key = ?', (key,)).fetchone()
+                connection.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)',
+                    (key, response.url, json.dumps(headers), body, len(body), self._now())
+                )
+                if previous is None:
+                    self._entry_count += 1
+                else:
+                    self._total_bytes -= previous[0]
+                self._total_bytes += len(body)
+                self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        """淘汰最久未使用的項目，直到低於上限（呼叫者持有 _lock）"""
+        while self._entry_count > self.max_entries or self._total_bytes > self.max_bytes:
+            rows = connection.execute(
+                'SELECT key, size FROM responses ORDER BY last_used LIMIT 64'
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._entry_count <= self.max_entries and self._total_bytes <= self.max_bytes:
+                    break
+                connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+                self._entry_count -= 1
+                self._total_bytes -= size
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        取得快取統計
+
+        Returns:
+            命中、未命中、淘汰次數，命中率，以及目前的項目數與大小
+        """
+        requests_seen = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / requests_seen if requests_seen else 0.0,
+            'entries': self._entry_count,
+            'bytes': self._total_bytes
+        }
+
+    def clear(self):
+        """刪除所有項目"""
+        with self._lock, self.connection:
+            self.connection.execute('DELETE FROM responses')
+            self._entry_count = 0
+            self._total_bytes = 0
+
+    def close(self):
+        """關閉資料庫"""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共用 HTTP 傳輸層
+所有 GitHub API 客戶端、Discord Webhook 與機器人共用同一個連線池
+
+每個行程只建立一個 requests.Session，連線以 keep-alive 重複使用，
+分頁掃描時不必每個請求都重新進行 TCP 與 TLS 交握。每個主機有各自的
+連線池與連線數上限（超過時等待空出的連線，不會無限制地開新連線），
+所有請求都有預設的連線與讀取逾時；只有尚未送出的連線錯誤會重試。
+
+設定回應快取（見 github_cache）時，GET 請求會帶上 ETag 等條件，資料
+沒有變更時以快取的內容回應。共用的傳輸層預設使用
+build/http-cache/github.sqlite，可以用環境變數 GITHUB_HTTP_CACHE 指定
+其他路徑，設為 off 時停用。
+
+設定速率限制排程器（見 github_ratelimit）時，GitHub API 請求依權杖與
+端點類別限速、依優先權排隊，遇到速率限制時等待後重試。共用的傳輸層
+預設啟用。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from github_cache import DEFAULT_CACHE_FILE, ResponseCache
+from github_ratelimit import BATCH, RateLimitScheduler
+
+# (連線, 讀取) 逾時秒數
+DEFAULT_TIMEOUT = (5.0, 30.0)
+# 保留連線池的主機數
+DEFAULT_POOL_HOSTS = 8
+# 未另外設定的主機，每個主機同時使用的連線數上限
+DEFAULT_POOL_SIZE = 4
+# 個別主機的連線數上限
+HOST_POOL_SIZES = {
+    'api.github.com': 10,
+    'discord.com': 2
+}
+# 連線失敗（請求尚未送出）時的重試次數
+DEFAULT_CONNECT_RETRIES = 2
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class HTTPTransport:
+    """以連線池重複使用連線的 HTTP 傳輸層"""
+
+    def __init__(self, timeout: Timeout = DEFAULT_TIMEOUT, pool_hosts: int = DEFAULT_POOL_HOSTS,
+                 pool_size: int = DEFAULT_POOL_SIZE, host_pool_sizes: Optional[Dict[str, int]] = None,
+                 connect_retries: int = DEFAULT_CONNECT_RETRIES, cache: Optional[ResponseCache] = None,
+                 scheduler: Optional[RateLimitScheduler] = None):
+        """
+        初始化傳輸層
+
+        Args:
+            timeout: 預設的逾時秒數，可以是 (連線, 讀取)
+            pool_hosts: 保留連線池的主機數
+            pool_size: 每個主機的連線數上限
+            host_pool_sizes: 個別主機的連線數上限，預設為 HOST_POOL_SIZES
+            connect_retries: 連線失敗時的重試次數
+            cache: GET 回應的條件式請求快取，None 表示不快取
+            scheduler: 速率限制排程器，None 表示不限速也不重試
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self.scheduler = scheduler
+        self.session = requests.Session()
+        self._adapters: Dict[str, HTTPAdapter] = {}
+        self._lock = threading.Lock()
+        self.request_count = 0
+
+        retry = Retry(total=connect_retries, connect=connect_retries, read=0, status=0, other=0,
+                      redirect=False, raise_on_status=False)
+        default_adapter = self._adapter(pool_hosts, pool_size, retry)
+        self.session.mount('https://', default_adapter)
+        self.session.mount('http://', default_adapter)
+        self._adapters[''] = default_adapter
+        for host, size in (HOST_POOL_SIZES if host_pool_sizes is None else host_pool_sizes).items():
+            # 以主機為前綴掛載獨立的轉接器，各自有連線數上限
+            adapter = self._adapter(1, size, retry)
+            self.session.mount(f'https://{host}/', adapter)
+            self._adapters[host] = adapter
+
+    @staticmethod
+    def _adapter(pool_hosts: int, pool_size: int, retry: Retry) -> HTTPAdapter:
+        # pool_block 讓連線數上限成為硬性限制，超過時等待而不是另開連線
+        return HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size,
+                           pool_block=True, max_retries=retry)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        送出請求
+
+        Args:
+            method: HTTP 方法
+            url: 完整網址
+            **kwargs: requests 的其他參數（headers、params、json 等），
+                未指定 timeout 時使用預設逾時；priority 為排程的優先權
+                （INTERACTIVE 或預設的 BATCH）
+
+        Returns:
+            回應物件（不會自動檢查狀態碼）
+        """
+        priority = kwargs.pop('priority', BATCH)
+        kwargs.setdefault('timeout', self.timeout)
+
+        def send() -> requests.Response:
+            with self._lock:
+                self.request_count += 1
+            return self.session.request(method, url, **kwargs)
+
+        if self.scheduler is None:
+            return send()
+        return self.scheduler.send(send, url, kwargs.get('headers'), priority)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """送出 GET 請求，有快取時以條件式請求驗證快取的內容"""
+        if self.cache is None:
+            return self.request('GET', url, **kwargs)
+
+        key = self.cache.key(url, kwargs.get('params'), kwargs.get('headers'))
+        conditions = self.cache.validators(key)
+        if conditions:
+            headers = dict(kwargs.get('headers') or {})
+            headers.update(conditions)
+            response = self.request('GET', url, **dict(kwargs, headers=headers))
+            if response.status_code == 304:
+                cached = self.cache.load(key, response)
+                if cached is not None:
+                    return cached
+                # 驗證期間項目被淘汰，改送一般請求
+                response = self.request('GET', url, **kwargs)
+        else:
+            response = self.request('GET', url, **kwargs)
+        self.cache.store(key, response)
+        return response
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """送出 POST 請求"""
+        return self.request('POST', url, **kwargs)
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """
+        取得連線統計
+
+        Returns:
+            請求數，以及每個主機實際建立的連線數（連線重複使用時遠小於請求數）
+        """
+        connections: Dict[str, int] = {}
+        for adapter in self._adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections[pool.host] = connections.get(pool.host, 0) + pool.num_connections
+        return {'requests': self.request_count, 'connections': connections}
+
+    def close(self):
+        """關閉所有連線與快取"""
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_shared: Optional[HTTPTransport] = None
+_shared_lock = threading.Lock()
+
+
+def get_transport() -> HTTPTransport:
+    """取得行程內共用的傳輸層（第一次呼叫時建立）"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                cache_path = os.getenv('GITHUB_HTTP_CACHE') or DEFAULT_CACHE_FILE
+                cache = None if cache_path.lower() == 'off' else ResponseCache(cache_path)
+                _shared = HTTPTransport(cache=cache, scheduler=RateLimitScheduler())
+    return _shared
+
+
+def set_transport(transport: Optional[HTTPTransport]) -> Optional[HTTPTransport]:
+    """
+    替換共用的傳輸層（主要用於測試），傳入 None 時下次取用會重新建立
+
+    Returns:
+        原本的傳輸層
+    """
+    global _shared
+    with _shared_lock:
+        previous, _shared = _shared, transport
+    return previous
+
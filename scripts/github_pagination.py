@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub API 分頁引擎
+依第一頁回應的 Link 標頭得知最後一頁，其餘頁面以有上限的執行緒池同時下載
+
+結果依頁碼順序合併。每一批最多同時下載 workers 頁，批次之間檢查截止
+條件（例如按建立時間排序時早於 since 的項目）與項目數上限，達到時不再
+送出後續請求；最後一頁不必再多請求一個空白頁來確認結束。有截止條件時
+批次從一頁開始、每批加倍，時間範圍很短時不會在截止頁之後多送出一整批
+請求。沒有 Link 標頭時退回逐頁下載，遇到不滿一頁時停止。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from github_http import HTTPTransport
+
+PER_PAGE = 100
+MAX_ITEMS = 1000
+# 同時下載的頁數（與 api.github.com 的連線數上限相同）
+DEFAULT_PAGE_WORKERS = 10
+
+
+def last_page(links: Mapping[str, Dict[str, str]]) -> Optional[int]:
+    """
+    由 Link 標頭取得最後一頁的頁碼
+
+    Args:
+        links: requests 解析後的 Link 標頭（response.links）
+
+    Returns:
+        最後一頁的頁碼；沒有下一頁時為 None
+    """
+    url = links.get('last', {}).get('url')
+    if not url:
+        return None
+    pages = parse_qs(urlsplit(url).query).get('page')
+    return int(pages[0]) if pages and pages[0].isdigit() else None
+
+
+def paginate(transport: HTTPTransport, url: str, params: Optional[Mapping[str, Any]] = None,
+             headers: Optional[Mapping[str, str]] = None, max_items: int = MAX_ITEMS,
+             workers: int = DEFAULT_PAGE_WORKERS, select: Optional[Callable[[Dict], bool]] = None,
+             cutoff: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+    """
+    下載分頁端點的所有項目
+
+    Args:
+        transport: HTTP 傳輸層
+        url: 端點網址
+        params: 查詢參數（未指定 per_page 時為 100）
+        headers: 請求標頭
+        max_items: 最多回傳的項目數
+        workers: 同時下載的頁數
+        select: 只保留回傳 True 的項目（只有保留的項目計入上限）
+        cutoff: 項目依時間排序時，第一個回傳 True 的項目及之後的項目都不
+            需要，停止下載後續頁面
+
+    Returns:
+        依頁碼順序合併的項目
+
+    Raises:
+        requests.HTTPError: 任何一頁的請求失敗
+    """
+    workers = max(1, workers)
+    params = dict(params or {})
+    params.setdefault('per_page', PER_PAGE)
+    per_page = int(params['per_page'])
+
+    def fetch(page: int):
+        response = transport.get(url, headers=headers, params=dict(params, page=page))
+        response.raise_for_status()
+        return response
+
+    first = fetch(1)
+    final_page = last_page(first.links)
+    pages = [first.json()]
+    next_page = 2
+    # 有截止條件時逐批加倍，避免在截止頁之後多下載一整批
+    batch_size = 1 if cutoff is not None else workers
+    items: List[Dict] = []
+    executor: Optional[ThreadPoolExecutor] = None
+    try:
+        while True:
+            done = False
+            for page_items in pages:
+                for item in page_items:
+                    if cutoff is not None and cutoff(item):
+                        done = True
+                        break
+                    if select is None or select(item):
+                        items.append(item)
+                if done or len(items) >= max_items or len(page_items) < per_page:
+                    done = True
+                    break
+            if done:
+                break
+
+            if final_page is None:
+                # 沒有 Link 標頭，逐頁下載
+                pages = [fetch(next_page).json()]
+                next_page += 1
+                continue
+            if next_page > final_page:
+                break
+
+            # 這一批只下載達到項目數上限所需的頁數
+            needed = math.ceil((max_items - len(items)) / per_page)
+            batch = list(range(next_page, min(final_page, next_page + min(batch_size, needed) - 1) + 1))
+            if len(batch) == 1:
+                pages = [fetch(batch[0]).json()]
+            else:
+                if executor is None:
+                    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='github-page')
+                pages = [response.json() for response in executor.map(fetch, batch)]
+            next_page = batch[-1] + 1
+            batch_size = min(workers, batch_size * 2)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return items[:max_items]
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GitHub API 速率限制排程器
+依權杖與端點類別（core、search、graphql）分別以權杖桶控制送出請求的速度
+
+每個權杖與端點類別有各自的權杖桶：桶的容量與補充速度對應 GitHub 的
+次要速率限制（search 每分鐘 30 次，遠比 core 嚴格），並依回應的
+X-RateLimit-Remaining / X-RateLimit-Reset 同步剩餘配額，配額用完時
+整個桶暫停到重設時間。等待中的請求依優先權排隊，互動式的機器人指令
+（INTERACTIVE）會排在批次統計（BATCH）之前。
+
+遇到 429 或次要速率限制的 403 時，依 Retry-After、重設時間或指數退避
+加上隨機抖動後重試，並讓同一個桶的其他請求一起暫停；等待時間超過上限
+時直接回傳該回應，由呼叫者處理。互動式請求最多重試一次、等待上限也
+短得多，機器人指令會很快收到錯誤，而不是等待好幾分鐘。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import hashlib
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# 請求優先權（數字越小越先送出）
+INTERACTIVE = 0
+BATCH = 1
+
+# 端點類別 -> (桶容量, 補滿所需秒數)
+RESOURCE_LIMITS = {
+    'core': (900, 60.0),
+    'search': (30, 60.0),
+    'graphql': (2000, 60.0)
+}
+GITHUB_HOSTS = ('api.github.com',)
+DEFAULT_MAX_RETRIES = 4
+# 次要速率限制沒有 Retry-After 時的退避起始秒數（GitHub 建議至少等待一分鐘）
+DEFAULT_BACKOFF = 60.0
+# 單次等待的上限秒數，超過時不再重試
+DEFAULT_MAX_WAIT = 900.0
+# 加在 Retry-After 與重設時間上的隨機抖動秒數上限，避免所有請求同時恢復
+DEFAULT_JITTER = 1.0
+# 互動式請求的重試次數與單次等待上限（指令應該很快回覆）
+INTERACTIVE_MAX_RETRIES = 1
+INTERACTIVE_MAX_WAIT = 10.0
+
+
+class TokenBucket:
+    """依優先權排隊取得權杖的權杖桶"""
+
+    def __init__(self, capacity: int, period: float):
+        """
+        初始化權杖桶（初始為滿）
+
+        Args:
+            capacity: 桶容量（可以連續送出的請求數）
+            period: 從空到滿所需的秒數
+        """
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._waiting: list = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority: int = BATCH) -> float:
+        """
+        取得一個權杖，必要時等待
+
+        Args:
+            priority: 優先權，排隊時數字小的先取得
+
+        Returns:
+            等待的秒數
+        """
+        entry = (priority, next(self._sequence))
+        started = time.monotonic()
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiting[0] != entry:
+                        # 前面還有人排隊，輪到時會被喚醒（逾時只是保險）
+                        self._condition.wait(1.0)
+                        continue
+                    if now >= self.blocked_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        heapq.heappop(self._waiting)
+                        self._condition.notify_all()
+                        return now - started
+                    self._condition.wait(max(self.blocked_until - now, (1 - self.tokens) / self.rate))
+            except BaseException:
+                if entry in self._waiting:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()
+                raise
+
+    def sync(self, remaining: int, reset_at: Optional[float] = None):
+        """
+        依伺服器回報的剩餘配額調整權杖數，配額用完時暫停到重設時間
+
+        Args:
+            remaining: X-RateLimit-Remaining
+            reset_at: X-RateLimit-Reset（epoch 秒）
+        """
+        with self._condition:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, float(remaining))
+            if remaining <= 0 and reset_at is not None:
+                self._block(reset_at - time.time())
+
+    def block(self, seconds: float):
+        """暫停取得權杖指定的秒數"""
+        with self._condition:
+            self._block(seconds)
+
+    def _block(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + max(0.0, seconds))
+        self._condition.notify_all()
+
+
+class RateLimitScheduler:
+    """依權杖與端點類別排程 GitHub API 請求，遇到速率限制時重試"""
+
+    def __init__(self, limits: Optional[Mapping[str, Tuple[int, float]]] = None,
+                 hosts: Tuple[str, ...] = GITHUB_HOSTS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff: float = DEFAULT_BACKOFF, max_wait: float = DEFAULT_MAX_WAIT,
+                 jitter: float = DEFAULT_JITTER, interactive_max_retries: int = INTERACTIVE_MAX_RETRIES,
+                 interactive_max_wait: float = INTERACTIVE_MAX_WAIT):
+        """
+        初始化排程器
+
+        Args:
+            limits: 端點類別 -> (桶容量, 補滿秒數)，預設為 RESOURCE_LIMITS
+            hosts: 以 core 類別限速的主機（其他主機只處理 429 重試）
+            max_retries: 遇到速率限制時的重試次數
+            backoff: 沒有 Retry-After 時的退避起始秒數，每次重試加倍
+            max_wait: 單次等待的上限秒數
+            jitter: 隨機抖動的秒數上限
+            interactive_max_retries: 互動式請求的重試次數（不超過 max_retries）
+            interactive_max_wait: 互動式請求單次等待的上限秒數（不超過 max_wait）
+        """
+        self.limits = dict(RESOURCE_LIMITS if limits is None else limits)
+        self.hosts = hosts
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_wait = max_wait
+        self.jitter = jitter
+        self.interactive_max_retries = min(interactive_max_retries, max_retries)
+        self.interactive_max_wait = min(interactive_max_wait, max_wait)
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def resource(self, url: str) -> Optional[str]:
+        """
+        判斷網址的端點類別
+
+        Returns:
+            'search'、'graphql' 或 'core'；不限速的主機為 None
+        """
+        parts = urlsplit(url)
+        if parts.hostname not in self.hosts:
+            return None
+        if parts.path.startswith('/search/'):
+            return 'search'
+        if parts.path.startswith('/graphql'):
+            return 'graphql'
+        return 'core'
+
+    def bucket(self, headers: Optional[Mapping[str, str]], resource: str) -> TokenBucket:
+        """取得權杖（以授權標頭的雜湊區分）與端點類別對應的桶"""
+        authorization = CaseInsensitiveDict(headers or {}).get('Authorization', '')
+        key = (hashlib.sha256(authorization.encode('utf-8')).hexdigest()[:16], resource)
+        with self._lock:
+            if key not in self._buckets:
+                capacity, period = self.limits.get(resource, self.limits['core'])
+                self._buckets[key] = TokenBucket(capacity, period)
+            return self._buckets[key]
+
+    def send(self, send: Callable[[], requests.Response], url: str,
+             headers: Optional[Mapping[str, str]] = None, priority: int = BATCH) -> requests.Response:
+        """
+        排程並送出請求，遇到速率限制時等待後重試
+
+        Args:
+            send: 實際送出請求的函數
+            url: 請求網址（判斷端點類別）
+            headers: 請求標頭（判斷權杖）
+            priority: INTERACTIVE 或 BATCH（互動式請求使用較短的重試策略）
+
+        Returns:
+            最後一次的回應
+        """
+        resource = self.resource(url)
+        bucket = self.bucket(headers, resource) if resource else None
+        if priority == INTERACTIVE:
+            max_retries, max_wait = self.interactive_max_retries, self.interactive_max_wait
+        else:
+            max_retries, max_wait = self.max_retries, self.max_wait
+        for attempt in range(max_retries + 1):
+            if bucket is not None:
+                waited = bucket.acquire(priority)
+                if waited > 0.001:
+                    self._record(throttled=1, wait_seconds=waited)
+            response = send()
+            self._record(requests=1)
+            if bucket is not None:
+                self._sync(headers, response, bucket)
+
+            delay = self.retry_delay(response, attempt, github=bucket is not None)
+            if delay is None or attempt == max_retries or delay > max_wait:
+                return response
+            logger.warning(f"⏳ 速率限制（HTTP {response.status_code}），{delay:.1f} 秒後重試: {url}")
+            self._record(retries=1, wait_seconds=delay)
+            if bucket is not None:
+                # 同一個桶的其他請求一起暫停，這個請求醒來時不必再排隊等待
+                bucket.block(delay)
+            time.sleep(delay)
+        return response
+
+    def _sync(self, headers: Optional[Mapping[str, str]], response: requests.Response, bucket: TokenBucket):
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if remaining is None or not remaining.isdigit():
+            return
+        reset = response.headers.get('X-RateLimit-Reset')
+        resource = response.headers.get('X-RateLimit-Resource')
+        if resource in self.limits:
+            bucket = self.bucket(headers, resource)
+        bucket.sync(int(remaining), float(reset) if reset and reset.isdigit() else None)
+
+    def retry_delay(self, response: requests.Response, attempt: int, github: bool = True) -> Optional[float]:
+        """
+        判斷回應是否為速率限制，計算重試前等待的秒數
+
+        Args:
+            response: 回應
+            attempt: 已重試的次數
+            github: 是否為 GitHub API（只有 GitHub 的 403 可能是速率限制）
+
+        Returns:
+            等待秒數；不是速率限制時為 None
+        """
+        status = response.status_code
+        if status not in (403, 429) or (status == 403 and not github):
+            return None
+        retry_after = response.headers.get('Retry-After')
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after)) + random.uniform(0, self.jitter)
+            except ValueError:
+                pass
+        if remaining == '0' and (response.headers.get('X-RateLimit-Reset') or '').isdigit():
+            reset = float(response.headers['X-RateLimit-Reset'])
+            return max(0.0, reset - time.time()) + random.uniform(0, self.jitter)
+        if status == 403 and remaining != '0' and 'rate limit' not in response.text.lower():
+            # 權限不足等一般的 403
+            return None
+        # 沒有指示等待時間：指數退避，在後半段隨機抖動
+        delay = self.backoff * (2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
+    def _record(self, **counts: Any):
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        取得排程統計
+
+        Returns:
+            送出的請求數、因限速等待的次數、速率限制重試次數與總等待秒數
+        """
+        return {
+            'requests': self.requests,
+            'throttled': self.throttled,
+            'retries': self.retries,
+            'wait_seconds': round(self.wait_seconds, 3)
+        }
@@ -22,6 +22,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from github_api import GitHubAPI, ContributorTracker
+from community_reporter import GraphQLClient
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -428,8 +429,11 @@ def main():
     REPO = "Sext-Adventure"
     
     try:
-        # 初始化分析器
-        github_api = GitHubAPI()
+        # 初始化分析器（GITHUB_DATA_SOURCE=graphql 時以 GraphQL 批次下載，包含檔案變更數與評論數）
+        if os.getenv('GITHUB_DATA_SOURCE', 'rest').lower() == 'graphql':
+            github_api = GraphQLClient()
+        else:
+            github_api = GitHubAPI()
         analyzer = MonthlyStatsAnalyzer(github_api, OWNER, REPO)
         
         # 分析月度數據
@@ -10,7 +10,6 @@ GitHub Actions 優先級管理系統
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import logging
@@ -21,6 +20,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, current_dir)
 
 from github_api import GitHubAPI, ContributorTracker
+from github_http import get_transport
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -256,7 +256,7 @@ class PriorityManager:
         try:
             # 檢查標籤是否存在
             url = f"https://api.github.com/repos/{self.owner}/{self.repo}/labels/{label_name}"
-            response = requests.get(url, headers=self.github_api.headers)
+            response = get_transport().get(url, headers=self.github_api.headers)
             
             if response.status_code == 404:
                 # 標籤不存在，創建它
@@ -267,7 +267,7 @@ class PriorityManager:
                     'description': description
                 }
                 
-                response = requests.post(create_url, json=payload, headers=self.github_api.headers)
+                response = get_transport().post(create_url, json=payload, headers=self.github_api.headers)
                 response.raise_for_status()
                 logger.info(f"成功創建標籤: {label_name}")
             
@@ -279,7 +279,7 @@ class PriorityManager:
         url = f"https://api.github.com/repos/{self.owner}/{self.repo}/issues/{pr_number}/labels"
         payload = {'labels': [label_name]}
         
-        response = requests.post(url, json=payload, headers=self.github_api.headers)
+        response = get_transport().post(url, json=payload, headers=self.github_api.headers)
         response.raise_for_status()
     
     def _add_label_to_issue(self, issue_number: int, label_name: str):
@@ -287,7 +287,7 @@ class PriorityManager:
         url = f"https://api.github.com/repos/{self.owner}/{self.repo}/issues/{issue_number}/labels"
         payload = {'labels': [label_name]}
         
-        response = requests.post(url, json=payload, headers=self.github_api.headers)
+        response = get_transport().post(url, json=payload, headers=self.github_api.headers)
         response.raise_for_status()
     
     def _assign_reviewers(self, pr_number: int, contributor_level: str):
@@ -307,7 +307,7 @@ class PriorityManager:
             payload = {'reviewers': reviewers}
             
             try:
-                response = requests.post(url, json=payload, headers=self.github_api.headers)
+                response = get_transport().post(url, json=payload, headers=self.github_api.headers)
                 response.raise_for_status()
                 logger.info(f"成功分配審查者給 PR #{pr_number}")
             except Exception as e:
@@ -330,7 +330,7 @@ class PriorityManager:
             payload = {'assignees': assignees}
             
             try:
-                response = requests.post(url, json=payload, headers=self.github_api.headers)
+                response = get_transport().post(url, json=payload, headers=self.github_api.headers)
                 response.raise_for_status()
                 logger.info(f"成功分配處理者給 Issue #{issue_number}")
             except Exception as e:
@@ -363,7 +363,7 @@ class PriorityManager:
         payload = {'body': comment}
         
         try:
-            response = requests.post(url, json=payload, headers=self.github_api.headers)
+            response = get_transport().post(url, json=payload, headers=self.github_api.headers)
             response.raise_for_status()
             logger.info(f"成功添加優先級評論到 {item_type} #{pr_number}")
         except Exception as e:
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊玩紀錄重播腳本
+在新的故事版本上無頭重播已記錄的遊玩，回報斷裂連結、改變的場景轉移
+與改變的結局
+
+用法:
+    python scripts/replay-sessions.py <紀錄檔> [故事檔] [--workers N]
+
+故事檔預設為 stories/halloween.json，工作行程數預設為 CPU 數量。
+有任何差異時以狀態碼 1 結束。終端機版設定 TSEXT_SESSION_LOG 即可
+產生紀錄檔。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import StoryFormatError, compile_story, load_story
+from story_engine.replay import ReplayError, replay_log
+
+DEFAULT_STORY = 'stories/halloween.json'
+
+# 差異種類的說明
+DIVERGENCE_LABELS = {
+    'missing_scene': '場景已被移除',
+    'dead_link': '選項變成斷裂連結',
+    'changed_link': '選項改連到其他場景',
+    'changed_ending': '結局改變',
+    'changed_score': '結局分數改變',
+    'changed_start': '起始場景改變',
+    'unknown_layout': '找不到紀錄當時的故事佈局'
+}
+
+
+def parse_args(args):
+    """解析命令列參數，回傳 (紀錄檔, 故事檔, 工作行程數)"""
+    workers = os.cpu_count() or 1
+    positional = []
+    i = 0
+    while i < len(args):
+        if args[i] == '--workers' and i + 1 < len(args):
+            workers = int(args[i + 1])
+            i += 2
+            continue
+        if args[i].startswith('--'):
+            raise ValueError(f"未知的參數: {args[i]}")
+        positional.append(args[i])
+        i += 1
+    if not 1 <= len(positional) <= 2:
+        raise ValueError("需要紀錄檔路徑")
+    return positional[0], positional[1] if len(positional) > 1 else DEFAULT_STORY, workers
+
+
+def load_graph(path: str):
+    """載入要驗證的故事；JSON 以非嚴格模式編譯，斷裂連結留給重播回報"""
+    if not path.endswith('.json'):
+        return load_story(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        return compile_story(json.load(f), strict=False)
+
+
+def main():
+    """主函數"""
+    try:
+        log_path, story_path, workers = parse_args(sys.argv[1:])
+    except ValueError:
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        graph = load_graph(story_path)
+        result = replay_log(log_path, graph, workers=workers)
+    except (OSError, json.JSONDecodeError, StoryFormatError, ReplayError) as e:
+        print(f"❌ 重播失敗: {e}")
+        sys.exit(1)
+
+    print(f"🔁 重播 {result['sessions']} 次遊玩（{result['elapsed']:.2f} 秒，"
+          f"每秒 {result['sessions_per_second']:.0f} 次）")
+    print(f"✅ 一致: {result['matched']}")
+    if result['truncated']:
+        print("⚠️  紀錄檔最後一筆不完整，已略過")
+    if not result['divergent']:
+        return
+
+    print(f"❌ 差異: {result['divergent']}")
+    for kind, count in sorted(result['kinds'].items(), key=lambda item: -item[1]):
+        print(f"   {DIVERGENCE_LABELS.get(kind, kind)}: {count}")
+    print("\n差異（依受影響的遊玩次數排序）:")
+    for sample in result['samples']:
+        choice = '' if sample['choice'] is None else f" 選項 {sample['choice'] + 1}"
+        print(f"   [{sample['kind']}] {sample['scene_id']}{choice}：預期 {sample['expected']}，"
+              f"實際 {sample['actual']}（{sample['sessions']} 次遊玩）")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
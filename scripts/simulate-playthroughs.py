@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蒙地卡羅遊玩模擬腳本
+同時模擬大量遊玩，列出各結局的達成機率、路徑長度與分數分布
+
+用法:
+    python scripts/simulate-playthroughs.py [故事檔] [--runs N] [--workers N]
+                                            [--seed N] [--log 紀錄檔]
+
+故事檔預設為 stories/halloween.json，預設模擬 1000000 次。
+未指定 --log 時每個選項的機率相同；指定遊玩紀錄檔（終端機版的
+TSEXT_SESSION_LOG）時依玩家實際的選擇比例模擬。需要 NumPy。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import StoryFormatError, load_story
+from story_engine.replay import ReplayError, choice_counts
+from story_engine.simulate import DEFAULT_PLAYTHROUGHS, choice_weights, simulate
+
+DEFAULT_STORY = 'stories/halloween.json'
+
+# 列出的最罕見結局數量
+RARE_ENDINGS = 10
+
+
+def parse_args(args):
+    """解析命令列參數"""
+    options = {'story': DEFAULT_STORY, 'runs': DEFAULT_PLAYTHROUGHS, 'workers': 1, 'seed': None, 'log': None}
+    positional = []
+    i = 0
+    while i < len(args):
+        name = args[i][2:]
+        if args[i].startswith('--'):
+            if name not in options or name == 'story' or i + 1 >= len(args):
+                raise ValueError(f"未知的參數: {args[i]}")
+            options[name] = args[i + 1] if name == 'log' else int(args[i + 1])
+            i += 2
+            continue
+        positional.append(args[i])
+        i += 1
+    if len(positional) > 1:
+        raise ValueError("只能指定一個故事檔")
+    if positional:
+        options['story'] = positional[0]
+    return options
+
+
+def main():
+    """主函數"""
+    try:
+        options = parse_args(sys.argv[1:])
+    except ValueError:
+        print(__doc__)
+        sys.exit(1)
+
+    try:
+        graph = load_story(options['story'])
+        weights = None
+        if options['log']:
+            weights = choice_weights(graph, choice_counts(options['log'], graph))
+        result = simulate(graph, options['runs'], weights, workers=options['workers'], seed=options['seed'])
+    except ImportError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    except (OSError, json.JSONDecodeError, StoryFormatError, ReplayError) as e:
+        print(f"❌ 模擬失敗: {e}")
+        sys.exit(1)
+
+    policy = '依遊玩紀錄的選擇比例' if weights is not None else '均等選擇'
+    print(f"🎲 {options['story']}: 模擬 {result['playthroughs']} 次遊玩（{policy}，"
+          f"{result['elapsed']:.2f} 秒，每秒 {result['playthroughs_per_second']:.0f} 次）")
+    print(f"📏 平均路徑長度 {result['mean_length']:.2f} 步（中位數 {result['length_percentiles'][50]}，"
+          f"P90 {result['length_percentiles'][90]}，P99 {result['length_percentiles'][99]}）")
+    print(f"🏆 平均分數 {result['mean_score']:.1f}")
+
+    print("\n結局分布:")
+    for ending in result['endings']:
+        print(f"   {ending['id']:<32} {ending['probability']:>8.3%}  ({ending['score']} 分)")
+
+    print(f"\n最罕見的 {min(RARE_ENDINGS, len(result['endings']))} 個結局:")
+    for ending in result['endings'][-RARE_ENDINGS:][::-1]:
+        print(f"   {ending['id']}: 每 {1 / ending['probability']:.0f} 次遊玩才出現一次")
+    if result['never_reached']:
+        print(f"\n⚠️  模擬中從未達成的結局: {', '.join(result['never_reached'])}")
+    if result['dead_ends']:
+        print(f"⚠️  停在沒有選項的場景: {result['dead_ends']}")
+    if result['broken_links']:
+        print(f"⚠️  {result['broken_links']} 次遊玩走到斷裂連結")
+    if result['unfinished']:
+        print(f"⚠️  {result['unfinished']} 次遊玩超過步數上限仍未結束")
+
+
+if __name__ == "__main__":
+    main()
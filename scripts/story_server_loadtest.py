@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊戲伺服器壓力測試腳本
+在同一個事件迴圈上啟動 StoryServer 與大量模擬客戶端，
+量測每回合（送出選擇到收到下一個場景）的延遲
+
+用法:
+    python scripts/story_server_loadtest.py [客戶端數量 ...]
+
+預設依序測試 1000 與 10000 個同時連線的客戶端。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import compile_story
+from story_engine.server import StoryServer
+
+DEFAULT_CLIENT_COUNTS = [1000, 10000]
+TURNS_PER_CLIENT = 20
+
+
+def raise_file_limit(needed: int) -> int:
+    """
+    嘗試提高可開啟的檔案數上限
+
+    每個模擬客戶端在同一行程中佔用兩個檔案描述符（客戶端與伺服器端）。
+
+    Returns:
+        調整後的軟上限
+    """
+    try:
+        import resource
+    except ImportError:
+        return needed
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """取得已排序數列的百分位數"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+async def run_client(host: str, port: int, turns: int, latencies: List[float], rng: random.Random):
+    """模擬單一玩家連線並隨機遊玩"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        scene = json.loads(await reader.readline())
+        for _ in range(turns):
+            if scene.get('finished') or not scene.get('options'):
+                command = 'restart'
+            else:
+                command = str(rng.randint(1, len(scene['options'])))
+
+            started = time.perf_counter()
+            writer.write(command.encode('utf-8') + b'\n')
+            await writer.drain()
+            line = await reader.readline()
+            latencies.append(time.perf_counter() - started)
+
+            if not line:
+                break
+            scene = json.loads(line)
+        writer.write(b'quit\n')
+        await writer.drain()
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def run_load_test(graph, clients: int, turns: int = TURNS_PER_CLIENT, seed: int = 0) -> Dict:
+    """
+    執行一輪壓力測試
+
+    Args:
+        graph: 編譯後的故事圖
+        clients: 同時連線的客戶端數量
+        turns: 每個客戶端遊玩的回合數
+        seed: 隨機種子
+
+    Returns:
+        包含延遲百分位數與吞吐量的結果字典
+    """
+    server = StoryServer(graph, max_connections=clients, idle_timeout=60.0)
+    host, port = await server.start()
+
+    latencies: List[float] = []
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_client(host, port, turns, latencies, random.Random(rng.random())) for _ in range(clients)),
+        return_exceptions=True
+    )
+    elapsed = time.perf_counter() - started
+    await server.close()
+
+    latencies.sort()
+    return {
+        'clients': clients,
+        'turns': len(latencies),
+        'failed_clients': sum(1 for result in results if isinstance(result, BaseException)),
+        'elapsed_seconds': round(elapsed, 3),
+        'turns_per_second': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+def main():
+    """主函數"""
+    client_counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_CLIENT_COUNTS
+
+    with open('stories/halloween.json', 'r', encoding='utf-8') as f:
+        graph = compile_story(json.load(f))
+
+    file_limit = raise_file_limit(2 * max(client_counts) + 64)
+
+    print("🎃 遊戲伺服器壓力測試")
+    print("=" * 50)
+    for clients in client_counts:
+        if 2 * clients + 64 > file_limit:
+            print(f"⚠️  檔案描述符上限 {file_limit} 不足以支援 {clients} 個客戶端，略過")
+            continue
+        result = asyncio.run(run_load_test(graph, clients))
+        print(f"\n👥 客戶端: {result['clients']}")
+        print(f"   回合數: {result['turns']}（失敗客戶端 {result['failed_clients']}）")
+        print(f"   耗時: {result['elapsed_seconds']} 秒，{result['turns_per_second']} 回合/秒")
+        print(f"   p50: {result['p50_ms']} ms")
+        print(f"   p99: {result['p99_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
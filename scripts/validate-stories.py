@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量故事驗證腳本
+只重新檢查有變更的場景與連到它們的場景，適合在 CI 與 pre-commit 中執行
+
+用法:
+    python scripts/validate-stories.py [故事檔 ...]      # 增量驗證
+    python scripts/validate-stories.py --force [故事檔 ...]  # 忽略快取全部重新檢查
+
+未指定故事檔時驗證網頁版的所有故事包。快取存放在 build/validation/；
+有任何錯誤（格式錯誤、斷裂連結、無法到達的結局、分數不是整數）時
+以狀態碼 1 結束，警告不影響狀態碼。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import os
+import sys
+
+# 添加專案根目錄到 Python 路徑
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(current_dir))
+
+from story_engine import StoryFormatError
+from story_engine.bundle import BUNDLE_SOURCES
+from story_engine.validate import IncrementalValidator
+
+STATUS_LABELS = {
+    'cached': '沒有變更',
+    'incremental': '增量檢查',
+    'full': '完整檢查'
+}
+
+
+def main():
+    """主函數"""
+    args = sys.argv[1:]
+    force = '--force' in args
+    paths = [arg for arg in args if arg != '--force']
+    if any(path.startswith('--') for path in paths):
+        print(__doc__)
+        sys.exit(1)
+    if not paths:
+        # 預設路徑相對於專案根目錄
+        os.chdir(os.path.dirname(current_dir))
+        paths = list(BUNDLE_SOURCES)
+
+    failed = False
+    for path in paths:
+        try:
+            result = IncrementalValidator(path).validate(force=force)
+        except (OSError, StoryFormatError) as e:
+            print(f"❌ {path}: {e}")
+            failed = True
+            continue
+
+        print(f"{'❌' if result['errors'] else '✅'} {path}: {STATUS_LABELS[result['status']]}，"
+              f"{result['scenes']} 個場景中重新檢查 {result['checked']} 個"
+              f"（{result['elapsed'] * 1000:.1f} 毫秒）")
+        if result['removed']:
+            print(f"   移除的場景: {', '.join(result['removed'])}")
+        if result['newly_unreachable']:
+            print(f"   這次變更後無法到達的結局: {', '.join(result['newly_unreachable'])}")
+        for message in result['errors']:
+            print(f"   ❌ {message}")
+        for message in result['warnings']:
+            print(f"   ⚠️  {message}")
+        failed = failed or bool(result['errors'])
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
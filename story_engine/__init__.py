@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tsext Adventure Story Engine
+故事引擎模組
+
+這個模組提供了文字冒險遊戲的核心執行環境，可以：
+- 將故事 JSON 編譯成以整數索引為基礎的故事圖
+- 以無輸入輸出的工作階段狀態機驅動遊戲
+- 以 asyncio 伺服器同時服務大量連線
+- 在行程與 fork 出的工作行程間共用唯讀故事資料
+- 以故事包按需解析場景，支援大型故事
+- 以註冊表探索多個故事包並熱抽換變更
+- 分析結局可達性、路徑長度、循環與遊玩路線數量
+- 以吸收馬可夫鏈精確計算結局機率與期望步數
+- 以故事 JSON 為唯一來源增量產生網頁版的故事資料
+- 以場景內容雜湊與反向連結索引增量驗證故事，只檢查變更的場景
+- 以索引評估成就，每個結局只檢查相關的成就規則
+- 以位元集合保存玩家進度，批次寫入 SQLite
+- 快取終端機的場景畫面，每回合只輸出一次
+- 記錄遊玩的選擇序列，在新版故事上平行重播找出差異
+- 以 NumPy 蒙地卡羅模擬大量遊玩，估計結局機率與分數分布
+- 以串流方式產生任意大小的合成故事，用於壓力測試
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+__version__ = '1.0.0'
+__author__ = 'Tsext Adventure Team'
+
+import importlib
+
+from .graph import StoryGraph, StoryFormatError, compile_story, NO_SCENE
+
+# 其餘的類別與函數在第一次取用時才匯入對應的模組，import story_engine
+# 只載入故事圖；終端機版遊戲等程式啟動時不必載入 asyncio、sqlite3 等模組
+_LAZY_ATTRIBUTES = {
+    'GameSession': 'session',
+    'SessionManager': 'session',
+    'SessionError': 'session',
+    'StoryServer': 'server',
+    'load_story': 'shared',
+    'load_story_data': 'shared',
+    'preload': 'shared',
+    'clear_cache': 'shared',
+    'StoryPack': 'pack',
+    'open_pack': 'pack',
+    'write_pack': 'pack',
+    'StoryRegistry': 'registry',
+    'StoryAnalyzer': 'analysis',
+    'analyze_story': 'analysis',
+    'AchievementEngine': 'achievements',
+    'load_achievements': 'achievements',
+    'PlayerProgress': 'progress',
+    'ProgressStore': 'progress'
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = [
+    'StoryGraph', 'StoryFormatError', 'compile_story', 'NO_SCENE',
+    'GameSession', 'SessionManager', 'SessionError',
+    'StoryServer',
+    'load_story', 'load_story_data', 'preload', 'clear_cache',
+    'StoryPack', 'open_pack', 'write_pack',
+    'StoryRegistry',
+    'StoryAnalyzer', 'analyze_story',
+    'AchievementEngine', 'load_achievements',
+    'PlayerProgress', 'ProgressStore'
+]
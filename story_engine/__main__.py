@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+以 `python -m story_engine` 啟動遊戲伺服器
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from .server import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+成就引擎
+將 stories/achievements.json 中的成就條件編譯成以結局、場景 ID 為鍵的索引
+
+支援的條件：
+- `ending_<結局ID>`: 達成指定結局
+- `scene_<場景ID>`: 到訪指定場景
+- `score_<分數>_plus`: 累計分數達到門檻
+- 帶有 `endings` 及／或 `scenes` 清單的群組條件：達成其中 `count` 個
+  （預設為全部）；每位玩家以計數器記錄已達成的數量
+- `all_endings_unlocked`（沒有清單時）: 達成所有已載入故事的結局
+
+評估結局或場景時只會檢查該 ID 在索引中對應的規則，成本與成就總數無關。
+依時間、分享次數等非故事事件判定的條件不在此處理，會列在
+`unsupported` 中。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import bisect
+import json
+import os
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .graph import StoryGraph
+
+ACHIEVEMENTS_FILE = os.path.join('stories', 'achievements.json')
+
+_SCORE_CONDITION = re.compile(r'score_(\d+)_plus$')
+
+
+class AchievementError(ValueError):
+    """成就資料格式錯誤"""
+
+
+class PlayerAchievements:
+    """單一玩家的成就進度"""
+
+    __slots__ = ('unlocked', 'endings', 'scenes', 'counters', 'score')
+
+    def __init__(self, group_count: int):
+        self.unlocked: Set[str] = set()
+        self.endings: Set[str] = set()
+        self.scenes: Set[str] = set()
+        # 每個群組規則已達成的成員數量
+        self.counters = array('I', [0]) * group_count
+        self.score = 0
+
+
+class AchievementEngine:
+    """以索引評估成就的引擎"""
+
+    def __init__(self, achievements: Dict[str, Dict[str, Any]], graphs: Iterable[StoryGraph] = ()):
+        """
+        編譯成就條件
+
+        Args:
+            achievements: 成就 ID 對應成就資料（需包含 condition）
+            graphs: 已載入的故事圖，用來展開 all_endings_unlocked
+
+        Raises:
+            AchievementError: 成就資料格式錯誤
+        """
+        self.achievements = achievements
+        self._ending_rules: Dict[str, List[str]] = {}
+        self._scene_rules: Dict[str, List[str]] = {}
+        self._ending_groups: Dict[str, List[int]] = {}
+        self._scene_groups: Dict[str, List[int]] = {}
+        # 群組規則：(成就 ID, 需要達成的數量)
+        self._groups: List[Tuple[str, int]] = []
+        self._score_thresholds: List[int] = []
+        self._score_rules: List[str] = []
+        self.unsupported: List[str] = []
+
+        all_endings = []
+        for graph in graphs:
+            all_endings.extend(graph.scene_ids[scene] for scene in graph.ending_indices())
+
+        score_rules = []
+        for achievement_id, achievement in achievements.items():
+            if not isinstance(achievement, dict) or not isinstance(achievement.get('condition'), str):
+                raise AchievementError(f"成就 {achievement_id} 缺少 condition")
+            condition = achievement['condition']
+            endings = achievement.get('endings')
+            scenes = achievement.get('scenes')
+            if endings is None and scenes is None and condition == 'all_endings_unlocked' and all_endings:
+                endings = all_endings
+
+            if endings is not None or scenes is not None:
+                self._compile_group(achievement_id, achievement, endings or [], scenes or [])
+            elif condition.startswith('ending_'):
+                self._ending_rules.setdefault(condition[7:], []).append(achievement_id)
+            elif condition.startswith('scene_'):
+                self._scene_rules.setdefault(condition[6:], []).append(achievement_id)
+            elif _SCORE_CONDITION.match(condition):
+                score_rules.append((int(_SCORE_CONDITION.match(condition).group(1)), achievement_id))
+            else:
+                self.unsupported.append(achievement_id)
+
+        score_rules.sort()
+        self._score_thresholds = [threshold for threshold, _ in score_rules]
+        self._score_rules = [achievement_id for _, achievement_id in score_rules]
+
+    def _compile_group(self, achievement_id: str, achievement: Dict[str, Any],
+                       endings: List[str], scenes: List[str]):
+        """將群組條件編譯成計數器，並把每個成員加入索引"""
+        members = len(set(endings)) + len(set(scenes))
+        required = achievement.get('count', members)
+        if not isinstance(required, int) or not 0 < required <= members:
+            raise AchievementError(f"成就 {achievement_id} 的 count 必須介於 1 到 {members}")
+
+        group = len(self._groups)
+        self._groups.append((achievement_id, required))
+        for ending_id in set(endings):
+            self._ending_groups.setdefault(ending_id, []).append(group)
+        for scene_id in set(scenes):
+            self._scene_groups.setdefault(scene_id, []).append(group)
+
+    def new_player(self) -> PlayerAchievements:
+        """建立新玩家的成就進度"""
+        return PlayerAchievements(len(self._groups))
+
+    def _unlock(self, player: PlayerAchievements, achievement_id: str, unlocked: List[str]):
+        if achievement_id not in player.unlocked:
+            player.unlocked.add(achievement_id)
+            unlocked.append(achievement_id)
+
+    def _advance(self, player: PlayerAchievements, groups: List[int], unlocked: List[str]):
+        """增加群組計數器，達到門檻時解鎖"""
+        counters = player.counters
+        for group in groups:
+            counters[group] += 1
+            achievement_id, required = self._groups[group]
+            if counters[group] >= required:
+                self._unlock(player, achievement_id, unlocked)
+
+    def visit(self, player: PlayerAchievements, scene_id: str) -> List[str]:
+        """
+        記錄玩家到訪場景
+
+        Returns:
+            新解鎖的成就 ID
+        """
+        unlocked: List[str] = []
+        if scene_id in player.scenes:
+            return unlocked
+        player.scenes.add(scene_id)
+        for achievement_id in self._scene_rules.get(scene_id, ()):
+            self._unlock(player, achievement_id, unlocked)
+        self._advance(player, self._scene_groups.get(scene_id, ()), unlocked)
+        return unlocked
+
+    def finish(self, player: PlayerAchievements, ending_id: str, score: int = 0) -> List[str]:
+        """
+        記錄玩家達成結局並累計分數
+
+        Args:
+            player: 玩家的成就進度
+            ending_id: 結局場景 ID
+            score: 結局的分數
+
+        Returns:
+            新解鎖的成就 ID
+        """
+        unlocked = self.visit(player, ending_id)
+        if ending_id not in player.endings:
+            player.endings.add(ending_id)
+            for achievement_id in self._ending_rules.get(ending_id, ()):
+                self._unlock(player, achievement_id, unlocked)
+            self._advance(player, self._ending_groups.get(ending_id, ()), unlocked)
+
+        if score > 0:
+            # 只檢查這次加分跨過的門檻
+            first = bisect.bisect_right(self._score_thresholds, player.score)
+            player.score += score
+            last = bisect.bisect_right(self._score_thresholds, player.score)
+            for achievement_id in self._score_rules[first:last]:
+                self._unlock(player, achievement_id, unlocked)
+        return unlocked
+
+    def points(self, player: PlayerAchievements) -> int:
+        """計算玩家已解鎖成就的總點數"""
+        return sum(self.achievements[achievement_id].get('points', 0) for achievement_id in player.unlocked)
+
+    def describe(self, achievement_id: str) -> Dict[str, Any]:
+        """取得成就的顯示資料"""
+        achievement = self.achievements[achievement_id]
+        return {
+            'id': achievement_id,
+            'name': achievement.get('name', achievement_id),
+            'icon': achievement.get('icon', ''),
+            'points': achievement.get('points', 0)
+        }
+
+
+def load_achievements(path: str = ACHIEVEMENTS_FILE, graphs: Iterable[StoryGraph] = ()) -> AchievementEngine:
+    """
+    載入成就檔並編譯成引擎
+
+    Raises:
+        OSError: 無法讀取檔案
+        AchievementError: 成就資料格式錯誤
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise AchievementError(f"{path}: JSON 格式錯誤: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('achievements'), dict):
+        raise AchievementError(f"{path}: 缺少 achievements 物件")
+    return AchievementEngine(data['achievements'], graphs)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事圖分析器
+在編譯後的故事圖上計算可達性、結局路徑、循環與遊玩路線數量
+
+所有演算法都以迭代方式實作（不使用遞迴），並以陣列記錄中間結果，
+時間複雜度與場景數加選項數成線性關係，可以處理十萬個場景的故事：
+
+- 可達性與最短路徑：從起始場景做廣度優先搜尋
+- 循環偵測：迭代版 Tarjan 強連通元件演算法
+- 最長路徑與路線數量：依拓撲順序在縮合圖上做動態規劃；會經過
+  循環的結局實際上沒有上限，最長路徑為 None 並標記 through_cycle
+
+結局場景會結束遊戲，因此分析時不會沿著結局場景的選項繼續前進。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from array import array
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .graph import StoryGraph, NO_SCENE
+
+# 未到達場景的距離
+UNREACHED = -1
+
+
+def strongly_connected(count: int, successors: Callable[[int], Sequence[int]]) -> Tuple[List[List[int]], array]:
+    """
+    以迭代版 Tarjan 演算法計算強連通元件
+
+    Args:
+        count: 節點數
+        successors: 取得節點後續節點的函式
+
+    Returns:
+        (強連通元件列表（依反向拓撲順序排列，後續元件在前）, 每個節點所屬的元件)
+    """
+    index_of = array('i', [UNREACHED]) * count
+    lowlink = array('i', [0]) * count
+    on_stack = bytearray(count)
+    component_of = array('i', [UNREACHED]) * count
+    stack: List[int] = []
+    components: List[List[int]] = []
+    next_index = 0
+
+    for root in range(count):
+        if index_of[root] != UNREACHED:
+            continue
+        # 工作堆疊中的每一項是 (場景, 後續場景, 下一個要處理的後續位置)
+        work = [(root, successors(root), 0)]
+        index_of[root] = lowlink[root] = next_index
+        next_index += 1
+        stack.append(root)
+        on_stack[root] = 1
+
+        while work:
+            scene, targets, position = work[-1]
+            if position < len(targets):
+                work[-1] = (scene, targets, position + 1)
+                target = targets[position]
+                if index_of[target] == UNREACHED:
+                    index_of[target] = lowlink[target] = next_index
+                    next_index += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, successors(target), 0))
+                elif on_stack[target] and index_of[target] < lowlink[scene]:
+                    lowlink[scene] = index_of[target]
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if lowlink[scene] < lowlink[parent]:
+                    lowlink[parent] = lowlink[scene]
+
+            if lowlink[scene] == index_of[scene]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component_of[member] = len(components)
+                    component.append(member)
+                    if member == scene:
+                        break
+                components.append(component)
+
+    return components, component_of
+
+
+class StoryAnalyzer:
+    """故事圖分析器"""
+
+    def __init__(self, graph: StoryGraph):
+        self.graph = graph
+        self._distances: Optional[array] = None
+        self._parents: Optional[array] = None
+        self._components: Optional[List[List[int]]] = None
+        self._component_of: Optional[array] = None
+
+    def _successors(self, scene: int) -> List[int]:
+        """取得遊玩時可以前往的場景（結局場景沒有後續，斷裂連結會被略過）"""
+        graph = self.graph
+        if graph.ending_flags[scene]:
+            return []
+        return [target for target in graph.successors(scene) if target != NO_SCENE]
+
+    def _search(self):
+        """從起始場景做廣度優先搜尋，記錄距離與前一個場景"""
+        if self._distances is not None:
+            return
+        count = len(self.graph)
+        distances = array('i', [UNREACHED]) * count
+        parents = array('i', [NO_SCENE]) * count
+
+        start = self.graph.start
+        distances[start] = 0
+        queue = deque([start])
+        while queue:
+            scene = queue.popleft()
+            for target in self._successors(scene):
+                if distances[target] == UNREACHED:
+                    distances[target] = distances[scene] + 1
+                    parents[target] = scene
+                    queue.append(target)
+
+        self._distances = distances
+        self._parents = parents
+
+    def reachable(self) -> List[int]:
+        """取得從起始場景可以到達的場景索引"""
+        self._search()
+        return [scene for scene, distance in enumerate(self._distances) if distance != UNREACHED]
+
+    def shortest_path(self, scene: int) -> Optional[List[int]]:
+        """
+        取得從起始場景到指定場景的最短路徑
+
+        Returns:
+            場景索引路徑（包含起點與終點），無法到達時回傳 None
+        """
+        self._search()
+        if self._distances[scene] == UNREACHED:
+            return None
+        path = [scene]
+        while path[-1] != self.graph.start:
+            path.append(self._parents[path[-1]])
+        path.reverse()
+        return path
+
+    def strongly_connected_components(self) -> List[List[int]]:
+        """
+        以迭代版 Tarjan 演算法計算強連通元件
+
+        Returns:
+            強連通元件列表，依反向拓撲順序排列（後續元件在前）
+        """
+        if self._components is None:
+            self._components, self._component_of = strongly_connected(len(self.graph), self._successors)
+        return self._components
+
+    def cycles(self) -> List[List[int]]:
+        """取得包含循環的強連通元件（多個場景互相連通，或場景連回自己）"""
+        cyclic = []
+        for component in self.strongly_connected_components():
+            if len(component) > 1 or component[0] in self._successors(component[0]):
+                cyclic.append(component)
+        return cyclic
+
+    def path_statistics(self) -> Dict[str, Any]:
+        """
+        依拓撲順序在縮合圖（每個強連通元件視為一個節點）上計算
+        每個場景的最長路徑與路線數量
+
+        不經過循環就能到達的場景，縮合圖上的每個節點都是單一場景，
+        結果就是以場景計算的精確最長路徑與路線數量。會經過循環的場景
+        實際上沒有上限：unbounded 標記為 1，最長路徑為 None，路線數量
+        以每個循環最多走一次計算。
+
+        Returns:
+            包含 longest、playthroughs 與 unbounded 的字典，皆以場景索引取值
+        """
+        components = self.strongly_connected_components()
+        component_of = self._component_of
+        component_count = len(components)
+
+        longest = array('i', [UNREACHED]) * component_count
+        playthroughs: List[int] = [0] * component_count
+        unbounded = bytearray(component_count)
+
+        first = component_of[self.graph.start]
+        longest[first] = 0
+        playthroughs[first] = 1
+
+        # Tarjan 的輸出是反向拓撲順序，倒過來處理即為拓撲順序
+        for component_id in range(component_count - 1, -1, -1):
+            if not playthroughs[component_id]:
+                continue
+            component = components[component_id]
+            if len(component) > 1 or component[0] in self._successors(component[0]):
+                unbounded[component_id] = 1
+            for scene in component:
+                for target in self._successors(scene):
+                    target_component = component_of[target]
+                    if target_component == component_id:
+                        continue
+                    playthroughs[target_component] += playthroughs[component_id]
+                    if longest[component_id] + 1 > longest[target_component]:
+                        longest[target_component] = longest[component_id] + 1
+                    if unbounded[component_id]:
+                        unbounded[target_component] = 1
+
+        return {
+            'longest': [
+                None if unbounded[component_of[scene]] else longest[component_of[scene]]
+                for scene in range(len(self.graph))
+            ],
+            'playthroughs': [playthroughs[component_of[scene]] for scene in range(len(self.graph))],
+            'unbounded': [unbounded[component_of[scene]] for scene in range(len(self.graph))]
+        }
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        執行完整分析
+
+        Returns:
+            分析結果字典，場景以 ID 表示
+        """
+        graph = self.graph
+        scene_ids = graph.scene_ids
+        self._search()
+        stats = self.path_statistics()
+
+        reachable = set(self.reachable())
+        referenced = set()
+        for target in graph.choice_targets:
+            if target != NO_SCENE:
+                referenced.add(target)
+
+        endings = {}
+        total_playthroughs = 0
+        for scene in graph.ending_indices():
+            if scene not in reachable:
+                continue
+            path = self.shortest_path(scene)
+            endings[scene_ids[scene]] = {
+                'shortest': len(path) - 1,
+                'shortest_path': [scene_ids[step] for step in path],
+                'longest': stats['longest'][scene],
+                'playthroughs': stats['playthroughs'][scene],
+                'through_cycle': bool(stats['unbounded'][scene])
+            }
+            total_playthroughs += stats['playthroughs'][scene]
+
+        return {
+            'start': scene_ids[graph.start],
+            'total_scenes': len(graph),
+            'reachable_scenes': len(reachable),
+            'unreachable': [scene_ids[i] for i in range(len(graph)) if i not in reachable],
+            'orphaned': [
+                scene_ids[i] for i in range(len(graph))
+                if i not in referenced and i != graph.start
+            ],
+            'dead_ends': [
+                scene_ids[i] for i in sorted(reachable)
+                if not graph.is_ending(i) and not graph.has_choices(i)
+            ],
+            'endings': endings,
+            'unreachable_endings': [
+                scene_ids[i] for i in graph.ending_indices() if i not in reachable
+            ],
+            'cycles': [[scene_ids[scene] for scene in component] for component in self.cycles()],
+            'total_playthroughs': total_playthroughs,
+            'unbounded_playthroughs': any(ending['through_cycle'] for ending in endings.values())
+        }
+
+
+def analyze_story(graph: StoryGraph) -> Dict[str, Any]:
+    """分析故事圖（StoryAnalyzer(graph).analyze() 的簡寫）"""
+    return StoryAnalyzer(graph).analyze()
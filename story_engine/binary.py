@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+預編譯二進位故事格式
+將編譯後的故事圖寫成版本化的二進位檔，並以 mmap 載入
+
+檔案配置（小端序，每個區段對齊 8 位元組）：
+
+    標頭        magic 'TSXS'、格式版本、場景數、選項數、起始場景、字串表大小
+    選項偏移    u32[場景數 + 1]
+    選項目標    i32[選項數]（斷裂連結為 NO_SCENE）
+    分數        i32[場景數]
+    結局旗標    u8[場景數]
+    場景紀錄    u32[場景數 × 8]：ID、標題、描述、結局描述的 (偏移, 長度)
+    選項紀錄    u32[選項數 × 2]：選項文字的 (偏移, 長度)
+    ID 索引     u32[場景數]：依 ID 的 UTF-8 位元組排序的場景索引
+    字串表      UTF-8 文字，相同字串只存一份
+
+載入時只讀取標頭並建立記憶體視圖，場景文字在第一次存取時才解碼，
+因此啟動時間與記憶體用量都不會隨故事大小成長。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+from .graph import StoryGraph, StoryFormatError, NO_SCENE
+
+MAGIC = b'TSXS'
+FORMAT_VERSION = 1
+BINARY_SUFFIX = '.tsxs'
+
+_HEADER = struct.Struct('<4sHHIIII')
+
+# 每個場景紀錄中的字串欄位順序
+_SCENE_FIELDS = ('id', 'title', 'description', 'outcome')
+_SCENE_STRIDE = 2 * len(_SCENE_FIELDS)
+
+
+def _padding(size: int) -> int:
+    """計算對齊 8 位元組所需的填充長度"""
+    return -size % 8
+
+
+def _view(buffer: memoryview, offset: int, count: int, typecode: str) -> Tuple[Sequence[int], int]:
+    """
+    從緩衝區切出一個型別化的區段
+
+    Returns:
+        (區段視圖, 下一個區段的偏移)
+    """
+    itemsize = struct.calcsize(typecode)
+    size = count * itemsize
+    if offset + size > len(buffer):
+        raise StoryFormatError("二進位故事檔案長度不足")
+    section = buffer[offset:offset + size]
+    if sys.byteorder == 'little':
+        view = section.cast(typecode)
+    else:
+        view = array(typecode, section.tobytes())
+        view.byteswap()
+    return view, offset + size + _padding(size)
+
+
+class _StringColumn(Sequence):
+    """按需解碼字串表中某個欄位的唯讀序列"""
+
+    __slots__ = ('_strings', '_refs', '_field', '_stride', '_length')
+
+    def __init__(self, strings: memoryview, refs: Sequence[int], field: int, stride: int):
+        self._strings = strings
+        self._refs = refs
+        self._field = field
+        self._stride = stride
+        self._length = len(refs) // stride
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _decode(self, i: int) -> str:
+        base = i * self._stride + self._field
+        offset = self._refs[base]
+        return str(self._strings[offset:offset + self._refs[base + 1]], 'utf-8')
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return tuple(self._decode(j) for j in range(*i.indices(self._length)))
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError("字串索引超出範圍")
+        return self._decode(i)
+
+    def raw(self, i: int) -> memoryview:
+        """取得未解碼的 UTF-8 位元組"""
+        base = i * self._stride + self._field
+        offset = self._refs[base]
+        return self._strings[offset:offset + self._refs[base + 1]]
+
+
+class _BinaryIndex:
+    """以二分搜尋取代字典的場景 ID 索引"""
+
+    __slots__ = ('_ids', '_sorted')
+
+    def __init__(self, ids: _StringColumn, sorted_index: Sequence[int]):
+        self._ids = ids
+        self._sorted = sorted_index
+
+    def get(self, scene_id: str, default: int = NO_SCENE) -> int:
+        key = scene_id.encode('utf-8')
+        low, high = 0, len(self._sorted)
+        while low < high:
+            middle = (low + high) // 2
+            scene = self._sorted[middle]
+            candidate = self._ids.raw(scene)
+            if candidate == key:
+                return scene
+            if bytes(candidate) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return default
+
+    def __getitem__(self, scene_id: str) -> int:
+        scene = self.get(scene_id)
+        if scene == NO_SCENE:
+            raise KeyError(scene_id)
+        return scene
+
+    def __contains__(self, scene_id: str) -> bool:
+        return self.get(scene_id) != NO_SCENE
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+
+def default_binary_path(source: str) -> str:
+    """
+    取得故事 JSON 對應的預編譯檔路徑
+
+    例如 stories/halloween.json → stories/build/halloween.tsxs
+    """
+    directory, filename = os.path.split(source)
+    return os.path.join(directory, 'build', os.path.splitext(filename)[0] + BINARY_SUFFIX)
+
+
+def write_binary(graph: StoryGraph, path: str) -> int:
+    """
+    將故事圖寫成二進位故事檔
+
+    Args:
+        graph: 編譯後的故事圖
+        path: 輸出檔案路徑
+
+    Returns:
+        寫入的位元組數
+    """
+    strings = bytearray()
+    string_offsets: Dict[str, int] = {}
+
+    def intern(text: str) -> Tuple[int, int]:
+        encoded = text.encode('utf-8')
+        offset = string_offsets.get(text)
+        if offset is None:
+            offset = string_offsets[text] = len(strings)
+            strings.extend(encoded)
+        return offset, len(encoded)
+
+    scene_count = len(graph)
+    scene_refs = array('I')
+    for i in range(scene_count):
+        for column in (graph.scene_ids, graph.titles, graph.descriptions, graph.outcomes):
+            scene_refs.extend(intern(column[i]))
+
+    choice_refs = array('I')
+    for label in graph.choice_labels:
+        choice_refs.extend(intern(label))
+
+    sorted_index = array('I', sorted(range(scene_count), key=lambda i: graph.scene_ids[i].encode('utf-8')))
+
+    sections: List[array] = [
+        array('I', graph.choice_offsets),
+        array('i', graph.choice_targets),
+        array('i', graph.scores),
+        array('B', graph.ending_flags),
+        scene_refs,
+        choice_refs,
+        sorted_index
+    ]
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # 先寫入暫存檔再替換，讀取端永遠不會看到寫到一半的檔案
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        header = _HEADER.pack(
+            MAGIC, FORMAT_VERSION, 0, scene_count, len(graph.choice_targets),
+            graph.start, len(strings)
+        )
+        f.write(header)
+        f.write(b'\0' * _padding(len(header)))
+        for section in sections:
+            if sys.byteorder != 'little':
+                section.byteswap()
+            data = section.tobytes()
+            f.write(data)
+            f.write(b'\0' * _padding(len(data)))
+        f.write(strings)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+def load_binary(path: str) -> StoryGraph:
+    """
+    以 mmap 載入二進位故事檔
+
+    回傳的 StoryGraph 直接參照映射的檔案內容，場景文字在存取時才解碼。
+
+    Args:
+        path: 二進位故事檔路徑
+
+    Returns:
+        以 mmap 為後盾的 StoryGraph
+
+    Raises:
+        FileNotFoundError: 找不到檔案
+        StoryFormatError: 檔案格式或版本不符
+    """
+    with open(path, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise StoryFormatError(f"二進位故事檔案是空的: {path}")
+
+    buffer = memoryview(mapped)
+    if len(buffer) < _HEADER.size:
+        raise StoryFormatError(f"二進位故事檔案長度不足: {path}")
+
+    magic, version, _, scene_count, choice_count, start, string_size = _HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise StoryFormatError(f"不是二進位故事檔案: {path}")
+    if version != FORMAT_VERSION:
+        raise StoryFormatError(f"不支援的二進位故事格式版本 {version}（需要 {FORMAT_VERSION}）")
+
+    offset = _HEADER.size + _padding(_HEADER.size)
+    choice_offsets, offset = _view(buffer, offset, scene_count + 1, 'I')
+    choice_targets, offset = _view(buffer, offset, choice_count, 'i')
+    scores, offset = _view(buffer, offset, scene_count, 'i')
+    ending_flags, offset = _view(buffer, offset, scene_count, 'B')
+    scene_refs, offset = _view(buffer, offset, scene_count * _SCENE_STRIDE, 'I')
+    choice_refs, offset = _view(buffer, offset, choice_count * 2, 'I')
+    sorted_index, offset = _view(buffer, offset, scene_count, 'I')
+    if offset + string_size > len(buffer):
+        raise StoryFormatError(f"二進位故事檔案長度不足: {path}")
+    strings = buffer[offset:offset + string_size]
+
+    columns = [_StringColumn(strings, scene_refs, 2 * i, _SCENE_STRIDE) for i in range(len(_SCENE_FIELDS))]
+
+    graph = StoryGraph()
+    graph.scene_ids = columns[0]
+    graph.index = _BinaryIndex(columns[0], sorted_index)
+    graph.start = start
+    graph.choice_offsets = choice_offsets
+    graph.choice_targets = choice_targets
+    graph.choice_labels = _StringColumn(strings, choice_refs, 0, 2)
+    graph.ending_flags = ending_flags
+    graph.scores = scores
+    graph.titles = columns[1]
+    graph.descriptions = columns[2]
+    graph.outcomes = columns[3]
+    return graph
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+網頁版故事建置
+以故事 JSON 為唯一資料來源，產生各個 HTML 目標中的 `storyData` 常值
+
+每個故事包渲染成一段 JavaScript 片段，並以來源檔的內容雜湊快取在
+建置目錄中；來源沒有變更的故事包直接重用片段，不會重新解析。
+HTML 目標只替換 `storyData` 常值，其餘內容（樣式、程式碼、快取標頭）
+保持不變；產生的內容與現有檔案相同時不會寫入，修改時間也不變，
+部署時可以依清單中的內容雜湊略過沒有變更的檔案。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from .graph import StoryFormatError, compile_story
+from .jsliteral import find_variable_span
+from .registry import is_story_data
+
+# 組成網頁版故事的故事包，依序合併
+BUNDLE_SOURCES = ('stories/halloween.json', 'christmas_scenes.json')
+
+# 需要同步故事資料的 HTML 目標
+BUNDLE_TARGETS = (
+    'web/index.html',
+    'deploy/github-pages/index.html',
+    'itch-deploy/index.html'
+)
+
+# 建置快取目錄：清單與各故事包的片段
+BUILD_DIR = os.path.join('build', 'web-bundle')
+
+STORY_VARIABLE = 'storyData'
+
+MANIFEST_VERSION = 1
+
+# 與 HTML 中既有的縮排一致：場景鍵 12 個空白，物件結尾 8 個空白
+_SCENE_INDENT = ' ' * 12
+_FIELD_INDENT = ' ' * 16
+_CHOICE_INDENT = ' ' * 20
+_CLOSING_INDENT = ' ' * 8
+
+
+def content_hash(data: bytes) -> str:
+    """計算內容雜湊（SHA-256 十六進位字串）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _js(value: Any) -> str:
+    """將值轉成 JavaScript 常值（JSON 是其子集）"""
+    return json.dumps(value, ensure_ascii=False)
+
+
+def render_scene(scene_id: str, scene: Dict[str, Any]) -> str:
+    """
+    渲染單一場景，選項每個一行，與手寫的 storyData 格式相同
+
+    Returns:
+        `"scene_id": {...}` 形式的 JavaScript 片段
+    """
+    fields = []
+    for key, value in scene.items():
+        if key == 'choices' and isinstance(value, list):
+            if value:
+                choices = ',\n'.join(f"{_CHOICE_INDENT}{_js(choice)}" for choice in value)
+                fields.append(f'{_FIELD_INDENT}"choices": [\n{choices}\n{_FIELD_INDENT}]')
+            else:
+                fields.append(f'{_FIELD_INDENT}"choices": []')
+        else:
+            fields.append(f'{_FIELD_INDENT}{_js(key)}: {_js(value)}')
+    body = ',\n'.join(fields)
+    return f'{_SCENE_INDENT}{_js(scene_id)}: {{\n{body}\n{_SCENE_INDENT}}}'
+
+
+def render_pack(story_data: Dict[str, Dict[str, Any]]) -> str:
+    """渲染整個故事包的場景片段（不含外層大括號）"""
+    return ',\n'.join(render_scene(scene_id, scene) for scene_id, scene in story_data.items())
+
+
+def render_story_literal(fragments: Iterable[str]) -> str:
+    """將各故事包片段組成完整的 storyData 物件常值"""
+    body = ',\n'.join(fragment for fragment in fragments if fragment)
+    return f'{{\n{body}\n{_CLOSING_INDENT}}}'
+
+
+def replace_story_literal(html: str, literal: str, name: str = STORY_VARIABLE) -> str:
+    """
+    替換 HTML 中的故事資料常值
+
+    Raises:
+        KeyError: 找不到變數宣告
+    """
+    span = find_variable_span(html, name)
+    if span is None:
+        raise KeyError(name)
+    start, end = span
+    return html[:start] + literal + html[end:]
+
+
+def _write_atomic(path: str, data: bytes):
+    """先寫入暫存檔再替換，避免留下寫到一半的檔案"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class BundleBuilder:
+    """網頁版故事建置器"""
+
+    def __init__(self, sources: Iterable[str] = BUNDLE_SOURCES,
+                 targets: Iterable[str] = BUNDLE_TARGETS,
+                 build_dir: str = BUILD_DIR):
+        """
+        初始化建置器
+
+        Args:
+            sources: 故事 JSON 路徑，依序合併；場景 ID 不可重複
+            targets: 要更新的 HTML 檔案路徑
+            build_dir: 存放清單與片段快取的目錄
+        """
+        self.sources = list(sources)
+        self.targets = list(targets)
+        self.build_dir = build_dir
+        self.manifest_path = os.path.join(build_dir, 'manifest.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        """載入上次建置的清單，格式不符時視為沒有快取"""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = None
+        if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+            manifest = {'version': MANIFEST_VERSION, 'packs': {}, 'targets': {}, 'story_hash': None}
+        return manifest
+
+    def _fragment_path(self, source_hash: str) -> str:
+        return os.path.join(self.build_dir, f"{source_hash[:16]}.js")
+
+    def _build_pack(self, path: str, force: bool) -> Dict[str, Any]:
+        """
+        取得單一故事包的片段，來源沒有變更時重用快取
+
+        Raises:
+            OSError: 無法讀取檔案
+            StoryFormatError: 不是有效的故事資料
+        """
+        with open(path, 'rb') as f:
+            raw = f.read()
+        source_hash = content_hash(raw)
+        fragment_path = self._fragment_path(source_hash)
+
+        cached = self.manifest['packs'].get(path)
+        if not force and cached and cached['hash'] == source_hash:
+            try:
+                with open(fragment_path, 'r', encoding='utf-8') as f:
+                    return dict(cached, fragment=f.read(), status='cached')
+            except OSError:
+                pass
+
+        try:
+            story_data = json.loads(raw.decode('utf-8'))
+        except ValueError as e:
+            raise StoryFormatError(f"{path}: JSON 格式錯誤: {e}")
+        if not is_story_data(story_data):
+            raise StoryFormatError(f"{path}: 不是場景格式的故事")
+        graph = compile_story(story_data, start=next(iter(story_data)), strict=False)
+
+        fragment = render_pack(story_data)
+        _write_atomic(fragment_path, fragment.encode('utf-8'))
+        return {
+            'hash': source_hash,
+            'scenes': list(story_data),
+            'broken_links': len(graph.broken_links),
+            'fragment': fragment,
+            'status': 'rebuilt'
+        }
+
+    def _target_current(self, path: str, story_hash: str) -> bool:
+        """檢查目標是否仍是上次以相同故事資料產生的內容"""
+        recorded = self.manifest['targets'].get(path)
+        if not recorded or recorded.get('story_hash') != story_hash:
+            return False
+        try:
+            with open(path, 'rb') as f:
+                return content_hash(f.read()) == recorded['hash']
+        except OSError:
+            return False
+
+    def build(self, force: bool = False, write: bool = True) -> Dict[str, Any]:
+        """
+        建置所有 HTML 目標
+
+        Args:
+            force: 忽略快取，重新渲染所有故事包並重新比對所有目標
+            write: 是否寫入目標與清單；False 時只回報哪些目標需要更新
+
+        Returns:
+            建置結果字典：packs 為各故事包狀態（rebuilt/cached），
+            targets 為各目標狀態（written/stale/unchanged），
+            story_hash 為合併後故事資料的內容雜湊
+
+        Raises:
+            OSError: 無法讀寫檔案
+            StoryFormatError: 故事資料錯誤或故事包之間場景 ID 重複
+            KeyError: 目標中找不到 storyData 宣告
+        """
+        packs: Dict[str, Dict[str, Any]] = {}
+        owners: Dict[str, str] = {}
+        for path in self.sources:
+            pack = self._build_pack(path, force)
+            for scene_id in pack['scenes']:
+                if scene_id in owners:
+                    raise StoryFormatError(f"場景 ID 重複: {scene_id}（{owners[scene_id]} 與 {path}）")
+                owners[scene_id] = path
+            packs[path] = pack
+
+        literal = render_story_literal(pack['fragment'] for pack in packs.values())
+        story_hash = content_hash(literal.encode('utf-8'))
+
+        targets: Dict[str, str] = {}
+        recorded: Dict[str, Dict[str, str]] = {}
+        for path in self.targets:
+            if not force and self._target_current(path, story_hash):
+                targets[path] = 'unchanged'
+                recorded[path] = self.manifest['targets'][path]
+                continue
+
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                html = f.read()
+            output = replace_story_literal(html, literal).encode('utf-8')
+            if output == html.encode('utf-8'):
+                targets[path] = 'unchanged'
+            elif write:
+                _write_atomic(path, output)
+                targets[path] = 'written'
+            else:
+                targets[path] = 'stale'
+            recorded[path] = {'hash': content_hash(output), 'story_hash': story_hash}
+
+        if write:
+            self.manifest = {
+                'version': MANIFEST_VERSION,
+                'packs': {
+                    path: {key: pack[key] for key in ('hash', 'scenes', 'broken_links')}
+                    for path, pack in packs.items()
+                },
+                'targets': recorded,
+                'story_hash': story_hash
+            }
+            _write_atomic(self.manifest_path,
+                          json.dumps(self.manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+            self._prune_fragments({self._fragment_path(pack['hash']) for pack in packs.values()})
+
+        return {
+            'packs': {path: pack['status'] for path, pack in packs.items()},
+            'targets': targets,
+            'story_hash': story_hash,
+            'scenes': len(owners),
+            'broken_links': sum(pack['broken_links'] for pack in packs.values())
+        }
+
+    def _prune_fragments(self, keep: Set[str]):
+        """刪除不再被任何故事包使用的舊片段"""
+        for filename in os.listdir(self.build_dir):
+            path = os.path.join(self.build_dir, filename)
+            if filename.endswith('.js') and path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def stale_targets(self) -> List[str]:
+        """取得故事資料與 JSON 來源不一致的目標（不寫入任何檔案）"""
+        result = self.build(write=False)
+        return [path for path, status in result['targets'].items() if status == 'stale']
+
+
+def build_bundle(force: bool = False, build_dir: Optional[str] = None) -> Dict[str, Any]:
+    """以預設來源與目標建置網頁版故事（BundleBuilder().build() 的簡寫）"""
+    builder = BundleBuilder(build_dir=build_dir or BUILD_DIR)
+    return builder.build(force=force)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+終端機場景畫面快取
+將場景的橫幅、標題、描述與編號選項預先組成完整的畫面字串
+
+每個場景的畫面在同一個故事版本、寬度與語系下只組合一次，之後以
+單次寫入輸出，不再逐行呼叫 print()。快取有上限，大型故事包只保留
+最近使用的畫面。結局的分數等每次不同的內容不在快取範圍內。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from collections import OrderedDict
+from typing import Dict, Tuple
+
+from .graph import StoryGraph
+
+DEFAULT_WIDTH = 50
+DEFAULT_LOCALE = 'zh_TW'
+DEFAULT_MAX_FRAMES = 1024
+
+# 同時保留的快取數量（故事版本 × 寬度 × 語系的組合）
+MAX_CACHES = 8
+
+# 各語系的畫面文字；找不到完整語系時依序嘗試語言代碼與預設語系
+FRAME_TEXT: Dict[str, Dict[str, str]] = {
+    'zh_TW': {'choices': '你的選擇：'},
+    'zh': {'choices': '你的選擇：'},
+    'en': {'choices': 'Your choices:'}
+}
+
+
+def frame_text(locale: str) -> Dict[str, str]:
+    """取得語系的畫面文字"""
+    for candidate in (locale, locale.split('_')[0], DEFAULT_LOCALE):
+        if candidate in FRAME_TEXT:
+            return FRAME_TEXT[candidate]
+    return FRAME_TEXT[DEFAULT_LOCALE]
+
+
+class FrameCache:
+    """單一故事圖、寬度與語系的場景畫面快取"""
+
+    def __init__(self, graph: StoryGraph, width: int = DEFAULT_WIDTH,
+                 locale: str = DEFAULT_LOCALE, max_frames: int = DEFAULT_MAX_FRAMES):
+        """
+        初始化畫面快取
+
+        Args:
+            graph: 故事圖
+            width: 橫幅寬度（字元數）
+            locale: 畫面文字的語系
+            max_frames: 保留的畫面數量上限，超過時淘汰最久未使用者
+        """
+        if max_frames <= 0:
+            raise ValueError("max_frames 必須大於 0")
+        self.graph = graph
+        self.width = width
+        self.locale = locale
+        self.max_frames = max_frames
+        self.text = frame_text(locale)
+        self.frames: 'OrderedDict[int, str]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def render(self, scene: int) -> str:
+        """組合場景畫面（不使用快取）"""
+        graph = self.graph
+        banner = '=' * self.width
+        title = graph.titles[scene] or graph.scene_ids[scene].upper()
+        parts = [f"\n{banner}\n🎃 {title} 🎃\n{banner}\n"]
+
+        description = graph.descriptions[scene]
+        if description:
+            parts.append(f"\n{description}\n")
+
+        if graph.has_choices(scene):
+            parts.append(f"\n{self.text['choices']}\n")
+            for number, option in enumerate(graph.choice_options(scene), 1):
+                parts.append(f"{number}. {option}\n")
+        return ''.join(parts)
+
+    def frame(self, scene: int) -> str:
+        """取得場景畫面，並標記為最近使用"""
+        frames = self.frames
+        cached = frames.get(scene)
+        if cached is not None:
+            frames.move_to_end(scene)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        rendered = self.render(scene)
+        frames[scene] = rendered
+        if len(frames) > self.max_frames:
+            frames.popitem(last=False)
+        return rendered
+
+
+_caches: 'OrderedDict[Tuple[int, int, str], FrameCache]' = OrderedDict()
+
+
+def frame_cache(graph: StoryGraph, width: int = DEFAULT_WIDTH, locale: str = DEFAULT_LOCALE,
+                max_frames: int = DEFAULT_MAX_FRAMES) -> FrameCache:
+    """
+    取得行程內共用的畫面快取
+
+    同一個故事圖（故事版本）、寬度與語系共用一個快取，多個終端機
+    工作階段不會重複組合相同的畫面。故事熱抽換後的新故事圖會使用
+    新的快取，舊快取依最久未使用的順序淘汰。
+    """
+    key = (id(graph), width, locale)
+    cache = _caches.get(key)
+    # 快取持有故事圖參照，故事圖仍存在時 id 不會被重複使用
+    if cache is None or cache.graph is not graph:
+        cache = FrameCache(graph, width, locale, max_frames)
+        _caches[key] = cache
+        while len(_caches) > MAX_CACHES:
+            _caches.popitem(last=False)
+    else:
+        _caches.move_to_end(key)
+    return cache
+
+
+def clear_frame_caches():
+    """清除所有畫面快取"""
+    _caches.clear()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成故事產生器
+產生任意大小、結構接近真實故事的故事 JSON，用於壓力測試引擎、驗證器
+與網頁版建置
+
+故事分成多層，起始場景在第 0 層，每一層的寬度依分支數成長到上限後
+維持不變；每個非結局場景的選項大多連到下一層，部分跳過一層，依設定
+的比例連回前面幾層形成循環。每一層的前幾個選項以排列輪流分配到下一層
+的每個場景，保證所有場景都能從起始場景到達；結局越深越多，最後一層
+全部是結局。描述長度為對數常態分布。
+
+場景逐一產生並直接寫入檔案，記憶體只與層數有關，可以產生上百萬個
+場景的故事。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import math
+import random
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+DEFAULT_BRANCHING = 3
+DEFAULT_ENDING_RATIO = 0.1
+DEFAULT_CYCLE_RATIO = 0.02
+DEFAULT_SKIP_RATIO = 0.1
+DEFAULT_TEXT_LENGTH = 120
+DEFAULT_TEXT_SIGMA = 0.6
+# 循環最多連回幾層
+CYCLE_REACH = 3
+# 中間各層結局比例的上限，避免下一層的入口不足
+MAX_LAYER_ENDINGS = 0.5
+
+TEXT_WORDS = (
+    '月光', '南瓜燈', '幽靈', '女巫', '吸血鬼', '狼人', '閣樓', '墓園', '糖果', '斗篷',
+    '蝙蝠', '燭台', '霧氣', '鐘聲', '古堡', '地下室', '魔藥', '詛咒', '面具', '舞會'
+)
+TEXT_PUNCTUATION = ('，', '，', '、', '。', '！', '……')
+
+
+class StoryGenerator:
+    """以固定種子逐一產生合成故事的場景"""
+
+    def __init__(self, scenes: int, branching: int = DEFAULT_BRANCHING, depth: Optional[int] = None,
+                 ending_ratio: float = DEFAULT_ENDING_RATIO, cycle_ratio: float = DEFAULT_CYCLE_RATIO,
+                 skip_ratio: float = DEFAULT_SKIP_RATIO, text_length: int = DEFAULT_TEXT_LENGTH,
+                 text_sigma: float = DEFAULT_TEXT_SIGMA, seed: int = 0):
+        """
+        計算每一層的大小與結局數
+
+        Args:
+            scenes: 場景數
+            branching: 每個非結局場景的選項數
+            depth: 目標層數，未指定時約為場景數立方根的兩倍；分支數不足以在這個
+                層數內放下所有場景時會增加層數
+            ending_ratio: 結局場景的目標比例（最後一層全部是結局，實際比例
+                可能略高）
+            cycle_ratio: 選項連回前面幾層（形成循環）的比例
+            skip_ratio: 選項跳過一層的比例
+            text_length: 描述長度的中位數（字元）
+            text_sigma: 描述長度對數常態分布的 sigma
+            seed: 亂數種子
+
+        Raises:
+            ValueError: 參數超出範圍
+        """
+        if scenes < 2 or branching < 1:
+            raise ValueError("至少需要 2 個場景，且每個場景至少有 1 個選項")
+        if not 0 <= ending_ratio <= 1 or not 0 <= cycle_ratio <= 1 or not 0 <= skip_ratio <= 1:
+            raise ValueError("結局、循環與跳層比例必須介於 0 與 1 之間")
+        self.scene_count = scenes
+        self.branching = branching
+        self.cycle_ratio = cycle_ratio
+        self.skip_ratio = skip_ratio
+        self.text_length = max(1, text_length)
+        self.text_sigma = text_sigma
+        self.seed = seed
+        target_depth = depth or max(8, round(2 * scenes ** (1 / 3)))
+        self.sizes, self.endings = self._plan_layers(scenes, max(2, target_depth), ending_ratio)
+        self._pool = self._text_pool(random.Random(seed))
+        self.starts = [0]
+        for size in self.sizes:
+            self.starts.append(self.starts[-1] + size)
+        self.strides = [self._stride(size) for size in self.sizes]
+
+    def _plan_layers(self, scenes: int, depth: int, ending_ratio: float) -> Tuple[List[int], List[int]]:
+        """
+        決定每一層的場景數與結局數
+
+        每一層最多放得下上一層非結局場景數乘以分支數個場景，剩下的場景
+        平均分到剩下的層；中間各層的結局比例隨深度線性增加，扣除最後一層
+        （約為場景數除以層數）後接近目標比例。
+        """
+        last_layer = scenes / depth
+        middle_ratio = max(0.0, (ending_ratio * scenes - last_layer) / (scenes - last_layer))
+        sizes: List[int] = []
+        endings: List[int] = []
+        remaining = scenes
+        capacity = 1
+        while remaining > 0:
+            layer = len(sizes)
+            layers_left = max(1, depth - layer)
+            size = min(capacity, max(1, math.ceil(remaining / layers_left)))
+            remaining -= size
+            if remaining == 0:
+                ending_count = size
+            else:
+                ratio = min(MAX_LAYER_ENDINGS, middle_ratio * 2 * layer / max(1, depth - 1))
+                # 保留足夠的非結局場景，讓下一層的每個場景都有入口
+                ending_count = min(int(size * ratio), size - 1)
+            sizes.append(size)
+            endings.append(ending_count)
+            capacity = (size - ending_count) * self.branching
+        return sizes, endings
+
+    def scene_id(self, index: int) -> str:
+        """場景 ID，第一個場景為 start"""
+        return 'start' if index == 0 else f"scene_{index}"
+
+    def _random_scene(self, rng: random.Random, layer: int) -> int:
+        return self.starts[layer] + rng.randrange(self.sizes[layer])
+
+    def _choices(self, rng: random.Random, layer: int, position: int) -> List[int]:
+        """產生非結局場景的選項目標（場景索引）"""
+        targets = []
+        next_size = self.sizes[layer + 1]
+        last_layer = len(self.sizes) - 1
+        for k in range(self.branching):
+            slot = position * self.branching + k
+            roll = rng.random()
+            if slot < next_size:
+                # 輪流分配到下一層的每個場景（以與層寬互質的步長打散），保證可達
+                targets.append(self.starts[layer + 1] + (slot * self.strides[layer + 1]) % next_size)
+            elif roll < self.cycle_ratio:
+                targets.append(self._random_scene(rng, rng.randint(max(0, layer - CYCLE_REACH), layer)))
+            elif roll < self.cycle_ratio + self.skip_ratio and layer + 2 <= last_layer:
+                targets.append(self._random_scene(rng, layer + 2))
+            else:
+                targets.append(self._random_scene(rng, layer + 1))
+        return targets
+
+    @staticmethod
+    def _stride(size: int) -> int:
+        """取得與層寬互質、約為黃金比例的步長"""
+        step = max(1, int(size * 0.618)) | 1
+        while math.gcd(step, size) != 1:
+            step += 2
+        return step
+
+    def _text_pool(self, rng: random.Random) -> str:
+        """預先產生一段隨機文字，描述從中擷取片段，不必逐字產生"""
+        words = []
+        total = 0
+        while total < self.text_length * 40:
+            word = rng.choice(TEXT_WORDS) + rng.choice(TEXT_PUNCTUATION)
+            words.append(word)
+            total += len(word)
+        return ''.join(words)
+
+    def _text(self, rng: random.Random, length: int) -> str:
+        pool = self._pool
+        start = rng.randrange(len(pool))
+        text = pool[start:start + length]
+        while len(text) < length:
+            text += pool[:length - len(text)]
+        return text
+
+    def scenes(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        依序產生 (場景 ID, 場景資料)
+
+        同樣的參數與種子一定產生同樣的故事。
+        """
+        rng = random.Random(self.seed)
+        median = math.log(self.text_length)
+        for layer, size in enumerate(self.sizes):
+            first_ending = size - self.endings[layer]
+            for position in range(size):
+                index = self.starts[layer] + position
+                length = min(self.text_length * 20, max(10, int(rng.lognormvariate(median, self.text_sigma))))
+                title = rng.choice(TEXT_WORDS) + rng.choice(TEXT_WORDS)
+                scene: Dict[str, Any] = {'title': f"{title} {index}", 'description': self._text(rng, length)}
+                if position >= first_ending:
+                    scene['outcome'] = self._text(rng, max(10, length // 3))
+                    scene['is_ending'] = True
+                    scene['score'] = rng.randint(30, 140)
+                else:
+                    scene['choices'] = [
+                        {'option': f"前往{rng.choice(TEXT_WORDS)}", 'next_scene': self.scene_id(target)}
+                        for target in self._choices(rng, layer, position)
+                    ]
+                yield self.scene_id(index), scene
+
+    def write(self, f: IO[str]) -> Dict[str, Any]:
+        """
+        將故事以 JSON 物件寫入文字檔，每個場景一行
+
+        Returns:
+            產生的場景數、結局數、選項數、層數與寫入的字元數
+        """
+        encode = json.JSONEncoder(ensure_ascii=False).encode
+        written = f.write('{\n')
+        endings = 0
+        choices = 0
+        separator = ''
+        for scene_id, scene in self.scenes():
+            line = f"{separator}{encode(scene_id)}: {encode(scene)}"
+            written += f.write(line)
+            separator = ',\n'
+            endings += 'is_ending' in scene
+            choices += len(scene.get('choices', ()))
+        written += f.write('\n}\n')
+        return {
+            'scenes': self.scene_count,
+            'endings': endings,
+            'choices': choices,
+            'layers': len(self.sizes),
+            'characters': written
+        }
+
+
+def generate_story(path: str, scenes: int, **options) -> Dict[str, Any]:
+    """
+    產生合成故事並寫入檔案
+
+    Args:
+        path: 輸出的 JSON 路徑
+        scenes: 場景數
+        **options: StoryGenerator 的其他參數
+
+    Returns:
+        StoryGenerator.write() 的統計結果
+    """
+    generator = StoryGenerator(scenes, **options)
+    with open(path, 'w', encoding='utf-8') as f:
+        return generator.write(f)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事圖編譯器
+將巢狀字典格式的故事資料編譯成以整數索引為基礎的緊湊結構
+
+場景 ID 會被轉換成 0..N-1 的整數索引，選項以扁平陣列儲存
+（choice_offsets[i]..choice_offsets[i+1] 即為場景 i 的選項），
+結局旗標與分數則存放在打包陣列中。每回合的場景轉移只需要
+兩次陣列索引，不必再做字串雜湊或字典查詢。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from array import array
+from typing import Any, Dict, List, Tuple
+
+# 斷裂連結（指向不存在場景的選項）的目標索引
+NO_SCENE = -1
+
+
+class StoryFormatError(ValueError):
+    """故事資料格式錯誤"""
+
+
+class StoryGraph:
+    """編譯後的故事圖"""
+
+    __slots__ = (
+        'scene_ids', 'index', 'start',
+        'choice_offsets', 'choice_targets', 'choice_labels',
+        'ending_flags', 'scores',
+        'titles', 'descriptions', 'outcomes',
+        'broken_links'
+    )
+
+    def __init__(self):
+        self.scene_ids: Tuple[str, ...] = ()
+        self.index: Dict[str, int] = {}
+        self.start = 0
+        self.choice_offsets = array('i', [0])
+        self.choice_targets = array('i')
+        self.choice_labels: Tuple[str, ...] = ()
+        self.ending_flags = bytearray()
+        self.scores = array('i')
+        self.titles: Tuple[str, ...] = ()
+        self.descriptions: Tuple[str, ...] = ()
+        self.outcomes: Tuple[str, ...] = ()
+        self.broken_links: Tuple[Tuple[str, int, str], ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.scene_ids)
+
+    def __contains__(self, scene_id: str) -> bool:
+        return scene_id in self.index
+
+    def index_of(self, scene_id: str) -> int:
+        """
+        取得場景 ID 對應的索引
+
+        Args:
+            scene_id: 場景 ID
+
+        Returns:
+            場景索引，找不到時回傳 NO_SCENE
+        """
+        return self.index.get(scene_id, NO_SCENE)
+
+    def choice_count(self, scene: int) -> int:
+        """取得場景的選項數量"""
+        return self.choice_offsets[scene + 1] - self.choice_offsets[scene]
+
+    def next_scene(self, scene: int, choice: int) -> int:
+        """
+        計算選擇後的下一個場景
+
+        Args:
+            scene: 目前場景索引
+            choice: 選項索引（從 0 開始）
+
+        Returns:
+            下一個場景索引；選項超出範圍時回傳 NO_SCENE
+        """
+        offset = self.choice_offsets[scene]
+        if 0 <= choice < self.choice_offsets[scene + 1] - offset:
+            return self.choice_targets[offset + choice]
+        return NO_SCENE
+
+    def successors(self, scene: int) -> array:
+        """取得場景所有選項的目標索引"""
+        return self.choice_targets[self.choice_offsets[scene]:self.choice_offsets[scene + 1]]
+
+    def choice_options(self, scene: int) -> Tuple[str, ...]:
+        """取得場景所有選項的文字"""
+        return self.choice_labels[self.choice_offsets[scene]:self.choice_offsets[scene + 1]]
+
+    def is_ending(self, scene: int) -> bool:
+        """判斷場景是否為結局"""
+        return bool(self.ending_flags[scene])
+
+    def has_choices(self, scene: int) -> bool:
+        """判斷場景是否有選項"""
+        return self.choice_offsets[scene + 1] > self.choice_offsets[scene]
+
+    def ending_indices(self) -> List[int]:
+        """取得所有結局場景的索引"""
+        return [i for i, flag in enumerate(self.ending_flags) if flag]
+
+
+def compile_story(
+    story_data: Dict[str, Dict[str, Any]],
+    start: str = 'start',
+    strict: bool = True
+) -> StoryGraph:
+    """
+    將故事字典編譯成故事圖
+
+    Args:
+        story_data: 以場景 ID 為鍵的故事資料（stories/*.json 的格式）
+        start: 起始場景 ID
+        strict: 為 True 時遇到斷裂連結會拋出 StoryFormatError，
+            否則將其目標記為 NO_SCENE 並記錄在 broken_links
+
+    Returns:
+        編譯後的 StoryGraph
+
+    Raises:
+        StoryFormatError: 故事資料格式錯誤
+    """
+    if not isinstance(story_data, dict) or not story_data:
+        raise StoryFormatError("故事資料應該是非空的字典")
+
+    scene_ids = tuple(story_data.keys())
+    index = {scene_id: i for i, scene_id in enumerate(scene_ids)}
+
+    choice_offsets = array('i', [0])
+    choice_targets = array('i')
+    choice_labels: List[str] = []
+    ending_flags = bytearray(len(scene_ids))
+    scores = array('i', bytes(4 * len(scene_ids)))
+    titles: List[str] = []
+    descriptions: List[str] = []
+    outcomes: List[str] = []
+    broken_links: List[Tuple[str, int, str]] = []
+
+    for i, scene_id in enumerate(scene_ids):
+        scene = story_data[scene_id]
+        if not isinstance(scene, dict):
+            raise StoryFormatError(f"場景 {scene_id} 應該是字典格式")
+
+        for choice_index, choice in enumerate(scene.get('choices', ())):
+            try:
+                option = choice['option']
+                target = choice['next_scene']
+            except (KeyError, TypeError):
+                raise StoryFormatError(f"場景 {scene_id} 的選擇 {choice_index} 格式錯誤")
+
+            target_index = index.get(target, NO_SCENE)
+            if target_index == NO_SCENE:
+                if strict:
+                    raise StoryFormatError(f"場景 {scene_id} 連接到不存在的場景: {target}")
+                broken_links.append((scene_id, choice_index, target))
+
+            choice_targets.append(target_index)
+            choice_labels.append(option)
+        choice_offsets.append(len(choice_targets))
+
+        if scene.get('is_ending', False):
+            ending_flags[i] = 1
+        score = scene.get('score', 0)
+        if not isinstance(score, int):
+            raise StoryFormatError(f"場景 {scene_id} 的 score 應該是整數")
+        scores[i] = score
+
+        titles.append(scene.get('title', ''))
+        descriptions.append(scene.get('description', ''))
+        outcomes.append(scene.get('outcome', ''))
+
+    start_index = index.get(start, NO_SCENE)
+    if start_index == NO_SCENE:
+        if strict:
+            raise StoryFormatError(f"缺少起始場景: {start}")
+        start_index = 0
+
+    graph = StoryGraph()
+    graph.scene_ids = scene_ids
+    graph.index = index
+    graph.start = start_index
+    graph.choice_offsets = choice_offsets
+    graph.choice_targets = choice_targets
+    graph.choice_labels = tuple(choice_labels)
+    graph.ending_flags = ending_flags
+    graph.scores = scores
+    graph.titles = tuple(titles)
+    graph.descriptions = tuple(descriptions)
+    graph.outcomes = tuple(outcomes)
+    graph.broken_links = tuple(broken_links)
+    return graph
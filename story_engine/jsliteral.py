@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JavaScript 物件常值解析器
+從 HTML/JS 原始碼中擷取像 `const storyData = {...};` 這樣的資料常值
+
+解析器只掃描一次原始碼（線性時間），以明確的堆疊取代遞迴，支援：
+- 單引號、雙引號字串，以及不含 `${}` 的樣板字串
+- `//` 與 `/* */` 註解
+- 未加引號的識別字鍵、數字鍵
+- 陣列與物件的尾隨逗號
+- true、false、null、undefined（視為 None）
+
+解析在變數的常值結束處停止，不會讀取檔案其餘部分。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import re
+from typing import Any, List, Optional, Tuple
+
+# 所有詞法單元的主規則；依序嘗試，第一個成功的群組即為詞法單元種類
+_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<line_comment>//[^\n]*)
+  | (?P<block_comment>/\*.*?\*/)
+  | (?P<string>"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`)
+  | (?P<number>-?(?:0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))
+  | (?P<name>[A-Za-z_$][\w$]*)
+  | (?P<punct>[{}\[\]:,])
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPE = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|[\s\S])')
+
+_SIMPLE_ESCAPES = {
+    'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0',
+    '\n': '', '\r\n': '', '\u2028': '', '\u2029': ''
+}
+
+_KEYWORDS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+class JSLiteralError(ValueError):
+    """JavaScript 常值格式錯誤"""
+
+    def __init__(self, message: str, source: str, position: int):
+        line = source.count('\n', 0, position) + 1
+        column = position - source.rfind('\n', 0, position)
+        super().__init__(f"{message}（第 {line} 行，第 {column} 欄）")
+        self.position = position
+        self.line = line
+        self.column = column
+
+
+def _unescape_match(match, source: str, position: int) -> str:
+    """轉換單一跳脫序列（position 為字串內容在原始碼中的起點）"""
+    escape = match.group(1)
+    if escape[0] in 'ux' and len(escape) > 1:
+        digits = escape[2:-1] if escape.startswith('u{') else escape[1:]
+        code = int(digits, 16)
+        if code > 0x10FFFF:
+            raise JSLiteralError(f"Unicode 跳脫序列超出範圍: \\{escape}", source, position + match.start())
+        # 合併 UTF-16 代理對會在 _decode_string 中處理
+        return chr(code)
+    return _SIMPLE_ESCAPES.get(escape, escape)
+
+
+def _decode_string(token: str, source: str, position: int) -> str:
+    """將字串詞法單元（位於原始碼的 position）轉成 Python 字串"""
+    body = token[1:-1]
+    if '\\' not in body:
+        return body
+    text = _ESCAPE.sub(lambda match: _unescape_match(match, source, position + 1), body)
+    # 將 \uD83C\uDF83 這類 UTF-16 代理對合併成單一字元
+    return text.encode('utf-16', 'surrogatepass').decode('utf-16', 'surrogatepass')
+
+
+def _decode_number(token: str) -> Any:
+    """將數字詞法單元轉成 int 或 float"""
+    if token.lstrip('-')[:2] in ('0x', '0X'):
+        return int(token, 16)
+    if '.' in token or 'e' in token or 'E' in token:
+        return float(token)
+    return int(token)
+
+
+def parse_literal(source: str, position: int = 0) -> Tuple[Any, int]:
+    """
+    從指定位置解析一個 JavaScript 常值
+
+    Args:
+        source: 原始碼
+        position: 常值開始的位置（允許前置空白與註解）
+
+    Returns:
+        (解析結果, 常值結束後的位置)
+
+    Raises:
+        JSLiteralError: 常值格式錯誤
+    """
+    # 堆疊中的每一項是 [容器, 待填入的鍵]；陣列的鍵固定為 None
+    stack: List[list] = []
+    # 目前期待的詞法單元：value、key、colon、separator
+    expect = 'value'
+    result: Any = None
+    length = len(source)
+
+    while True:
+        match = _TOKEN.match(source, position)
+        if match is None:
+            if position >= length:
+                raise JSLiteralError("常值未結束", source, position)
+            raise JSLiteralError(f"無法辨識的字元 {source[position]!r}", source, position)
+
+        kind = match.lastgroup
+        token = match.group()
+        start = position
+        position = match.end()
+        if kind in ('space', 'line_comment', 'block_comment'):
+            continue
+
+        if expect == 'key':
+            if token == '}':
+                # 空物件或尾隨逗號
+                value = stack.pop()[0]
+            elif kind == 'string':
+                if token[0] == '`' and '${' in token:
+                    raise JSLiteralError("不支援含有 ${} 的樣板字串", source, start)
+                stack[-1][1] = _decode_string(token, source, start)
+                expect = 'colon'
+                continue
+            elif kind in ('name', 'number'):
+                stack[-1][1] = token
+                expect = 'colon'
+                continue
+            else:
+                raise JSLiteralError(f"預期物件鍵，卻遇到 {token!r}", source, start)
+
+        elif expect == 'colon':
+            if token != ':':
+                raise JSLiteralError(f"預期 ':'，卻遇到 {token!r}", source, start)
+            expect = 'value'
+            continue
+
+        elif expect == 'separator':
+            container, key = stack[-1]
+            closing = '}' if isinstance(container, dict) else ']'
+            if token == ',':
+                expect = 'key' if closing == '}' else 'value'
+                continue
+            if token != closing:
+                raise JSLiteralError(f"預期 ',' 或 '{closing}'，卻遇到 {token!r}", source, start)
+            value = stack.pop()[0]
+
+        else:  # expect == 'value'
+            if token == '{':
+                stack.append([{}, None])
+                expect = 'key'
+                continue
+            if token == '[':
+                stack.append([[], None])
+                continue
+            if token == ']' and stack and isinstance(stack[-1][0], list):
+                # 空陣列或尾隨逗號
+                value = stack.pop()[0]
+            elif kind == 'string':
+                if token[0] == '`' and '${' in token:
+                    raise JSLiteralError("不支援含有 ${} 的樣板字串", source, start)
+                value = _decode_string(token, source, start)
+            elif kind == 'number':
+                value = _decode_number(token)
+            elif kind == 'name' and token in _KEYWORDS:
+                value = _KEYWORDS[token]
+            else:
+                raise JSLiteralError(f"預期值，卻遇到 {token!r}", source, start)
+
+        # 完成一個值：放進上層容器，或結束解析
+        if not stack:
+            result = value
+            break
+        container, key = stack[-1]
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+        expect = 'separator'
+
+    return result, position
+
+
+def _find_declaration(source: str, name: str):
+    """找出變數宣告，回傳的比對結果結束於等號後"""
+    return re.search(r'\b(?:const|let|var)\s+' + re.escape(name) + r'\s*=\s*', source)
+
+
+def extract_variable(source: str, name: str) -> Any:
+    """
+    擷取以 const/let/var 宣告的變數常值
+
+    Args:
+        source: HTML 或 JavaScript 原始碼
+        name: 變數名稱，例如 storyData
+
+    Returns:
+        解析後的常值
+
+    Raises:
+        KeyError: 找不到變數宣告
+        JSLiteralError: 常值格式錯誤
+    """
+    match = _find_declaration(source, name)
+    if match is None:
+        raise KeyError(name)
+    return parse_literal(source, match.end())[0]
+
+
+def find_variable_span(source: str, name: str) -> Optional[Tuple[int, int]]:
+    """
+    找出變數常值在原始碼中的位置
+
+    Returns:
+        (常值開始位置, 常值結束位置)，找不到時回傳 None
+    """
+    match = _find_declaration(source, name)
+    if match is None:
+        return None
+    return match.end(), parse_literal(source, match.end())[1]
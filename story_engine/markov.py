@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+吸收馬可夫鏈分析
+把故事圖當成馬可夫鏈，結局場景是吸收狀態，精確計算從起始場景出發
+到達每個結局的機率，以及到達結局前的期望步數
+
+每個選項的機率預設相同，也可以指定與 graph.choice_targets 對齊的權重
+（與 story_engine.simulate 相同）。沒有選項的非結局場景（死路）與斷裂
+連結同樣會結束遊戲，另外列出；沒有出口的循環（封閉類別）中的遊玩
+永遠不會結束，其機率列為 trapped。
+
+基本矩陣 (I - Q)⁻¹ 不會被建出來。轉移矩陣依強連通元件排成區塊三角
+形式（Tarjan 演算法），依拓撲順序逐一求解每個區塊：沒有循環的場景
+直接代入，循環所在的區塊以稀疏高斯消去法求解。時間與場景數加選項數
+成正比，只有循環區塊會額外花費與其大小相關的成本，可以處理十萬個
+場景的故事。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .analysis import strongly_connected
+from .graph import StoryGraph, NO_SCENE
+
+# 超過這個大小的循環區塊改用迭代法求解
+DIRECT_LIMIT = 256
+TOLERANCE = 1e-13
+MAX_SWEEPS = 100000
+
+
+def _solve_sparse(rows: List[Dict[int, float]], rhs: List[float]) -> List[float]:
+    """
+    以不換主元的稀疏高斯消去法解 A x = b
+
+    A 是 I - Q 或其轉置（Q 為子隨機矩陣且每個狀態都能離開區塊），
+    屬於非奇異 M 矩陣，不換主元的消去法是穩定的。
+
+    Args:
+        rows: A 的每一列，以欄索引對應數值（會被修改）
+        rhs: b（會被修改）
+    """
+    size = len(rows)
+    # 每一欄有非零值的列
+    columns: List[set] = [set() for _ in range(size)]
+    for i, row in enumerate(rows):
+        for j in row:
+            columns[j].add(i)
+
+    for pivot in range(size):
+        pivot_row = rows[pivot]
+        pivot_value = pivot_row[pivot]
+        for i in columns[pivot]:
+            if i <= pivot:
+                continue
+            row = rows[i]
+            factor = row.pop(pivot) / pivot_value
+            for j, value in pivot_row.items():
+                if j == pivot:
+                    continue
+                if j in row:
+                    row[j] -= factor * value
+                else:
+                    row[j] = -factor * value
+                    columns[j].add(i)
+            rhs[i] -= factor * rhs[pivot]
+
+    solution = [0.0] * size
+    for pivot in range(size - 1, -1, -1):
+        row = rows[pivot]
+        total = rhs[pivot]
+        for j, value in row.items():
+            if j > pivot:
+                total -= value * solution[j]
+        solution[pivot] = total / row[pivot]
+    return solution
+
+
+def _solve_iterative(rows: List[Dict[int, float]], rhs: List[float]) -> List[float]:
+    """
+    以 Gauss-Seidel 迭代解 A x = b
+
+    大型循環區塊以消去法求解時填入的非零值過多，改用迭代法；A 是
+    非奇異 M 矩陣，迭代一定收斂。
+
+    Args:
+        rows: A 的每一列，以欄索引對應數值
+        rhs: b
+
+    Raises:
+        ArithmeticError: 超過迭代次數上限仍未收斂
+    """
+    diagonal = [row[i] for i, row in enumerate(rows)]
+    others = [[(j, value) for j, value in row.items() if j != i] for i, row in enumerate(rows)]
+    solution = [value / diagonal[i] for i, value in enumerate(rhs)]
+    for _ in range(MAX_SWEEPS):
+        change = 0.0
+        largest = 0.0
+        for i, row in enumerate(others):
+            total = rhs[i]
+            for j, value in row:
+                total -= value * solution[j]
+            total /= diagonal[i]
+            delta = abs(total - solution[i])
+            if delta > change:
+                change = delta
+            if total > largest:
+                largest = total
+            solution[i] = total
+        if change <= TOLERANCE * max(largest, 1.0):
+            return solution
+    raise ArithmeticError("循環區塊的迭代沒有收斂")
+
+
+def _solve(rows: List[Dict[int, float]], rhs: List[float]) -> List[float]:
+    """依區塊大小選擇消去法或迭代法"""
+    if len(rows) <= DIRECT_LIMIT:
+        return _solve_sparse(rows, rhs)
+    return _solve_iterative(rows, rhs)
+
+
+class AbsorbingChain:
+    """以結局為吸收狀態的故事馬可夫鏈"""
+
+    def __init__(self, graph: StoryGraph, weights: Optional[Sequence[float]] = None):
+        """
+        建立轉移機率
+
+        Args:
+            graph: 故事圖
+            weights: 與 graph.choice_targets 對齊的選項權重，未指定時均等；
+                權重全為 0 的場景視為均等
+
+        Raises:
+            ValueError: 權重長度不符或為負數
+        """
+        self.graph = graph
+        offsets = graph.choice_offsets
+        targets = graph.choice_targets
+        if weights is not None and (len(weights) != len(targets) or any(weight < 0 for weight in weights)):
+            raise ValueError("選項權重必須是與選項數相同長度的非負數列")
+
+        scene_count = len(graph)
+        # 每個非終止場景的 {目標: 機率}，以及走到斷裂連結的機率
+        self.transitions: List[Dict[int, float]] = [{} for _ in range(scene_count)]
+        self.broken = [0.0] * scene_count
+        self.terminal = bytearray(scene_count)
+        for scene in range(scene_count):
+            first, last = offsets[scene], offsets[scene + 1]
+            if graph.ending_flags[scene] or first == last:
+                self.terminal[scene] = 1
+                continue
+            slot_weights = [1.0] * (last - first) if weights is None else [float(w) for w in weights[first:last]]
+            total = sum(slot_weights)
+            if total == 0:
+                slot_weights = [1.0] * (last - first)
+                total = float(last - first)
+            moves = self.transitions[scene]
+            for slot, weight in zip(range(first, last), slot_weights):
+                if not weight:
+                    continue
+                target = targets[slot]
+                if target == NO_SCENE:
+                    self.broken[scene] += weight / total
+                else:
+                    moves[target] = moves.get(target, 0.0) + weight / total
+
+        # 只沿著機率大於 0 的轉移計算強連通元件
+        self.components, self.component_of = strongly_connected(
+            scene_count, lambda scene: list(self.transitions[scene])
+        )
+        self.closed = self._closed_components()
+
+    def _closed_components(self) -> bytearray:
+        """標記沒有出口的循環區塊（進入後永遠不會結束）"""
+        closed = bytearray(len(self.components))
+        component_of = self.component_of
+        for component_id, component in enumerate(self.components):
+            if self.terminal[component[0]]:
+                continue
+            leaks = False
+            for scene in component:
+                if self.broken[scene] or any(component_of[target] != component_id
+                                             for target in self.transitions[scene]):
+                    leaks = True
+                    break
+            closed[component_id] = not leaks
+        return closed
+
+    def _block_rows(self, component: List[int], local: Dict[int, int], transpose: bool) -> List[Dict[int, float]]:
+        """建立區塊內 I - Q（或其轉置）的稀疏列"""
+        rows: List[Dict[int, float]] = [{i: 1.0} for i in range(len(component))]
+        for scene in component:
+            i = local[scene]
+            for target, probability in self.transitions[scene].items():
+                j = local.get(target)
+                if j is None:
+                    continue
+                row, column = (j, i) if transpose else (i, j)
+                rows[row][column] = rows[row].get(column, 0.0) - probability
+        return rows
+
+    def expected_visits(self, start: Optional[int] = None) -> Tuple[List[float], float]:
+        """
+        計算從起始場景出發，每個場景的期望到訪次數
+
+        依拓撲順序求解 x (I - Q) = e_start。終止場景的數值就是在該處
+        結束的機率；封閉類別中的場景記為 0。
+
+        Returns:
+            (每個場景的期望到訪次數, 進入封閉類別的機率)
+        """
+        visits, trapped = self._propagate(start)
+        return visits, sum(trapped.values())
+
+    def _propagate(self, start: Optional[int] = None) -> Tuple[List[float], Dict[int, float]]:
+        """expected_visits 的實作，另外回傳 {封閉類別: 進入的機率}（只包含會進入的類別）"""
+        if start is None:
+            start = self.graph.start
+        visits = [0.0] * len(self.graph)
+        visits[start] = 1.0
+        trapped: Dict[int, float] = {}
+
+        # Tarjan 的輸出是反向拓撲順序，倒過來處理即為拓撲順序
+        for component_id in range(len(self.components) - 1, -1, -1):
+            component = self.components[component_id]
+            if not any(visits[scene] for scene in component):
+                continue
+            if self.closed[component_id]:
+                trapped[component_id] = sum(visits[scene] for scene in component)
+                for scene in component:
+                    visits[scene] = 0.0
+                continue
+
+            if len(component) > 1 or component[0] in self.transitions[component[0]]:
+                # 場景索引通常接近故事順序，依序排列可以減少填入與迭代次數
+                members = sorted(component)
+                local = {scene: i for i, scene in enumerate(members)}
+                solution = _solve(self._block_rows(members, local, transpose=True),
+                                  [visits[scene] for scene in members])
+                for scene, value in zip(members, solution):
+                    visits[scene] = value
+
+            for scene in component:
+                amount = visits[scene]
+                for target, probability in self.transitions[scene].items():
+                    if self.component_of[target] != component_id:
+                        visits[target] += amount * probability
+        return visits, trapped
+
+    def steps_to_ending(self) -> List[Optional[float]]:
+        """
+        計算每個場景到遊戲結束的期望步數
+
+        依反向拓撲順序求解 (I - Q) t = 1。可能進入封閉類別的場景
+        期望步數沒有上限，回傳 None。
+        """
+        steps: List[Optional[float]] = [0.0] * len(self.graph)
+        for component_id, component in enumerate(self.components):
+            if self.terminal[component[0]]:
+                continue
+            if self.closed[component_id]:
+                for scene in component:
+                    steps[scene] = None
+                continue
+
+            # 區塊外的後續場景已經計算過
+            rhs = []
+            infinite = False
+            for scene in component:
+                total = 1.0
+                for target, probability in self.transitions[scene].items():
+                    if self.component_of[target] == component_id:
+                        continue
+                    if steps[target] is None:
+                        infinite = True
+                        break
+                    total += probability * steps[target]
+                rhs.append(total)
+            if infinite:
+                for scene in component:
+                    steps[scene] = None
+                continue
+
+            if len(component) == 1 and component[0] not in self.transitions[component[0]]:
+                steps[component[0]] = rhs[0]
+                continue
+            # 反向求解時由故事後段往前排列
+            order = sorted(range(len(component)), key=lambda i: -component[i])
+            members = [component[i] for i in order]
+            local = {scene: i for i, scene in enumerate(members)}
+            solution = _solve(self._block_rows(members, local, transpose=False), [rhs[i] for i in order])
+            for scene, value in zip(members, solution):
+                steps[scene] = value
+        return steps
+
+    def analyze(self) -> Dict[str, Any]:
+        """
+        執行完整分析
+
+        Returns:
+            包含各結局機率、死路與斷裂連結機率、封閉循環機率與期望步數的字典，
+            場景以 ID 表示
+        """
+        graph = self.graph
+        scene_ids = graph.scene_ids
+        visits, trapped_components = self._propagate()
+        steps = self.steps_to_ending()
+
+        endings = []
+        unreached = []
+        dead_ends: Dict[str, float] = {}
+        broken = 0.0
+        for scene in range(len(graph)):
+            if self.terminal[scene]:
+                if graph.ending_flags[scene]:
+                    if visits[scene] > 0:
+                        endings.append({'id': scene_ids[scene], 'probability': visits[scene],
+                                        'score': graph.scores[scene]})
+                    else:
+                        unreached.append(scene_ids[scene])
+                elif visits[scene] > 0:
+                    dead_ends[scene_ids[scene]] = visits[scene]
+            elif self.broken[scene]:
+                broken += visits[scene] * self.broken[scene]
+        endings.sort(key=lambda ending: -ending['probability'])
+        ending_probability = sum(ending['probability'] for ending in endings)
+
+        # 只列出從起始場景會進入的封閉類別，與 trapped 的機率一致
+        trapped_scenes = [
+            scene_ids[scene]
+            for component_id in sorted(trapped_components) for scene in self.components[component_id]
+        ]
+        return {
+            'endings': endings,
+            'unreached_endings': unreached,
+            'dead_ends': dead_ends,
+            'broken_links': broken,
+            'trapped': sum(trapped_components.values()),
+            'trapped_scenes': trapped_scenes,
+            'expected_steps': steps[graph.start],
+            'expected_score': (
+                sum(ending['probability'] * ending['score'] for ending in endings) / ending_probability
+                if ending_probability else 0.0
+            ),
+            'steps_to_ending': {
+                scene_ids[scene]: steps[scene]
+                for scene in range(len(graph)) if not self.terminal[scene] and visits[scene] > 0
+            }
+        }
+
+
+def absorption_analysis(graph: StoryGraph, weights: Optional[Sequence[float]] = None) -> Dict[str, Any]:
+    """分析結局機率（AbsorbingChain(graph, weights).analyze() 的簡寫）"""
+    return AbsorbingChain(graph, weights).analyze()
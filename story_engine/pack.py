@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事包格式
+為大型社群故事設計的延遲載入格式：場景在第一次被存取時才解析，
+並保存在有上限的 LRU 快取中
+
+檔案配置：
+
+    第一行      索引 JSON：格式版本、起始場景、場景 ID 與位元組位置，
+                以及不含文字的故事圖結構（選項偏移、選項目標、結局、分數）
+    其餘內容    每個場景一段 UTF-8 JSON，位置相對於索引之後
+
+開啟故事包時只解析索引，場景標題、描述與選項文字在存取時才從
+檔案中切出並解析，記憶體與啟動時間隨造訪過的場景數成長，
+而不是隨故事的場景總數成長。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import mmap
+import os
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Any, Dict, Sequence, Union
+
+from .graph import StoryGraph, StoryFormatError, compile_story
+
+PACK_FORMAT = 'tsext-pack'
+PACK_VERSION = 1
+PACK_SUFFIX = '.tspack'
+
+# 預設保留在記憶體中的已解析場景數量
+DEFAULT_CACHE_SIZE = 256
+
+
+def write_pack(story_data: Dict[str, Dict[str, Any]], path: str, start: str = 'start') -> int:
+    """
+    將故事資料寫成故事包
+
+    寫入前會先編譯故事，確保所有連結都有效。
+
+    Args:
+        story_data: 以場景 ID 為鍵的故事資料
+        path: 輸出檔案路徑
+        start: 起始場景 ID
+
+    Returns:
+        寫入的位元組數
+
+    Raises:
+        StoryFormatError: 故事資料格式錯誤
+    """
+    graph = compile_story(story_data, start=start)
+
+    body = bytearray()
+    positions = []
+    for scene_id in graph.scene_ids:
+        encoded = json.dumps(story_data[scene_id], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        positions.append([len(body), len(encoded)])
+        body.extend(encoded)
+
+    header = {
+        'format': PACK_FORMAT,
+        'version': PACK_VERSION,
+        'start': graph.start,
+        'scene_ids': list(graph.scene_ids),
+        'positions': positions,
+        'choice_offsets': list(graph.choice_offsets),
+        'choice_targets': list(graph.choice_targets),
+        'endings': graph.ending_indices(),
+        'scores': {str(i): score for i, score in enumerate(graph.scores) if score}
+    }
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        f.write(b'\n')
+        f.write(body)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+class StoryPack:
+    """已開啟的故事包，負責按需解析場景並以 LRU 快取保存"""
+
+    def __init__(self, path: str, cache_size: int = DEFAULT_CACHE_SIZE):
+        """
+        開啟故事包
+
+        Args:
+            path: 故事包路徑
+            cache_size: 保留在記憶體中的已解析場景數量上限
+
+        Raises:
+            FileNotFoundError: 找不到檔案
+            StoryFormatError: 檔案格式或版本不符
+        """
+        if cache_size <= 0:
+            raise ValueError("cache_size 必須大於 0")
+        self.path = path
+        self.cache_size = cache_size
+        self.cache: 'OrderedDict[int, Dict[str, Any]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        with open(path, 'rb') as f:
+            try:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise StoryFormatError(f"故事包是空的: {path}")
+
+        header_end = self._data.find(b'\n')
+        if header_end < 0:
+            raise StoryFormatError(f"故事包缺少索引: {path}")
+        try:
+            header = json.loads(self._data[:header_end])
+        except ValueError:
+            raise StoryFormatError(f"故事包索引格式錯誤: {path}")
+        if not isinstance(header, dict) or header.get('format') != PACK_FORMAT:
+            raise StoryFormatError(f"不是故事包檔案: {path}")
+        if header.get('version') != PACK_VERSION:
+            raise StoryFormatError(f"不支援的故事包版本 {header.get('version')}（需要 {PACK_VERSION}）")
+
+        # 索引只在開啟時解析一次，轉成緊湊陣列後即丟棄
+        try:
+            self.start = header['start']
+            self.scene_ids = tuple(header['scene_ids'])
+            self.choice_offsets = array('i', header['choice_offsets'])
+            self.choice_targets = array('i', header['choice_targets'])
+            self.endings = header['endings']
+            self.scores = {int(scene): score for scene, score in header['scores'].items()}
+            self._positions = array('Q', (value for pair in header['positions'] for value in pair))
+        except (KeyError, TypeError, ValueError, OverflowError):
+            raise StoryFormatError(f"故事包索引格式錯誤: {path}")
+        self._body = header_end + 1
+
+    def __len__(self) -> int:
+        return len(self._positions) // 2
+
+    def scene(self, index: int) -> Dict[str, Any]:
+        """
+        取得已解析的場景資料
+
+        Args:
+            index: 場景索引
+
+        Returns:
+            場景字典（由快取共用，請視為唯讀）
+        """
+        scene = self.cache.get(index)
+        if scene is not None:
+            self.hits += 1
+            self.cache.move_to_end(index)
+            return scene
+
+        self.misses += 1
+        offset = self._body + self._positions[2 * index]
+        scene = json.loads(self._data[offset:offset + self._positions[2 * index + 1]])
+        self.cache[index] = scene
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return scene
+
+
+class _SceneField(Sequence):
+    """按場景索引取出某個文字欄位的唯讀序列"""
+
+    __slots__ = ('_pack', '_field')
+
+    def __init__(self, pack: StoryPack, field: str):
+        self._pack = pack
+        self._field = field
+
+    def __len__(self) -> int:
+        return len(self._pack)
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return tuple(self[j] for j in range(*i.indices(len(self))))
+        return self._pack.scene(i).get(self._field, '')
+
+
+class _ChoiceLabels(Sequence):
+    """以扁平選項索引取出選項文字的唯讀序列"""
+
+    __slots__ = ('_pack', '_offsets')
+
+    def __init__(self, pack: StoryPack, offsets: Sequence[int]):
+        self._pack = pack
+        self._offsets = offsets
+
+    def __len__(self) -> int:
+        return self._offsets[-1]
+
+    def _label(self, i: int) -> str:
+        scene = bisect_right(self._offsets, i) - 1
+        return self._pack.scene(scene)['choices'][i - self._offsets[scene]]['option']
+
+    def __getitem__(self, i: Union[int, slice]):
+        if isinstance(i, slice):
+            return tuple(self._label(j) for j in range(*i.indices(len(self))))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("選項索引超出範圍")
+        return self._label(i)
+
+
+class PackedStoryGraph(StoryGraph):
+    """以故事包為後盾的故事圖"""
+
+    __slots__ = ('pack',)
+
+
+def open_pack(path: str, cache_size: int = DEFAULT_CACHE_SIZE) -> StoryGraph:
+    """
+    開啟故事包並回傳延遲載入的故事圖
+
+    故事圖的結構（選項、結局、分數）在開啟時就緒，場景文字在
+    存取時才解析，最多保留 cache_size 個場景。故事包本身可由
+    回傳值的 pack 屬性取得。
+
+    Args:
+        path: 故事包路徑
+        cache_size: 保留在記憶體中的已解析場景數量上限
+
+    Returns:
+        以故事包為後盾的 StoryGraph
+    """
+    pack = StoryPack(path, cache_size)
+
+    ending_flags = bytearray(len(pack.scene_ids))
+    for scene in pack.endings:
+        ending_flags[scene] = 1
+    scores = array('i', bytes(4 * len(pack.scene_ids)))
+    for scene, score in pack.scores.items():
+        scores[scene] = score
+
+    graph = PackedStoryGraph()
+    graph.pack = pack
+    graph.scene_ids = pack.scene_ids
+    graph.index = {scene_id: i for i, scene_id in enumerate(pack.scene_ids)}
+    graph.start = pack.start
+    graph.choice_offsets = pack.choice_offsets
+    graph.choice_targets = pack.choice_targets
+    graph.choice_labels = _ChoiceLabels(pack, pack.choice_offsets)
+    graph.ending_flags = ending_flags
+    graph.scores = scores
+    graph.titles = _SceneField(pack, 'title')
+    graph.descriptions = _SceneField(pack, 'description')
+    graph.outcomes = _SceneField(pack, 'outcome')
+    return graph
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+玩家進度儲存
+以編譯後故事圖的場景索引為位元位置，將已到訪場景、已達成結局與
+已解鎖成就存成位元集合，並以版本化的緊湊二進位格式寫入 SQLite
+
+二進位格式（小端序）：
+- 標頭：魔術字 `TP`、格式版本（1 位元組）、佈局指紋（uint32）
+- 遊玩次數與累計分數（LEB128 可變長度整數）
+- 場景、結局、成就三個位元集合，各以長度加位元組表示，省略結尾的 0
+
+佈局指紋由場景 ID 與成就 ID 的順序計算。故事更新後場景索引可能改變，
+儲存區會保存每個指紋對應的 ID 清單，載入舊佈局的進度時依 ID 重新對應。
+
+寫入採用延遲批次寫入：save() 只標記為待寫入，累積到批次大小、
+呼叫 flush() 或背景的 write_behind() 時才以單一交易寫入。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import asyncio
+import json
+import sqlite3
+import struct
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .graph import StoryGraph
+
+PROGRESS_MAGIC = b'TP'
+PROGRESS_VERSION = 1
+
+_HEADER = struct.Struct('<2sBI')
+
+
+class ProgressError(ValueError):
+    """進度資料格式錯誤或與故事佈局不符"""
+
+
+def _encode_varint(value: int, out: bytearray):
+    """以 LEB128 寫入非負整數"""
+    if value < 0:
+        raise ProgressError(f"無法編碼負數: {value}")
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _decode_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """讀取 LEB128 整數，回傳 (值, 下一個位置)"""
+    value = 0
+    shift = 0
+    while True:
+        if position >= len(data):
+            raise ProgressError("進度資料不完整")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+
+
+class ProgressLayout:
+    """位元位置與場景、成就 ID 的對應"""
+
+    __slots__ = ('scene_ids', 'scene_index', 'achievement_ids', 'achievement_index', 'fingerprint')
+
+    def __init__(self, scene_ids: Sequence[str], achievement_ids: Sequence[str] = ()):
+        self.scene_ids = tuple(scene_ids)
+        self.scene_index = {scene_id: index for index, scene_id in enumerate(self.scene_ids)}
+        self.achievement_ids = tuple(achievement_ids)
+        self.achievement_index = {
+            achievement_id: index for index, achievement_id in enumerate(self.achievement_ids)
+        }
+        layout = json.dumps([self.scene_ids, self.achievement_ids], ensure_ascii=False)
+        self.fingerprint = zlib.crc32(layout.encode('utf-8'))
+
+    @classmethod
+    def for_graph(cls, graph: StoryGraph, achievement_ids: Iterable[str] = ()) -> 'ProgressLayout':
+        """以故事圖的場景索引建立佈局"""
+        return cls(tuple(graph.scene_ids), tuple(achievement_ids))
+
+
+class PlayerProgress:
+    """單一玩家跨遊戲的進度"""
+
+    __slots__ = ('layout', 'scenes', 'endings', 'achievements', 'play_count', 'total_score')
+
+    def __init__(self, layout: ProgressLayout):
+        self.layout = layout
+        self.scenes = bytearray((len(layout.scene_ids) + 7) // 8)
+        self.endings = bytearray(len(self.scenes))
+        self.achievements = bytearray((len(layout.achievement_ids) + 7) // 8)
+        self.play_count = 0
+        self.total_score = 0
+
+    @staticmethod
+    def _set(bits: bytearray, index: int) -> bool:
+        """設定位元，回傳是否為新設定"""
+        mask = 1 << (index & 7)
+        if bits[index >> 3] & mask:
+            return False
+        bits[index >> 3] |= mask
+        return True
+
+    @staticmethod
+    def _members(bits: bytearray, ids: Sequence[str]) -> List[str]:
+        return [ids[index] for index in range(len(ids)) if bits[index >> 3] & (1 << (index & 7))]
+
+    def visit(self, scene_id: str) -> bool:
+        """記錄到訪場景，回傳是否第一次到訪；不在佈局中的場景會被忽略"""
+        index = self.layout.scene_index.get(scene_id)
+        return index is not None and self._set(self.scenes, index)
+
+    def finish(self, ending_id: str, score: int = 0) -> bool:
+        """記錄完成一次遊戲，回傳是否第一次達成此結局"""
+        self.play_count += 1
+        self.total_score += max(score, 0)
+        self.visit(ending_id)
+        index = self.layout.scene_index.get(ending_id)
+        return index is not None and self._set(self.endings, index)
+
+    def unlock(self, achievement_id: str) -> bool:
+        """記錄解鎖成就，回傳是否為新解鎖"""
+        index = self.layout.achievement_index.get(achievement_id)
+        return index is not None and self._set(self.achievements, index)
+
+    def has_visited(self, scene_id: str) -> bool:
+        index = self.layout.scene_index.get(scene_id)
+        return index is not None and bool(self.scenes[index >> 3] & (1 << (index & 7)))
+
+    def visited_scenes(self) -> List[str]:
+        return self._members(self.scenes, self.layout.scene_ids)
+
+    def unlocked_endings(self) -> List[str]:
+        return self._members(self.endings, self.layout.scene_ids)
+
+    def unlocked_achievements(self) -> List[str]:
+        return self._members(self.achievements, self.layout.achievement_ids)
+
+    def encode(self) -> bytes:
+        """編碼為緊湊的二進位格式"""
+        out = bytearray(_HEADER.pack(PROGRESS_MAGIC, PROGRESS_VERSION, self.layout.fingerprint))
+        _encode_varint(self.play_count, out)
+        _encode_varint(self.total_score, out)
+        for bits in (self.scenes, self.endings, self.achievements):
+            trimmed = bytes(bits).rstrip(b'\0')
+            _encode_varint(len(trimmed), out)
+            out += trimmed
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data: bytes, layout: ProgressLayout,
+               previous: Optional[ProgressLayout] = None) -> 'PlayerProgress':
+        """
+        解碼二進位進度
+
+        Args:
+            data: encode() 產生的資料
+            layout: 目前的佈局
+            previous: 資料指紋與目前佈局不同時，資料寫入當時的佈局
+
+        Raises:
+            ProgressError: 格式錯誤、版本不支援或找不到對應的佈局
+        """
+        if len(data) < _HEADER.size:
+            raise ProgressError("進度資料不完整")
+        magic, version, fingerprint = _HEADER.unpack_from(data)
+        if magic != PROGRESS_MAGIC:
+            raise ProgressError("不是進度資料")
+        if version != PROGRESS_VERSION:
+            raise ProgressError(f"不支援的進度格式版本: {version}")
+
+        if fingerprint == layout.fingerprint:
+            source = layout
+        elif previous is not None and previous.fingerprint == fingerprint:
+            source = previous
+        else:
+            raise ProgressError("進度資料的故事佈局已不存在")
+
+        progress = cls(source)
+        position = _HEADER.size
+        progress.play_count, position = _decode_varint(data, position)
+        progress.total_score, position = _decode_varint(data, position)
+        for name in ('scenes', 'endings', 'achievements'):
+            length, position = _decode_varint(data, position)
+            bits = getattr(progress, name)
+            if position + length > len(data) or length > len(bits):
+                raise ProgressError("進度資料不完整")
+            bits[:length] = data[position:position + length]
+            position += length
+
+        if source is layout:
+            return progress
+        return progress.remap(layout)
+
+    def remap(self, layout: ProgressLayout) -> 'PlayerProgress':
+        """依 ID 將進度轉換到新佈局，已移除的場景與成就會被捨棄"""
+        progress = PlayerProgress(layout)
+        progress.play_count = self.play_count
+        progress.total_score = self.total_score
+        for scene_id in self.visited_scenes():
+            progress.visit(scene_id)
+        for ending_id in self.unlocked_endings():
+            index = layout.scene_index.get(ending_id)
+            if index is not None:
+                self._set(progress.endings, index)
+        for achievement_id in self.unlocked_achievements():
+            progress.unlock(achievement_id)
+        return progress
+
+
+class ProgressStore:
+    """以 SQLite 保存玩家進度的延遲批次寫入儲存區"""
+
+    def __init__(self, path: str, layout: ProgressLayout, batch_size: int = 500):
+        """
+        開啟儲存區
+
+        Args:
+            path: SQLite 資料庫路徑（':memory:' 表示只存在記憶體中）
+            layout: 目前故事的佈局
+            batch_size: 待寫入的玩家數達到此數量時立即寫入
+        """
+        self.layout = layout
+        self.batch_size = batch_size
+        self._dirty: Dict[str, PlayerProgress] = {}
+        self._layouts: Dict[int, ProgressLayout] = {layout.fingerprint: layout}
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS progress '
+                '(player_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS layouts '
+                '(fingerprint INTEGER PRIMARY KEY, scene_ids TEXT NOT NULL, achievement_ids TEXT NOT NULL)'
+            )
+            self.connection.execute(
+                'INSERT OR IGNORE INTO layouts VALUES (?, ?, ?)',
+                (layout.fingerprint, json.dumps(layout.scene_ids, ensure_ascii=False),
+                 json.dumps(layout.achievement_ids, ensure_ascii=False))
+            )
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COUNT(*) FROM progress').fetchone()[0]
+
+    def _previous_layout(self, data: bytes) -> Optional[ProgressLayout]:
+        """取得進度資料寫入時的佈局"""
+        if len(data) < _HEADER.size:
+            return None
+        fingerprint = _HEADER.unpack_from(data)[2]
+        if fingerprint not in self._layouts:
+            row = self.connection.execute(
+                'SELECT scene_ids, achievement_ids FROM layouts WHERE fingerprint = ?', (fingerprint,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._layouts[fingerprint] = ProgressLayout(json.loads(row[0]), json.loads(row[1]))
+        return self._layouts[fingerprint]
+
+    def get(self, player_id: str) -> PlayerProgress:
+        """
+        取得玩家進度，沒有紀錄時回傳新的進度
+
+        Raises:
+            ProgressError: 紀錄損毀或佈局不明
+        """
+        if player_id in self._dirty:
+            return self._dirty[player_id]
+        row = self.connection.execute(
+            'SELECT data FROM progress WHERE player_id = ?', (player_id,)
+        ).fetchone()
+        if row is None:
+            return PlayerProgress(self.layout)
+        data = bytes(row[0])
+        return PlayerProgress.decode(data, self.layout, self._previous_layout(data))
+
+    def save(self, player_id: str, progress: PlayerProgress):
+        """標記玩家進度待寫入；累積到批次大小時立即寫入"""
+        self._dirty[player_id] = progress
+        if len(self._dirty) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        以單一交易寫入所有待寫入的進度
+
+        Returns:
+            寫入的玩家數
+        """
+        if not self._dirty:
+            return 0
+        now = time.time()
+        rows = [(player_id, progress.encode(), now) for player_id, progress in self._dirty.items()]
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO progress VALUES (?, ?, ?)', rows)
+        self._dirty.clear()
+        return len(rows)
+
+    async def write_behind(self, interval: float = 1.0):
+        """
+        定期寫入待寫入的進度，直到被取消
+
+        Args:
+            interval: 寫入間隔秒數
+        """
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                self.flush()
+        finally:
+            self.flush()
+
+    def close(self):
+        """寫入剩餘的進度並關閉資料庫"""
+        self.flush()
+        self.connection.close()
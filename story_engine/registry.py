@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+故事包註冊表
+探索並驗證所有故事包，檔案變更時在不中斷服務的情況下熱抽換
+
+註冊表依檔案修改時間（mtime）偵測變更。新版本會先完整載入並驗證，
+成功後才以單一指派替換舊版本，讀取端不會看到載入到一半的故事；
+驗證失敗時保留舊版本。已開始的工作階段持有自己的故事圖參照，
+因此會繼續使用開始時的版本。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from .graph import StoryGraph, StoryFormatError, compile_story
+from .pack import PACK_SUFFIX, open_pack
+
+logger = logging.getLogger(__name__)
+
+# 預設探索的位置：故事目錄與獨立的聖誕節場景檔
+DEFAULT_SOURCES = ('stories', 'christmas_scenes.json')
+
+
+class StoryPackInfo:
+    """已載入的故事包版本"""
+
+    __slots__ = ('name', 'path', 'mtime', 'version', 'graph')
+
+    def __init__(self, name: str, path: str, mtime: float, version: int, graph: StoryGraph):
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.version = version
+        self.graph = graph
+
+
+def is_story_data(data: Any) -> bool:
+    """判斷 JSON 內容是否為場景格式的故事（排除 common.json、achievements.json 等資料檔）"""
+    if not isinstance(data, dict) or not data:
+        return False
+    if not all(isinstance(scene, dict) for scene in data.values()):
+        return False
+    return any('choices' in scene or 'is_ending' in scene for scene in data.values())
+
+
+def load_pack_file(path: str) -> Optional[StoryGraph]:
+    """
+    載入並驗證單一故事包檔案
+
+    起始場景為 `start`，沒有時使用第一個場景。指向不存在場景的選項
+    會記錄警告，但不會讓整個故事包失效。
+
+    Returns:
+        編譯後的故事圖；檔案不是故事格式時回傳 None
+
+    Raises:
+        OSError: 無法讀取檔案
+        json.JSONDecodeError: JSON 格式錯誤
+        StoryFormatError: 故事資料格式錯誤
+    """
+    if path.endswith(PACK_SUFFIX):
+        return open_pack(path)
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not is_story_data(data):
+        return None
+
+    start = 'start' if 'start' in data else next(iter(data))
+    graph = compile_story(data, start=start, strict=False)
+    if graph.broken_links:
+        logger.warning(f"{path}: {len(graph.broken_links)} 個選項連接到不存在的場景")
+    return graph
+
+
+class StoryRegistry:
+    """故事包註冊表"""
+
+    def __init__(self, sources: Iterable[str] = DEFAULT_SOURCES):
+        """
+        初始化註冊表
+
+        Args:
+            sources: 要探索的目錄或檔案；目錄中的 .json 與 .tspack 都會被檢查
+        """
+        self.sources = list(sources)
+        self.packs: Dict[str, StoryPackInfo] = {}
+        # 不是故事格式或載入失敗的檔案，記錄 mtime 以免每次都重新解析
+        self._skipped: Dict[str, float] = {}
+        self._version = 0
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.packs
+
+    def __len__(self) -> int:
+        return len(self.packs)
+
+    def names(self) -> List[str]:
+        """取得所有故事包名稱"""
+        return sorted(self.packs)
+
+    def get(self, name: str) -> StoryGraph:
+        """
+        取得故事包目前版本的故事圖
+
+        Raises:
+            KeyError: 找不到故事包
+        """
+        return self.packs[name].graph
+
+    def info(self, name: str) -> StoryPackInfo:
+        """取得故事包目前版本的資訊"""
+        return self.packs[name]
+
+    def _candidate_files(self) -> Dict[str, str]:
+        """列出所有候選檔案，回傳 {故事包名稱: 路徑}"""
+        files: Dict[str, str] = {}
+        for source in self.sources:
+            if os.path.isdir(source):
+                paths = sorted(
+                    os.path.join(source, filename) for filename in os.listdir(source)
+                    if filename.endswith(('.json', PACK_SUFFIX))
+                )
+            elif os.path.isfile(source):
+                paths = [source]
+            else:
+                continue
+            for path in paths:
+                name = os.path.splitext(os.path.basename(path))[0]
+                files.setdefault(name, path)
+        return files
+
+    def refresh(self) -> List[str]:
+        """
+        探索故事包並重新載入有變更的檔案
+
+        Returns:
+            新增、更新或移除的故事包名稱
+        """
+        changed = []
+        files = self._candidate_files()
+        # 在新的字典中完成所有變更，最後以單一指派發布；
+        # 事件迴圈上的讀取端不會看到更新到一半的註冊表
+        packs = {name: info for name, info in self.packs.items() if name in files}
+
+        for name in [name for name in self.packs if name not in files]:
+            logger.info(f"故事包已移除: {name}")
+            changed.append(name)
+
+        for name, path in files.items():
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue
+
+            current = packs.get(name)
+            if current is not None and current.path == path and current.mtime == mtime:
+                continue
+            # 同一個失敗或非故事格式的版本不再重新解析（已載入的故事包也一樣）
+            if self._skipped.get(path) == mtime:
+                continue
+
+            try:
+                graph = load_pack_file(path)
+            except (OSError, json.JSONDecodeError, StoryFormatError) as e:
+                logger.error(f"載入故事包失敗，保留目前版本: {path}: {e}")
+                self._skipped[path] = mtime
+                continue
+            if graph is None:
+                self._skipped[path] = mtime
+                continue
+
+            self._version += 1
+            # 進行中的工作階段仍持有舊的故事圖
+            packs[name] = StoryPackInfo(name, path, mtime, self._version, graph)
+            self._skipped.pop(path, None)
+            logger.info(f"故事包已載入: {name}（版本 {self._version}）")
+            changed.append(name)
+
+        self.packs = packs
+        return changed
+
+    async def watch(self, interval: float = 2.0):
+        """
+        定期檢查檔案變更並熱抽換，直到被取消
+
+        解析與編譯在執行緒中進行，大型故事包不會阻塞事件迴圈上的其他連線。
+
+        Args:
+            interval: 檢查間隔秒數
+        """
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.get_running_loop().run_in_executor(None, self.refresh)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+遊戲紀錄與重播
+以只附加的紀錄檔保存每次遊玩的選擇序列，並在新的故事版本上無頭重播，
+找出斷裂連結、改變的場景轉移與改變的結局
+
+紀錄檔格式（小端序）：
+- 檔頭：魔術字 `TR`、格式版本（1 位元組）
+- 之後是一連串紀錄：種類（1 位元組）、內容長度（LEB128）、內容
+  - `L` 故事佈局：佈局指紋（uint32）與場景 ID 清單（UTF-8 JSON），
+    每個指紋在檔案中只寫入一次
+  - `S` 遊玩紀錄：佈局指紋（uint32）、開始時間（毫秒）、起始場景索引、
+    步數，每步為選項索引、到達的場景索引與距上一步的毫秒數，最後是
+    狀態旗標（1 位元組）與結局分數（zigzag）
+
+場景以紀錄當時的場景索引保存，重播時依佈局的場景 ID 對應到新版本。
+程式中斷時最後一筆紀錄可能不完整，讀取時會略過並回報。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import mmap
+import multiprocessing
+import os
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .graph import StoryGraph, NO_SCENE
+from .progress import ProgressLayout, _decode_varint, _encode_varint
+
+REPLAY_MAGIC = b'TR'
+REPLAY_VERSION = 1
+
+LAYOUT_RECORD = ord('L')
+SESSION_RECORD = ord('S')
+
+# 遊玩紀錄的狀態旗標
+FLAG_FINISHED = 1
+FLAG_ENDING = 2
+
+DEFAULT_CHUNK_SESSIONS = 20000
+DEFAULT_MAX_SAMPLES = 20
+
+
+class ReplayError(ValueError):
+    """紀錄檔格式錯誤"""
+
+
+def _zigzag(value: int) -> int:
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value: int) -> int:
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def scan_records(data: bytes, position: int = len(REPLAY_MAGIC) + 1) -> Iterator[Tuple[int, int, int]]:
+    """
+    依序列出紀錄，不解析內容
+
+    Yields:
+        (種類, 內容開始位置, 內容結束位置)；最後一筆不完整時停止
+    """
+    size = len(data)
+    while position < size:
+        kind = data[position]
+        try:
+            length, start = _decode_varint(data, position + 1)
+        except ValueError:
+            return
+        end = start + length
+        if end > size:
+            return
+        yield kind, start, end
+        position = end
+
+
+def _check_header(data: bytes, path: str):
+    if bytes(data[:len(REPLAY_MAGIC)]) != REPLAY_MAGIC:
+        raise ReplayError(f"{path}: 不是遊戲紀錄檔")
+    if data[len(REPLAY_MAGIC)] != REPLAY_VERSION:
+        raise ReplayError(f"{path}: 不支援的紀錄格式版本: {data[len(REPLAY_MAGIC)]}")
+
+
+def _decode_layout(data: bytes, start: int, end: int) -> Tuple[int, ProgressLayout]:
+    fingerprint = int.from_bytes(data[start:start + 4], 'little')
+    layout = ProgressLayout(json.loads(bytes(data[start + 4:end]).decode('utf-8')))
+    return fingerprint, layout
+
+
+class SessionTrace:
+    """進行中的一次遊玩紀錄"""
+
+    __slots__ = ('graph', 'fingerprint', 'started', 'start', 'choices', 'scenes', 'delays', '_last')
+
+    def __init__(self, graph: StoryGraph, fingerprint: int, start: int):
+        self.graph = graph
+        self.fingerprint = fingerprint
+        self.started = time.time()
+        self.start = start
+        self.choices = array('I')
+        self.scenes = array('I')
+        self.delays = array('I')
+        self._last = time.monotonic()
+
+    @property
+    def scene(self) -> int:
+        """目前的場景索引"""
+        return self.scenes[-1] if self.scenes else self.start
+
+    def step(self, choice: int, scene: int):
+        """
+        記錄一次選擇
+
+        Args:
+            choice: 選項索引（從 0 開始）
+            scene: 選擇後到達的場景索引
+        """
+        now = time.monotonic()
+        self.choices.append(choice)
+        self.scenes.append(scene)
+        self.delays.append(min(int((now - self._last) * 1000), 0xFFFFFFFF))
+        self._last = now
+
+    def encode(self) -> bytes:
+        """編碼為遊玩紀錄的內容"""
+        graph = self.graph
+        scene = self.scene
+        is_ending = bool(graph.ending_flags[scene])
+        finished = is_ending or graph.choice_offsets[scene + 1] == graph.choice_offsets[scene]
+
+        out = bytearray(self.fingerprint.to_bytes(4, 'little'))
+        _encode_varint(int(self.started * 1000), out)
+        _encode_varint(self.start, out)
+        _encode_varint(len(self.scenes), out)
+        for choice, target, delay in zip(self.choices, self.scenes, self.delays):
+            _encode_varint(choice, out)
+            _encode_varint(target, out)
+            _encode_varint(delay, out)
+        out.append((FLAG_FINISHED if finished else 0) | (FLAG_ENDING if is_ending else 0))
+        _encode_varint(_zigzag(graph.scores[scene] if is_ending else 0), out)
+        return bytes(out)
+
+
+class SessionRecorder:
+    """只附加的遊玩紀錄器"""
+
+    def __init__(self, path: str):
+        """
+        開啟紀錄檔，不存在時建立
+
+        Raises:
+            ReplayError: 既有檔案不是紀錄檔
+        """
+        self.path = path
+        self._written: Dict[int, ProgressLayout] = {}
+        # 故事圖 id → (故事圖, 佈局)，持有參照避免 id 被重複使用
+        self._layouts: Dict[int, Tuple[StoryGraph, ProgressLayout]] = {}
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                data = f.read()
+            _check_header(data, path)
+            valid = len(REPLAY_MAGIC) + 1
+            for kind, start, end in scan_records(data):
+                valid = end
+                if kind == LAYOUT_RECORD:
+                    fingerprint, layout = _decode_layout(data, start, end)
+                    self._written[fingerprint] = layout
+            # 截掉上次中斷時不完整的最後一筆，新紀錄才能接在完整紀錄之後
+            if valid < len(data):
+                os.truncate(path, valid)
+
+        self._file = open(path, 'ab')
+        if self._file.tell() == 0:
+            self._file.write(REPLAY_MAGIC + bytes([REPLAY_VERSION]))
+
+    def _write(self, kind: int, payload: bytes) -> int:
+        header = bytearray([kind])
+        _encode_varint(len(payload), header)
+        self._file.write(header)
+        self._file.write(payload)
+        return len(header) + len(payload)
+
+    def begin(self, graph: StoryGraph, start: Optional[int] = None) -> SessionTrace:
+        """
+        開始記錄一次遊玩
+
+        Args:
+            graph: 遊玩的故事圖
+            start: 起始場景索引，預設為故事圖的起始場景
+        """
+        cached = self._layouts.get(id(graph))
+        if cached is None or cached[0] is not graph:
+            cached = (graph, ProgressLayout.for_graph(graph))
+            self._layouts[id(graph)] = cached
+        layout = cached[1]
+        if layout.fingerprint not in self._written:
+            payload = layout.fingerprint.to_bytes(4, 'little')
+            payload += json.dumps(layout.scene_ids, ensure_ascii=False).encode('utf-8')
+            self._write(LAYOUT_RECORD, payload)
+            self._written[layout.fingerprint] = layout
+        return SessionTrace(graph, layout.fingerprint, graph.start if start is None else start)
+
+    def end(self, trace: SessionTrace) -> int:
+        """
+        寫入遊玩紀錄
+
+        Returns:
+            寫入的位元組數
+        """
+        return self._write(SESSION_RECORD, trace.encode())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        """寫入緩衝區並關閉紀錄檔"""
+        self._file.close()
+
+
+class ReplayEngine:
+    """在故事圖上重播遊玩紀錄"""
+
+    def __init__(self, graph: StoryGraph, layouts: Dict[int, ProgressLayout]):
+        """
+        初始化重播引擎
+
+        Args:
+            graph: 要驗證的故事圖
+            layouts: 佈局指紋對應紀錄當時的佈局
+        """
+        self.graph = graph
+        self.layouts = layouts
+        self._mappings: Dict[int, array] = {}
+
+    def _mapping(self, fingerprint: int) -> Optional[array]:
+        """取得舊場景索引對應新場景索引的陣列"""
+        mapping = self._mappings.get(fingerprint)
+        if mapping is None:
+            layout = self.layouts.get(fingerprint)
+            if layout is None:
+                return None
+            index_of = self.graph.index_of
+            mapping = array('i', (index_of(scene_id) for scene_id in layout.scene_ids))
+            self._mappings[fingerprint] = mapping
+        return mapping
+
+    def replay(self, data: bytes, position: int) -> Optional[Tuple[Any, ...]]:
+        """
+        重播一筆遊玩紀錄
+
+        Args:
+            data: 紀錄檔內容
+            position: 遊玩紀錄內容的開始位置
+
+        Returns:
+            沒有差異時回傳 None，否則回傳 (種類, 來源場景, 選項, 預期, 實際)
+        """
+        fingerprint = int.from_bytes(data[position:position + 4], 'little')
+        mapping = self._mapping(fingerprint)
+        if mapping is None:
+            return ('unknown_layout', None, None, None, None)
+        scene_ids = self.layouts[fingerprint].scene_ids
+
+        graph = self.graph
+        offsets = graph.choice_offsets
+        targets = graph.choice_targets
+        endings = graph.ending_flags
+        new_ids = graph.scene_ids
+
+        _, position = _decode_varint(data, position + 4)
+        recorded, position = _decode_varint(data, position)
+        count, position = _decode_varint(data, position)
+        current = graph.start
+        if mapping[recorded] != current:
+            return ('changed_start', None, None, scene_ids[recorded], new_ids[current])
+
+        for _ in range(count):
+            # 選項與場景索引通常小於 128，只有一個位元組時直接讀取
+            choice = data[position]
+            if choice < 0x80:
+                position += 1
+            else:
+                choice, position = _decode_varint(data, position)
+            scene = data[position]
+            if scene < 0x80:
+                position += 1
+            else:
+                scene, position = _decode_varint(data, position)
+            if data[position] < 0x80:
+                position += 1
+            else:
+                position = _decode_varint(data, position)[1]
+            if endings[current]:
+                return ('changed_ending', scene_ids[recorded], choice, scene_ids[scene], new_ids[current])
+
+            slot = offsets[current] + choice
+            target = targets[slot] if slot < offsets[current + 1] else NO_SCENE
+            expected = mapping[scene]
+            if target != expected:
+                if expected == NO_SCENE:
+                    kind = 'missing_scene'
+                elif target == NO_SCENE:
+                    kind = 'dead_link'
+                else:
+                    kind = 'changed_link'
+                actual = new_ids[target] if target != NO_SCENE else None
+                return (kind, scene_ids[recorded], choice, scene_ids[scene], actual)
+            current = target
+            recorded = scene
+
+        flags = data[position]
+        score, position = _decode_varint(data, position + 1)
+        if bool(flags & FLAG_ENDING) != bool(endings[current]):
+            return ('changed_ending', scene_ids[recorded], None, scene_ids[recorded], new_ids[current])
+        if endings[current] and graph.scores[current] != _unzigzag(score):
+            return ('changed_score', scene_ids[recorded], None, _unzigzag(score), graph.scores[current])
+        return None
+
+    def replay_range(self, data: bytes, start: int, end: int) -> Tuple[int, Counter]:
+        """
+        重播紀錄檔中一段範圍內的所有遊玩紀錄
+
+        Returns:
+            (遊玩紀錄數, 每種差異的遊玩紀錄數)
+        """
+        sessions = 0
+        divergences: Counter = Counter()
+        replay = self.replay
+        for kind, payload_start, _ in scan_records(data, start):
+            if payload_start >= end:
+                break
+            if kind != SESSION_RECORD:
+                continue
+            sessions += 1
+            divergence = replay(data, payload_start)
+            if divergence is not None:
+                divergences[divergence] += 1
+        return sessions, divergences
+
+
+# fork 出的工作行程從父行程繼承的重播狀態
+_worker: Dict[str, Any] = {}
+
+
+def _replay_chunk(chunk: Tuple[int, int]) -> Tuple[int, Counter]:
+    """在工作行程中重播一段紀錄"""
+    return _worker['engine'].replay_range(_worker['data'], chunk[0], chunk[1])
+
+
+def replay_log(path: str, graph: StoryGraph, workers: int = 1,
+               chunk_sessions: int = DEFAULT_CHUNK_SESSIONS,
+               max_samples: int = DEFAULT_MAX_SAMPLES) -> Dict[str, Any]:
+    """
+    在故事圖上重播紀錄檔中的所有遊玩紀錄
+
+    紀錄檔以 mmap 開啟，依遊玩紀錄數切成多段，由 fork 出的工作行程
+    平行重播（不支援 fork 的平台在目前行程中依序重播）。
+
+    Args:
+        path: 紀錄檔路徑
+        graph: 要驗證的故事圖
+        workers: 工作行程數
+        chunk_sessions: 每段的遊玩紀錄數
+        max_samples: 回報的差異範例上限
+
+    Returns:
+        包含遊玩紀錄數、一致數、差異數、各差異種類數量與差異範例的字典
+
+    Raises:
+        OSError: 無法讀取紀錄檔
+        ReplayError: 不是紀錄檔
+    """
+    started = time.perf_counter()
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= len(REPLAY_MAGIC):
+            raise ReplayError(f"{path}: 不是遊戲紀錄檔")
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        _check_header(data, path)
+        # 第一次掃描只讀紀錄框架：收集佈局並切段
+        layouts: Dict[int, ProgressLayout] = {}
+        chunks: List[Tuple[int, int]] = []
+        chunk_start = None
+        in_chunk = 0
+        scanned = len(REPLAY_MAGIC) + 1
+        for kind, start, end in scan_records(data):
+            if chunk_start is None:
+                chunk_start = scanned
+            scanned = end
+            if kind == LAYOUT_RECORD:
+                fingerprint, layout = _decode_layout(data, start, end)
+                layouts[fingerprint] = layout
+            elif kind == SESSION_RECORD:
+                in_chunk += 1
+                if in_chunk >= chunk_sessions:
+                    chunks.append((chunk_start, end))
+                    chunk_start = None
+                    in_chunk = 0
+        if chunk_start is not None:
+            chunks.append((chunk_start, scanned))
+
+        engine = ReplayEngine(graph, layouts)
+        if workers > 1 and len(chunks) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            _worker.update(engine=engine, data=data)
+            try:
+                with multiprocessing.get_context('fork').Pool(min(workers, len(chunks))) as pool:
+                    results = pool.map(_replay_chunk, chunks)
+            finally:
+                _worker.clear()
+        else:
+            results = [engine.replay_range(data, start, end) for start, end in chunks]
+
+        sessions = 0
+        divergences: Counter = Counter()
+        for chunk_sessions_done, chunk_divergences in results:
+            sessions += chunk_sessions_done
+            divergences.update(chunk_divergences)
+        truncated = scanned < len(data)
+    finally:
+        data.close()
+
+    elapsed = time.perf_counter() - started
+    kinds: Counter = Counter()
+    for divergence, count in divergences.items():
+        kinds[divergence[0]] += count
+    # 相同的差異只列一次，依受影響的遊玩次數排序
+    samples = [
+        dict(zip(('kind', 'scene_id', 'choice', 'expected', 'actual'), divergence), sessions=count)
+        for divergence, count in divergences.most_common(max_samples)
+    ]
+    divergent = sum(kinds.values())
+    return {
+        'sessions': sessions,
+        'matched': sessions - divergent,
+        'divergent': divergent,
+        'kinds': dict(kinds),
+        'samples': samples,
+        'layouts': len(layouts),
+        'truncated': truncated,
+        'elapsed': elapsed,
+        'sessions_per_second': sessions / elapsed if elapsed > 0 else 0.0
+    }
+
+
+def choice_counts(path: str, graph: StoryGraph) -> array:
+    """
+    統計紀錄檔中每個選項被選擇的次數
+
+    紀錄當時的場景依 ID 對應到目前的故事圖；已移除的場景與超出範圍的
+    選項會被略過。
+
+    Returns:
+        與 graph.choice_targets 對齊的次數陣列
+
+    Raises:
+        OSError: 無法讀取紀錄檔
+        ReplayError: 不是紀錄檔
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) <= len(REPLAY_MAGIC):
+        raise ReplayError(f"{path}: 不是遊戲紀錄檔")
+    _check_header(data, path)
+
+    counts = array('I', [0]) * len(graph.choice_targets)
+    offsets = graph.choice_offsets
+    engine = ReplayEngine(graph, {})
+    for kind, start, end in scan_records(data):
+        if kind == LAYOUT_RECORD:
+            fingerprint, layout = _decode_layout(data, start, end)
+            engine.layouts[fingerprint] = layout
+            continue
+        if kind != SESSION_RECORD:
+            continue
+        mapping = engine._mapping(int.from_bytes(data[start:start + 4], 'little'))
+        if mapping is None:
+            continue
+        _, position = _decode_varint(data, start + 4)
+        scene, position = _decode_varint(data, position)
+        count, position = _decode_varint(data, position)
+        for _ in range(count):
+            choice, position = _decode_varint(data, position)
+            current = mapping[scene]
+            if current != NO_SCENE and choice < offsets[current + 1] - offsets[current]:
+                counts[offsets[current] + choice] += 1
+            scene, position = _decode_varint(data, position)
+            _, position = _decode_varint(data, position)
+    return counts
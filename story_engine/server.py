@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+非同步遊戲伺服器
+在單一事件迴圈上以 asyncio 同時服務大量連線
+
+通訊協定為逐行 JSON：
+- 連線後伺服器立即送出起始場景
+- 客戶端送出選項編號（從 1 開始，與終端機版本一致）、`restart` 或 `quit`
+- 使用故事包註冊表時，`packs` 列出可用故事，`pack <名稱>` 切換並重新開始
+- 伺服器回傳下一個場景；錯誤時回傳 {"error": "..."}
+- 設定成就引擎時，新解鎖的成就會附在場景的 `achievements` 欄位
+
+每個連線一次只處理一個請求，並在讀取下一行前等待寫入緩衝區
+排空（drain），因此慢速客戶端不會讓伺服器無限制地堆積輸出。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict, Optional, Set, Tuple
+
+from .achievements import ACHIEVEMENTS_FILE, AchievementEngine, PlayerAchievements, load_achievements
+from .graph import StoryGraph
+from .session import SessionManager, SessionError
+from .registry import StoryRegistry
+from .shared import preload
+
+logger = logging.getLogger(__name__)
+
+# 單行請求的長度上限（位元組）
+MAX_LINE = 1024
+
+# 每個連線的寫入緩衝區高水位（位元組），超過時 drain() 會暫停該連線
+WRITE_HIGH_WATER = 64 * 1024
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """將訊息編碼為一行 JSON"""
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+class StoryServer:
+    """以 asyncio 驅動遊戲工作階段的 TCP 伺服器"""
+
+    def __init__(
+        self,
+        graph: Optional[StoryGraph] = None,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        max_connections: int = 10000,
+        idle_timeout: float = 300.0,
+        reuse_port: bool = False,
+        registry: Optional[StoryRegistry] = None,
+        default_pack: str = 'halloween',
+        watch_interval: float = 0.0,
+        achievements: Optional[AchievementEngine] = None
+    ):
+        """
+        初始化伺服器
+
+        Args:
+            graph: 所有連線共用的故事圖；使用註冊表時可省略
+            host: 監聽位址
+            port: 監聽埠號，0 表示由系統指定
+            max_connections: 同時連線上限，超過時直接拒絕新連線
+            idle_timeout: 連線閒置逾時秒數
+            reuse_port: 是否允許多個工作行程監聽同一個埠號（SO_REUSEPORT）
+            registry: 故事包註冊表，新連線使用其中 default_pack 的目前版本
+            default_pack: 新連線預設的故事包名稱
+            watch_interval: 大於 0 時定期檢查註冊表的檔案變更並熱抽換
+            achievements: 成就引擎；每個連線在整個連線期間累計成就進度
+        """
+        if graph is None and registry is None:
+            raise ValueError("需要提供 graph 或 registry")
+        self.graph = graph
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.reuse_port = reuse_port
+        self.registry = registry
+        self.default_pack = default_pack
+        self.watch_interval = watch_interval
+        self.sessions = SessionManager(graph, max_sessions=max_connections)
+        self.achievements = achievements
+        self.players: Dict[str, PlayerAchievements] = {}
+        self.active_connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: Set[asyncio.Task] = set()
+        self._watcher: Optional[asyncio.Task] = None
+
+    async def start(self) -> Tuple[str, int]:
+        """
+        開始監聽
+
+        Returns:
+            實際監聽的 (host, port)
+        """
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port,
+            limit=MAX_LINE, backlog=min(self.max_connections, 4096),
+            reuse_port=self.reuse_port or None
+        )
+        if self.registry is not None and self.watch_interval > 0:
+            self._watcher = asyncio.ensure_future(self.registry.watch(self.watch_interval))
+        address = self._server.sockets[0].getsockname()
+        self.host, self.port = address[0], address[1]
+        logger.info(f"遊戲伺服器已啟動: {self.host}:{self.port}")
+        return self.host, self.port
+
+    async def serve_forever(self):
+        """持續服務直到被取消"""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self, grace_period: float = 5.0):
+        """
+        停止監聽並等待伺服器關閉
+
+        Args:
+            grace_period: 等待現有連線結束的秒數，逾時後強制取消
+        """
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+        if self._watcher is not None:
+            self._watcher.cancel()
+            await asyncio.gather(self._watcher, return_exceptions=True)
+            self._watcher = None
+
+        if self._handlers:
+            _, pending = await asyncio.wait(set(self._handlers), timeout=grace_period)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def handle_line(self, session_id: str, line: str) -> Optional[Dict[str, Any]]:
+        """
+        處理單行請求
+
+        Args:
+            session_id: 工作階段 ID
+            line: 客戶端送出的一行文字
+
+        Returns:
+            要回傳的訊息；None 表示客戶端要求結束連線
+        """
+        command = line.strip().lower()
+        if command == 'quit':
+            return None
+        if command == 'restart':
+            return self.sessions.restart(session_id)
+        if self.registry is not None:
+            if command == 'packs':
+                return {'packs': self.registry.names()}
+            if command.startswith('pack '):
+                return self.switch_pack(session_id, command[5:].strip())
+        try:
+            choice = int(command) - 1
+        except ValueError:
+            return {'error': f"無效的指令: {command}"}
+        try:
+            response = self.sessions.step(session_id, choice)
+        except SessionError as e:
+            return {'error': str(e)}
+        if self.achievements is not None:
+            self.award(session_id, response)
+        return response
+
+    def award(self, session_id: str, response: Dict[str, Any]):
+        """記錄到訪的場景，並把新解鎖的成就加到回應中"""
+        player = self.players.get(session_id)
+        if player is None:
+            return
+        scene_id = response['scene_id']
+        if response['is_ending']:
+            session = self.sessions.get(session_id)
+            unlocked = self.achievements.finish(player, scene_id, session.graph.scores[session.scene])
+        else:
+            unlocked = self.achievements.visit(player, scene_id)
+        if unlocked:
+            response['achievements'] = [self.achievements.describe(achievement_id) for achievement_id in unlocked]
+
+    def new_session_graph(self) -> StoryGraph:
+        """取得新工作階段要使用的故事圖（註冊表中預設故事包的目前版本）"""
+        # 註冊表可能在執行緒中被替換，只查詢一次
+        info = self.registry.packs.get(self.default_pack) if self.registry is not None else None
+        if info is not None:
+            return info.graph
+        if self.graph is None:
+            raise SessionError(f"找不到故事包: {self.default_pack}")
+        return self.graph
+
+    def switch_pack(self, session_id: str, name: str) -> Dict[str, Any]:
+        """
+        將工作階段切換到另一個故事包並從頭開始
+
+        Returns:
+            新故事包的起始場景，或錯誤訊息
+        """
+        info = self.registry.packs.get(name)
+        if info is None:
+            return {'error': f"找不到故事包: {name}"}
+        self.sessions.close(session_id)
+        self.sessions.create(session_id, graph=info.graph)
+        return self.sessions.render(session_id)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """處理單一連線"""
+        if self.active_connections >= self.max_connections:
+            writer.write(encode_message({'error': '伺服器已滿，請稍後再試'}))
+            await self._close_writer(writer)
+            return
+
+        try:
+            graph = self.new_session_graph()
+        except SessionError as e:
+            writer.write(encode_message({'error': str(e)}))
+            await self._close_writer(writer)
+            return
+
+        self.active_connections += 1
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        writer.transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+        session_id = self.sessions.create(graph=graph)
+        if self.achievements is not None:
+            self.players[session_id] = self.achievements.new_player()
+        try:
+            writer.write(encode_message(self.sessions.render(session_id)))
+            await writer.drain()
+
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    writer.write(encode_message({'error': '連線閒置逾時'}))
+                    break
+                except (asyncio.LimitOverrunError, ValueError):
+                    writer.write(encode_message({'error': '請求過長'}))
+                    break
+
+                if not line:
+                    break
+
+                response = self.handle_line(session_id, line.decode('utf-8', errors='replace'))
+                if response is None:
+                    break
+                writer.write(encode_message(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.sessions.close(session_id)
+            self.players.pop(session_id, None)
+            self.active_connections -= 1
+            await self._close_writer(writer)
+            self._handlers.discard(task)
+
+    @staticmethod
+    async def _close_writer(writer: asyncio.StreamWriter):
+        """關閉連線並忽略對方已斷線的錯誤"""
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def run_workers(story_file: Optional[str], host: str, port: int, workers: int, watch_interval: float = 2.0):
+    """
+    預先載入故事後 fork 多個工作行程，共同監聽同一個埠號
+
+    故事資料只在父行程載入一次，工作行程以寫入時複製的方式共用。
+    stories/achievements.json 存在時會一併載入成就引擎。
+
+    Args:
+        story_file: 故事檔案路徑；None 表示使用故事包註冊表並熱抽換變更的故事包
+        host: 監聽位址
+        port: 監聽埠號
+        workers: 工作行程數量
+        watch_interval: 使用註冊表時檢查檔案變更的間隔秒數
+    """
+    if story_file is None:
+        registry = StoryRegistry()
+        registry.refresh()
+        graphs = [registry.get(name) for name in registry.names()]
+    else:
+        registry = None
+        graphs = preload(story_file)
+
+    achievements = None
+    if os.path.exists(ACHIEVEMENTS_FILE):
+        achievements = load_achievements(ACHIEVEMENTS_FILE, graphs)
+
+    # 成就索引與故事一樣在 fork 前凍結，由工作行程共用
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+
+    if registry is not None:
+        def make_server(reuse_port: bool) -> StoryServer:
+            return StoryServer(
+                host=host, port=port, reuse_port=reuse_port,
+                registry=registry, watch_interval=watch_interval, achievements=achievements
+            )
+    else:
+        def make_server(reuse_port: bool) -> StoryServer:
+            return StoryServer(graphs[0], host=host, port=port, reuse_port=reuse_port,
+                               achievements=achievements)
+
+    if workers <= 1 or not hasattr(os, 'fork'):
+        asyncio.run(make_server(False).serve_forever())
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                asyncio.run(make_server(True).serve_forever())
+            except KeyboardInterrupt:
+                pass
+            os._exit(0)
+        children.append(pid)
+
+    logger.info(f"已啟動 {workers} 個工作行程: {children}")
+    for pid in children:
+        os.waitpid(pid, 0)
+
+
+def main():
+    """主函數"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    story_file = os.getenv('STORY_FILE')
+    host = os.getenv('STORY_SERVER_HOST', '127.0.0.1')
+    port = int(os.getenv('STORY_SERVER_PORT', '8765'))
+    workers = int(os.getenv('STORY_SERVER_WORKERS', '1'))
+
+    try:
+        run_workers(story_file, host, port, workers)
+    except KeyboardInterrupt:
+        logger.info("遊戲伺服器已停止")
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
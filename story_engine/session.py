@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+無頭遊戲工作階段
+不做任何輸入輸出的遊戲狀態機，以及在單一行程中管理大量工作階段的管理器
+
+GameSession 只保存目前場景索引、分數與已探索場景，故事內容本身
+由所有工作階段共用同一份 StoryGraph。每次 step() 都回傳渲染好的
+場景字典，由前端（終端機、伺服器、Bot）自行決定如何顯示。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Set
+
+from .graph import StoryGraph, NO_SCENE
+
+
+class SessionError(ValueError):
+    """工作階段操作錯誤（無效的選擇、已結束的遊戲等）"""
+
+
+class GameSession:
+    """單一玩家的遊戲狀態機"""
+
+    __slots__ = ('graph', 'scene', 'score', 'visited', 'finished')
+
+    def __init__(self, graph: StoryGraph):
+        self.graph = graph
+        self.scene = graph.start
+        self.score = 0
+        self.visited: Set[int] = set()
+        self.finished = False
+        self._enter(graph.start)
+
+    def _enter(self, scene: int):
+        """進入場景並更新狀態"""
+        graph = self.graph
+        self.scene = scene
+        if graph.ending_flags[scene]:
+            self.score += graph.scores[scene]
+            self.finished = True
+        else:
+            self.visited.add(scene)
+            # 沒有選項的非結局場景同樣無法繼續
+            self.finished = graph.choice_offsets[scene + 1] == graph.choice_offsets[scene]
+
+    def render(self) -> Dict[str, Any]:
+        """
+        渲染目前場景
+
+        Returns:
+            包含場景標題、描述、選項與遊戲狀態的字典
+        """
+        graph = self.graph
+        scene = self.scene
+        is_ending = graph.is_ending(scene)
+        return {
+            'scene_id': graph.scene_ids[scene],
+            'title': graph.titles[scene] or graph.scene_ids[scene].upper(),
+            'description': graph.descriptions[scene],
+            'options': list(graph.choice_options(scene)),
+            'is_ending': is_ending,
+            'outcome': graph.outcomes[scene] if is_ending else '',
+            'score': self.score,
+            'visited_count': len(self.visited),
+            'finished': self.finished
+        }
+
+    def step(self, choice: int) -> Dict[str, Any]:
+        """
+        做出選擇並前進到下一個場景
+
+        Args:
+            choice: 選項索引（從 0 開始）
+
+        Returns:
+            下一個場景的渲染結果
+
+        Raises:
+            SessionError: 遊戲已結束或選擇無效
+        """
+        if self.finished:
+            raise SessionError("遊戲已結束，請先重新開始")
+        next_scene = self.graph.next_scene(self.scene, choice)
+        if next_scene == NO_SCENE:
+            raise SessionError(f"無效的選擇: {choice}")
+        self._enter(next_scene)
+        return self.render()
+
+    def restart(self) -> Dict[str, Any]:
+        """
+        重新開始遊戲
+
+        Returns:
+            起始場景的渲染結果
+        """
+        self.score = 0
+        self.visited.clear()
+        self.finished = False
+        self._enter(self.graph.start)
+        return self.render()
+
+
+class SessionManager:
+    """在單一行程中管理大量遊戲工作階段"""
+
+    def __init__(self, graph: Optional[StoryGraph] = None, max_sessions: int = 100000):
+        """
+        初始化工作階段管理器
+
+        Args:
+            graph: 預設的故事圖，由未指定故事圖的工作階段共用
+            max_sessions: 同時保留的工作階段上限，超過時淘汰最久未使用者
+        """
+        if max_sessions <= 0:
+            raise ValueError("max_sessions 必須大於 0")
+        self.graph = graph
+        self.max_sessions = max_sessions
+        self.sessions: 'OrderedDict[str, GameSession]' = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self.sessions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.sessions)
+
+    def create(self, session_id: Optional[str] = None, graph: Optional[StoryGraph] = None) -> str:
+        """
+        建立新的工作階段
+
+        Args:
+            session_id: 指定的工作階段 ID，未指定時自動產生
+            graph: 工作階段使用的故事圖，未指定時使用預設故事圖
+
+        Returns:
+            工作階段 ID
+        """
+        if graph is None:
+            graph = self.graph
+        if graph is None:
+            raise SessionError("沒有可用的故事")
+
+        if session_id is None:
+            session_id = f"s{next(self._ids)}"
+        elif session_id in self.sessions:
+            raise SessionError(f"工作階段已存在: {session_id}")
+
+        self.sessions[session_id] = GameSession(graph)
+        while len(self.sessions) > self.max_sessions:
+            self.sessions.popitem(last=False)
+        return session_id
+
+    def get(self, session_id: str) -> GameSession:
+        """
+        取得工作階段並標記為最近使用
+
+        Raises:
+            SessionError: 找不到工作階段
+        """
+        try:
+            session = self.sessions[session_id]
+        except KeyError:
+            raise SessionError(f"找不到工作階段: {session_id}")
+        self.sessions.move_to_end(session_id)
+        return session
+
+    def render(self, session_id: str) -> Dict[str, Any]:
+        """渲染工作階段的目前場景"""
+        return self.get(session_id).render()
+
+    def step(self, session_id: str, choice: int) -> Dict[str, Any]:
+        """在指定工作階段做出選擇"""
+        return self.get(session_id).step(choice)
+
+    def restart(self, session_id: str) -> Dict[str, Any]:
+        """重新開始指定工作階段"""
+        return self.get(session_id).restart()
+
+    def close(self, session_id: str) -> bool:
+        """
+        關閉工作階段
+
+        Returns:
+            工作階段是否存在
+        """
+        return self.sessions.pop(session_id, None) is not None
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共用故事資料
+每個行程只載入一次故事檔案，所有遊戲實例共用同一份唯讀資料
+
+伺服器在 fork 工作行程前呼叫 preload()，故事資料會留在父行程的
+記憶體頁面中，由子行程以寫入時複製（copy-on-write）的方式共用。
+preload() 最後會呼叫 gc.freeze()，讓垃圾回收器不再掃描這些物件，
+避免子行程因為 GC 更新物件標頭而把共用頁面複製一份。
+
+若故事檔旁有比 JSON 新的預編譯二進位檔（見 story_engine.binary），
+load_story() 會直接以 mmap 載入，不必解析 JSON；路徑是故事包
+（見 story_engine.pack）時則開啟為按需解析場景的延遲故事圖。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import gc
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from .binary import default_binary_path, load_binary
+from .graph import StoryGraph, StoryFormatError, compile_story
+from .pack import PACK_SUFFIX, open_pack
+
+# 以絕對路徑為鍵的快取：(原始故事資料, 編譯後的故事圖)
+_cache: Dict[str, Tuple[Dict[str, Dict[str, Any]], StoryGraph]] = {}
+
+# 以絕對路徑為鍵、由預編譯二進位檔或故事包載入的故事圖
+_binary_cache: Dict[str, StoryGraph] = {}
+
+
+def _intern_keys(story_data: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """將場景 ID 與欄位名稱駐留，讓重複出現的字串只保留一份"""
+    return {
+        sys.intern(scene_id): {sys.intern(key): value for key, value in scene.items()}
+        if isinstance(scene, dict) else scene
+        for scene_id, scene in story_data.items()
+    }
+
+
+def _load(path: str) -> Tuple[Dict[str, Dict[str, Any]], StoryGraph]:
+    """載入並快取故事檔案"""
+    key = os.path.abspath(path)
+    entry = _cache.get(key)
+    if entry is None:
+        with open(key, 'r', encoding='utf-8') as f:
+            story_data = _intern_keys(json.load(f))
+        entry = (story_data, compile_story(story_data))
+        _cache[key] = entry
+    return entry
+
+
+def _load_fresh_binary(path: str) -> Optional[StoryGraph]:
+    """載入比 JSON 新的預編譯二進位檔，沒有或已過期時回傳 None"""
+    key = os.path.abspath(path)
+    graph = _binary_cache.get(key)
+    if graph is not None:
+        return graph
+
+    if key.endswith(PACK_SUFFIX):
+        graph = _binary_cache[key] = open_pack(key)
+        return graph
+
+    binary_path = default_binary_path(key)
+    try:
+        if os.path.getmtime(binary_path) < os.path.getmtime(key):
+            return None
+        graph = load_binary(binary_path)
+    except (OSError, StoryFormatError):
+        return None
+    _binary_cache[key] = graph
+    return graph
+
+
+def load_story(path: str) -> StoryGraph:
+    """
+    取得共用的故事圖
+
+    Args:
+        path: 故事 JSON 檔案或故事包路徑
+
+    Returns:
+        同一行程內共用的 StoryGraph
+
+    Raises:
+        FileNotFoundError: 找不到故事檔案
+        json.JSONDecodeError: JSON 格式錯誤
+        StoryFormatError: 故事資料格式錯誤
+    """
+    graph = _load_fresh_binary(path)
+    if graph is None:
+        graph = _load(path)[1]
+    return graph
+
+
+def load_story_data(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    取得共用的原始故事資料
+
+    回傳的字典由所有呼叫者共用，請視為唯讀。
+
+    Args:
+        path: 故事 JSON 檔案路徑
+
+    Returns:
+        以場景 ID 為鍵的故事資料
+    """
+    return _load(path)[0]
+
+
+def preload(*paths: str) -> List[StoryGraph]:
+    """
+    在 fork 工作行程前預先載入故事並凍結垃圾回收
+
+    Args:
+        paths: 故事 JSON 檔案路徑
+
+    Returns:
+        依序對應的故事圖
+    """
+    graphs = [load_story(path) for path in paths]
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    return graphs
+
+
+def clear_cache():
+    """清除快取（主要用於測試與重新載入）"""
+    _cache.clear()
+    _binary_cache.clear()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+蒙地卡羅遊玩模擬器
+把編譯後的故事圖當成轉移矩陣，以 NumPy 同時模擬大量隨機遊玩，
+估計各結局的達成機率、平均路徑長度與分數分布
+
+每個選項的機率可以是均等的，也可以由遊玩紀錄（story_engine.replay）
+統計出來。所有模擬中的玩家每一步同時前進：以每個場景的累積機率表
+搭配 searchsorted 一次抽出所有玩家的選擇，到達結局或沒有選項的場景
+即停止。模擬次數很多時可以分給多個 fork 出的工作行程。
+
+NumPy 是選用的依賴，只有這個模組需要。
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import multiprocessing
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .graph import StoryGraph
+
+DEFAULT_PLAYTHROUGHS = 1000000
+DEFAULT_BATCH_SIZE = 1000000
+# 超過這個步數仍未結束的遊玩視為困在循環中
+DEFAULT_MAX_STEPS = 500
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("蒙地卡羅模擬需要 NumPy，請執行 pip install numpy")
+
+
+def choice_weights(graph: StoryGraph, counts: Optional[Sequence[int]] = None, prior: float = 1.0):
+    """
+    計算每個選項的權重
+
+    Args:
+        graph: 故事圖
+        counts: 與 graph.choice_targets 對齊的選擇次數（例如
+            replay.choice_counts() 的結果），未指定時每個選項權重相同
+        prior: 加到每個選項的虛擬次數，避免紀錄中沒出現過的選項機率為 0
+
+    Returns:
+        與 graph.choice_targets 對齊的權重陣列
+    """
+    _require_numpy()
+    weights = np.ones(len(graph.choice_targets), dtype=np.float64)
+    if counts is not None:
+        if len(counts) != len(weights):
+            raise ValueError("選擇次數的長度與故事圖的選項數不符")
+        weights = np.asarray(counts, dtype=np.float64) + prior
+    return weights
+
+
+class MonteCarloSimulator:
+    """以轉移表同時模擬大量遊玩"""
+
+    def __init__(self, graph: StoryGraph, weights=None, max_steps: int = DEFAULT_MAX_STEPS):
+        """
+        建立轉移表
+
+        Args:
+            graph: 故事圖
+            weights: 與 graph.choice_targets 對齊的選項權重，未指定時均等
+            max_steps: 單次遊玩的步數上限
+
+        Raises:
+            ImportError: 沒有安裝 NumPy
+        """
+        _require_numpy()
+        self.graph = graph
+        self.max_steps = max_steps
+        scene_count = len(graph)
+        offsets = np.asarray(graph.choice_offsets, dtype=np.int64)
+        choice_total = int(offsets[-1])
+        self.targets = np.asarray(graph.choice_targets, dtype=np.int32)
+        self.scores = np.asarray(graph.scores, dtype=np.int64)
+        self.endings = np.frombuffer(bytes(graph.ending_flags), dtype=np.uint8).astype(bool)
+
+        if weights is None:
+            weights = np.ones(choice_total, dtype=np.float64)
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (choice_total,) or (weights < 0).any():
+            raise ValueError("選項權重必須是與選項數相同長度的非負數列")
+
+        # 每個選項所屬的場景，以及場景內的累積機率；權重全為 0 的場景視為均等
+        counts = np.diff(offsets)
+        owner = np.repeat(np.arange(scene_count, dtype=np.int64), counts)
+        weights = np.where(np.bincount(owner, weights, scene_count)[owner] > 0, weights, 1.0)
+        totals = np.bincount(owner, weights, scene_count)
+        cumulative = np.cumsum(weights)
+        before = np.concatenate(([0.0], cumulative))[offsets[:-1]]
+        within = (cumulative - before[owner]) / totals[owner]
+        within[offsets[1:][counts > 0] - 1] = 1.0
+
+        # 場景 s 的選項鍵值落在 (s, s+1]，s + u（u ∈ [0, 1)）的
+        # searchsorted 結果就是抽中的選項位置
+        self.keys = owner + within
+        # 結局或沒有選項的場景即停止
+        self.terminal = self.endings | (counts == 0)
+
+    def run(self, playthroughs: int, seed=None, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+        """
+        模擬遊玩並回傳計數
+
+        Args:
+            playthroughs: 遊玩次數
+            seed: 亂數種子（整數或 numpy.random.SeedSequence）
+            batch_size: 每批同時模擬的遊玩數
+
+        Returns:
+            包含各場景停止次數、步數分布、斷裂連結與未結束次數的字典
+        """
+        rng = np.random.default_rng(seed)
+        scene_count = len(self.graph)
+        stops = np.zeros(scene_count, dtype=np.int64)
+        lengths = np.zeros(self.max_steps + 1, dtype=np.int64)
+        broken = 0
+        unfinished = 0
+        keys, targets, terminal = self.keys, self.targets, self.terminal
+
+        remaining = playthroughs
+        while remaining > 0:
+            size = min(batch_size, remaining)
+            remaining -= size
+            current = np.full(size, self.graph.start, dtype=np.int32)
+            for step in range(self.max_steps + 1):
+                done = terminal[current]
+                if done.any():
+                    finished = current[done]
+                    stops += np.bincount(finished, minlength=scene_count)
+                    lengths[step] += finished.size
+                    current = current[~done]
+                if current.size == 0:
+                    break
+                if step == self.max_steps:
+                    unfinished += current.size
+                    break
+                slots = np.searchsorted(keys, current + rng.random(current.size), side='right')
+                current = targets[slots]
+                lost = current < 0
+                if lost.any():
+                    broken += int(lost.sum())
+                    current = current[~lost]
+        return {'stops': stops, 'lengths': lengths, 'broken_links': broken, 'unfinished': unfinished}
+
+
+# fork 出的工作行程從父行程繼承的模擬器
+_worker: Dict[str, Any] = {}
+
+
+def _run_shard(shard: Tuple[int, Any, int]) -> Dict[str, Any]:
+    """在工作行程中模擬一部分遊玩"""
+    playthroughs, seed, batch_size = shard
+    return _worker['simulator'].run(playthroughs, seed, batch_size)
+
+
+def _percentile(lengths, fraction: float) -> int:
+    """由步數分布取得百分位數"""
+    cumulative = np.cumsum(lengths)
+    if cumulative[-1] == 0:
+        return 0
+    return int(np.searchsorted(cumulative, fraction * cumulative[-1]))
+
+
+def simulate(graph: StoryGraph, playthroughs: int = DEFAULT_PLAYTHROUGHS, weights=None,
+             workers: int = 1, seed: Optional[int] = None, max_steps: int = DEFAULT_MAX_STEPS,
+             batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    模擬大量遊玩並整理結局分布
+
+    Args:
+        graph: 故事圖
+        playthroughs: 遊玩次數
+        weights: 選項權重（見 choice_weights），未指定時均等
+        workers: 工作行程數，大於 1 時把遊玩平均分給 fork 出的工作行程
+        seed: 亂數種子，指定時結果可重現（與工作行程數有關）
+        max_steps: 單次遊玩的步數上限
+        batch_size: 每批同時模擬的遊玩數
+
+    Returns:
+        包含各結局次數與機率、未達成的結局、路徑長度與分數分布的字典
+
+    Raises:
+        ImportError: 沒有安裝 NumPy
+    """
+    started = time.perf_counter()
+    simulator = MonteCarloSimulator(graph, weights, max_steps)
+    shards = max(1, min(workers, playthroughs))
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    tasks = [(playthroughs // shards + (1 if i < playthroughs % shards else 0), seeds[i], batch_size)
+             for i in range(shards)]
+
+    if shards > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        _worker['simulator'] = simulator
+        try:
+            with multiprocessing.get_context('fork').Pool(shards) as pool:
+                results = pool.map(_run_shard, tasks)
+        finally:
+            _worker.clear()
+    else:
+        results = [simulator.run(*task) for task in tasks]
+
+    stops = sum(result['stops'] for result in results)
+    lengths = sum(result['lengths'] for result in results)
+    broken = sum(result['broken_links'] for result in results)
+    unfinished = sum(result['unfinished'] for result in results)
+
+    scene_ids = graph.scene_ids
+    endings: List[Dict[str, Any]] = []
+    never_reached: List[str] = []
+    dead_ends: Dict[str, int] = {}
+    scores: Dict[int, int] = {}
+    for scene in np.flatnonzero(simulator.terminal):
+        scene = int(scene)
+        count = int(stops[scene])
+        if not simulator.endings[scene]:
+            if count:
+                dead_ends[scene_ids[scene]] = count
+            continue
+        if not count:
+            never_reached.append(scene_ids[scene])
+            continue
+        score = int(simulator.scores[scene])
+        scores[score] = scores.get(score, 0) + count
+        endings.append({
+            'id': scene_ids[scene],
+            'count': count,
+            'probability': count / playthroughs,
+            'score': score
+        })
+    endings.sort(key=lambda ending: -ending['count'])
+
+    finished = int(lengths.sum())
+    ended = sum(ending['count'] for ending in endings)
+    elapsed = time.perf_counter() - started
+    return {
+        'playthroughs': playthroughs,
+        'endings': endings,
+        'never_reached': never_reached,
+        'dead_ends': dead_ends,
+        'broken_links': int(broken),
+        'unfinished': int(unfinished),
+        'mean_length': float(np.dot(np.arange(len(lengths)), lengths) / finished) if finished else 0.0,
+        'length_percentiles': {p: _percentile(lengths, p / 100) for p in (50, 90, 99)},
+        'mean_score': sum(score * count for score, count in scores.items()) / ended if ended else 0.0,
+        'score_distribution': dict(sorted(scores.items())),
+        'elapsed': elapsed,
+        'playthroughs_per_second': playthroughs / elapsed if elapsed > 0 else 0.0
+    }
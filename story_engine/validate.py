@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+增量故事驗證
+只重新檢查有變更的場景與其圖上的鄰近場景，故事包變大時驗證仍然即時
+
+每個場景的內容雜湊、檢查結果與出口，以及反向連結索引（每個場景被
+哪些場景連到）快取在建置目錄中。再次驗證時：
+
+- 整個檔案沒有變更：直接使用上次的結果，不解析 JSON
+- 內容有變更的場景：重新檢查格式、分數與連結
+- 新增或移除的場景：依反向索引重新檢查連到它的場景是否變成斷裂連結
+- 出口沒有變更：沿用上次的可達場景；只新增連結時從新連結往外擴展，
+  有連結被移除時才重新走訪整個故事圖
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import time
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .bundle import BUNDLE_SOURCES, content_hash, _write_atomic
+from .graph import StoryFormatError
+
+# 驗證快取目錄
+VALIDATION_DIR = os.path.join('build', 'validation')
+
+CACHE_VERSION = 1
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def check_scene(scene_id: str, scene: Any) -> Dict[str, Any]:
+    """
+    檢查單一場景本身（不含連結目標是否存在）
+
+    Returns:
+        快取項目：targets 為各選項的目標場景（格式錯誤的選項為 None），
+        ending 為是否是結局，issues 為 [等級, 種類, 訊息] 列表
+    """
+    issues: List[List[str]] = []
+    if not isinstance(scene, dict):
+        return {'targets': [], 'ending': False,
+                'issues': [['error', 'format', f"場景 {scene_id} 應該是字典格式"]]}
+
+    targets: List[Optional[str]] = []
+    choices = scene.get('choices', [])
+    if not isinstance(choices, list):
+        issues.append(['error', 'format', f"場景 {scene_id} 的 choices 應該是列表"])
+        choices = []
+    for i, choice in enumerate(choices):
+        if (not isinstance(choice, dict) or not isinstance(choice.get('option'), str)
+                or not isinstance(choice.get('next_scene'), str)):
+            issues.append(['error', 'format', f"場景 {scene_id} 的選擇 {i} 格式錯誤"])
+            targets.append(None)
+        else:
+            targets.append(choice['next_scene'])
+
+    ending = bool(scene.get('is_ending', False))
+    if ending and not isinstance(scene.get('outcome'), str):
+        issues.append(['error', 'format', f"結局場景 {scene_id} 缺少 outcome 欄位"])
+    if not ending and not targets:
+        issues.append(['warning', 'dead_end', f"場景 {scene_id} 不是結局但沒有任何選項"])
+
+    if 'score' in scene:
+        score = scene['score']
+        if not isinstance(score, int) or isinstance(score, bool):
+            issues.append(['error', 'score', f"場景 {scene_id} 的 score 應該是整數"])
+        elif not ending:
+            issues.append(['warning', 'score', f"場景 {scene_id} 不是結局，score 不會被計入"])
+        elif score < 0:
+            issues.append(['warning', 'score', f"結局場景 {scene_id} 的 score 是負數"])
+    return {'targets': targets, 'ending': ending, 'issues': issues}
+
+
+def _exits(entry: Dict[str, Any]) -> Set[str]:
+    """遊玩時可以從場景前往的目標（結局場景沒有後續）"""
+    if entry['ending']:
+        return set()
+    return set(entry['targets']) - {None}
+
+
+def parse_scenes(text: str) -> Iterator[Tuple[str, Any, str]]:
+    """
+    逐一解析最外層物件中的場景，同時取得每個場景在原始文字中的片段
+
+    只重新檢查原始文字有變更的場景，不需要為了計算雜湊再把每個場景
+    序列化一次。
+
+    Yields:
+        (場景 ID, 場景資料, 原始 JSON 片段)
+
+    Raises:
+        ValueError: JSON 格式錯誤或最外層不是物件
+    """
+    decoder = json.JSONDecoder()
+    position = _WHITESPACE.match(text, 0).end()
+    if text[position:position + 1] != '{':
+        raise ValueError("最外層應該是物件")
+    position = _WHITESPACE.match(text, position + 1).end()
+    if text[position:position + 1] == '}':
+        position += 1
+    else:
+        while True:
+            scene_id, position = decoder.raw_decode(text, position)
+            if not isinstance(scene_id, str):
+                raise ValueError(f"場景 ID 應該是字串: 位置 {position}")
+            position = _WHITESPACE.match(text, position).end()
+            if text[position:position + 1] != ':':
+                raise ValueError(f"缺少冒號: 位置 {position}")
+            position = _WHITESPACE.match(text, position + 1).end()
+            scene, end = decoder.raw_decode(text, position)
+            yield scene_id, scene, text[position:end]
+            position = _WHITESPACE.match(text, end).end()
+            delimiter = text[position:position + 1]
+            position = _WHITESPACE.match(text, position + 1).end()
+            if delimiter == '}':
+                break
+            if delimiter != ',':
+                raise ValueError(f"缺少逗號: 位置 {position}")
+    if position != len(text):
+        raise ValueError(f"物件後有多餘的資料: 位置 {position}")
+
+
+class IncrementalValidator:
+    """以快取增量驗證單一故事檔"""
+
+    def __init__(self, path: str, start: Optional[str] = None, cache_dir: str = VALIDATION_DIR):
+        """
+        初始化驗證器
+
+        Args:
+            path: 故事 JSON 路徑
+            start: 起始場景 ID，未指定時為 start，沒有 start 場景時為第一個場景
+            cache_dir: 存放驗證快取的目錄
+        """
+        self.path = path
+        self.start = start
+        key = content_hash(os.path.normpath(path).encode('utf-8'))[:16]
+        # 摘要只有來源雜湊與上次的結果，檔案沒有變更時只需要讀取摘要
+        self.summary_path = os.path.join(cache_dir, f"{key}.json")
+        self.index_path = os.path.join(cache_dir, f"{key}.scenes.json")
+
+    @staticmethod
+    def _load(path: str) -> Optional[Dict[str, Any]]:
+        """載入快取檔案，格式不符時視為沒有快取"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+            return None
+        return cache
+
+    def validate(self, force: bool = False) -> Dict[str, Any]:
+        """
+        驗證故事檔並更新快取
+
+        Args:
+            force: 忽略快取，重新檢查所有場景
+
+        Returns:
+            驗證結果字典：status 為 cached（檔案沒有變更）、incremental 或
+            full；checked 為重新檢查的場景數；errors 與 warnings 為訊息列表；
+            newly_unreachable 為這次變更後才無法到達的結局
+
+        Raises:
+            OSError: 無法讀取檔案
+            StoryFormatError: 不是有效的 JSON 或不是場景格式的故事
+        """
+        started = time.perf_counter()
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        source_hash = content_hash(raw)
+
+        if not force:
+            summary = self._load(self.summary_path)
+            if summary is not None and summary['source_hash'] == source_hash:
+                return self._result(summary['result'], 'cached', [], [], 0, [], started)
+        index = None if force else self._load(self.index_path)
+
+        old_scenes: Dict[str, Dict[str, Any]] = index['scenes'] if index else {}
+        scenes: Dict[str, Dict[str, Any]] = {}
+        changed: List[str] = []
+        try:
+            for scene_id, scene, source in parse_scenes(raw.decode('utf-8-sig')):
+                scene_hash = content_hash(source.encode('utf-8'))
+                entry = old_scenes.get(scene_id)
+                if entry is None or entry['hash'] != scene_hash:
+                    entry = check_scene(scene_id, scene)
+                    entry['hash'] = scene_hash
+                    changed.append(scene_id)
+                scenes[scene_id] = entry
+        except ValueError as e:
+            raise StoryFormatError(f"{self.path}: JSON 格式錯誤: {e}")
+        if not scenes:
+            raise StoryFormatError(f"{self.path}: 故事資料應該是非空的字典")
+        start = self.start or ('start' if 'start' in scenes else next(iter(scenes)))
+        removed = [scene_id for scene_id in old_scenes if scene_id not in scenes]
+        added = [scene_id for scene_id in changed if scene_id not in old_scenes]
+
+        # 更新反向連結索引：目標場景 -> 連到它的場景
+        sources: Dict[str, List[str]] = index['sources'] if index else {}
+        for scene_id in changed + removed:
+            old = old_scenes.get(scene_id)
+            if old is None:
+                continue
+            for target in set(old['targets']) - {None}:
+                remaining = [source for source in sources.get(target, ()) if source != scene_id]
+                if remaining:
+                    sources[target] = remaining
+                else:
+                    sources.pop(target, None)
+        for scene_id in changed:
+            for target in set(scenes[scene_id]['targets']) - {None}:
+                sources.setdefault(target, []).append(scene_id)
+
+        # 連到新增或移除場景的連結可能變成（或不再是）斷裂連結
+        affected = set(changed)
+        for scene_id in added + removed:
+            affected.update(sources.get(scene_id, ()))
+        for scene_id in affected:
+            entry = scenes.get(scene_id)
+            if entry is not None:
+                entry['broken'] = [[i, target] for i, target in enumerate(entry['targets'])
+                                   if target is not None and target not in scenes]
+
+        previous = set(index['reachable']) if index else set()
+        if start not in scenes:
+            reachable: Set[str] = set()
+        elif index is None or removed or index['start'] != start:
+            reachable = _extend(scenes, set(), [start])
+        else:
+            reachable = _extend_changed(scenes, start, old_scenes, sources, changed, added, previous)
+
+        result = _summarize(scenes, start, reachable)
+        # 先寫場景索引再寫摘要；中途失敗時摘要的來源雜湊不符，下次會重新比對場景
+        _write_atomic(self.index_path, json.dumps({
+            'version': CACHE_VERSION,
+            'start': start,
+            'scenes': scenes,
+            'sources': sources,
+            'reachable': sorted(reachable)
+        }, ensure_ascii=False).encode('utf-8'))
+        _write_atomic(self.summary_path, json.dumps({
+            'version': CACHE_VERSION,
+            'source_hash': source_hash,
+            'result': result
+        }, ensure_ascii=False).encode('utf-8'))
+
+        # 上次可以到達或新增的結局若現在無法到達，屬於這次造成的問題
+        newly = [scene_id for scene_id in result['unreachable_endings']
+                 if scene_id in previous or scene_id not in old_scenes]
+        return self._result(result, 'incremental' if old_scenes else 'full', changed, removed,
+                            len(affected), newly, started)
+
+    def _result(self, result: Dict[str, Any], status: str, changed: List[str], removed: List[str],
+                checked: int, newly: List[str], started: float) -> Dict[str, Any]:
+        """組合驗證結果"""
+        return {
+            'path': self.path,
+            'status': status,
+            'scenes': result['scenes'],
+            'changed': changed,
+            'removed': removed,
+            'checked': checked,
+            'errors': result['errors'],
+            'warnings': result['warnings'],
+            'broken_links': [tuple(link) for link in result['broken_links']],
+            'unreachable_endings': result['unreachable_endings'],
+            'newly_unreachable': newly,
+            'elapsed': time.perf_counter() - started
+        }
+
+
+def _extend(scenes: Dict[str, Dict[str, Any]], reachable: Set[str], frontier: Iterable[str]) -> Set[str]:
+    """從 frontier 沿著連結擴展可達場景"""
+    stack = [scene_id for scene_id in frontier if scene_id in scenes and scene_id not in reachable]
+    reachable.update(stack)
+    while stack:
+        for target in _exits(scenes[stack.pop()]):
+            if target not in reachable and target in scenes:
+                reachable.add(target)
+                stack.append(target)
+    return reachable
+
+
+def _extend_changed(scenes: Dict[str, Dict[str, Any]], start: str, old_scenes: Dict[str, Dict[str, Any]],
+                    sources: Dict[str, List[str]], changed: List[str], added: List[str],
+                    previous: Set[str]) -> Set[str]:
+    """
+    沿用上次的可達場景，只從變更的場景往外擴展
+
+    只要有任何出口被移除，就可能有場景不再可達，改為從起始場景重新走訪。
+    """
+    frontier: List[str] = []
+    for scene_id in changed:
+        old = old_scenes.get(scene_id)
+        exits = _exits(scenes[scene_id])
+        if old is not None and not _exits(old) <= exits:
+            return _extend(scenes, set(), [start])
+        if scene_id in previous:
+            frontier.extend(exits)
+    # 新增的場景若有可達的場景連到它，也會變成可達
+    for scene_id in added:
+        if any(source in previous for source in sources.get(scene_id, ())):
+            frontier.append(scene_id)
+    return _extend(scenes, set(previous), frontier)
+
+
+def _summarize(scenes: Dict[str, Dict[str, Any]], start: str, reachable: Set[str]) -> Dict[str, Any]:
+    """彙整所有場景的檢查結果"""
+    errors: List[str] = []
+    warnings: List[str] = []
+    broken_links = []
+    unreachable = []
+    if start not in scenes:
+        errors.append(f"缺少起始場景: {start}")
+    for scene_id, entry in scenes.items():
+        for level, _, message in entry['issues']:
+            (errors if level == 'error' else warnings).append(message)
+        for choice, target in entry['broken']:
+            broken_links.append([scene_id, choice, target])
+            errors.append(f"場景 {scene_id} 連接到不存在的場景: {target}")
+        if entry['ending'] and scene_id not in reachable:
+            unreachable.append(scene_id)
+            errors.append(f"結局場景 {scene_id} 無法從 {start} 到達")
+    return {
+        'scenes': len(scenes),
+        'errors': errors,
+        'warnings': warnings,
+        'broken_links': broken_links,
+        'unreachable_endings': unreachable
+    }
+
+
+def validate_stories(paths: Iterable[str] = BUNDLE_SOURCES, force: bool = False,
+                     cache_dir: str = VALIDATION_DIR) -> List[Dict[str, Any]]:
+    """增量驗證多個故事檔，回傳各檔案的驗證結果"""
+    return [IncrementalValidator(path, cache_dir=cache_dir).validate(force=force) for path in paths]
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+效能基準測試套件的測試
+以最小的資料量確認每個項目都能離線執行，以及基準比較的判定
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# 添加 scripts 目錄到 Python 路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from benchmark_suite import BENCHMARKS, compare, merge_baseline, run_suite
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """測試效能基準測試套件"""
+
+    def test_every_benchmark_runs_offline(self):
+        """測試每個項目在最小資料量下都能執行並回傳時間"""
+        with patch.dict(BENCHMARKS, {
+            name: (setup, (10,)) for name, (setup, _) in BENCHMARKS.items()
+        }):
+            suite = run_suite(repeat=1)
+        self.assertEqual([result['name'] for result in suite['results']], list(BENCHMARKS))
+        self.assertTrue(all(result['best'] > 0 for result in suite['results']))
+        self.assertGreater(suite['calibration'], 0)
+
+    def test_compare_scales_by_calibration(self):
+        """測試比較時以校準時間換算，超過門檻才算退化"""
+        baseline = {'calibration': 1.0, 'results': [
+            {'name': 'load_stories', 'size': 10, 'best': 1.0},
+            {'name': 'monthly_stats', 'size': 10, 'best': 1.0}
+        ]}
+        suite = {'calibration': 2.0, 'results': [
+            {'name': 'load_stories', 'size': 10, 'best': 2.5},
+            {'name': 'monthly_stats', 'size': 10, 'best': 3.5},
+            {'name': 'scenario_check', 'size': 10, 'best': 9.0}
+        ]}
+        comparison = compare(suite, baseline, threshold=0.5)
+        self.assertEqual([(item['name'], item['regressed']) for item in comparison],
+                         [('load_stories', False), ('monthly_stats', True)])
+
+        merged = merge_baseline(baseline, {'calibration': 2.0, 'results': suite['results'][:1]})
+        self.assertEqual(merged['results'][1], {'name': 'monthly_stats', 'size': 10, 'best': 2.0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -31,7 +31,7 @@ class TestGitHubAPI(unittest.TestCase):
         self.owner = "test_owner"
         self.repo = "test_repo"
     
-    @patch('requests.get')
+    @patch('github_http.HTTPTransport.get')
     def test_get_repo_info(self, mock_get):
         """測試獲取倉庫資訊"""
         # 模擬 API 回應
@@ -52,7 +52,7 @@ class TestGitHubAPI(unittest.TestCase):
         self.assertEqual(result['full_name'], 'test_owner/test_repo')
         mock_get.assert_called_once()
     
-    @patch('requests.get')
+    @patch('github_http.HTTPTransport.get')
     def test_get_contributors(self, mock_get):
         """測試獲取貢獻者列表"""
         # 模擬 API 回應
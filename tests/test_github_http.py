@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共用 HTTP 傳輸層測試
+以本機 HTTP 伺服器確認連線重複使用、預設逾時、條件式請求快取、分頁下載與速率限制排程
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+# 添加 scripts 目錄到 Python 路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from community_reporter.github_client import _created_before
+from github_cache import ResponseCache
+from github_http import HTTPTransport, get_transport, set_transport
+from github_pagination import paginate
+from github_ratelimit import BATCH, INTERACTIVE, RateLimitScheduler, TokenBucket
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """回傳請求路徑與資料版本的 JSON，保持連線；ETag 相符時回傳 304"""
+
+    protocol_version = 'HTTP/1.1'
+    # 路徑 -> 資料版本，測試中修改以模擬資料變更
+    versions = {}
+    conditional_requests = 0
+    # /list 分頁端點：項目總數、是否回傳 Link 標頭、請求的頁碼與同時處理的最大請求數
+    list_total = 0
+    list_links = True
+    list_pages = []
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+    # /limited 端點：之後幾次請求回傳次要速率限制的 403
+    limited_responses = 0
+
+    def do_GET(self):
+        if self.path.startswith('/list'):
+            self.send_list()
+            return
+        if self.path.startswith('/limited') and self.limited_responses > 0:
+            type(self).limited_responses -= 1
+            body = b'{"message": "You have exceeded a secondary rate limit."}'
+            self.send_response(403)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        version = self.versions.get(self.path.split('?')[0], 1)
+        etag = f'"{self.path}-{version}"'
+        if self.headers.get('If-None-Match') is not None:
+            type(self).conditional_requests += 1
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'path': self.path, 'version': version}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_list(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        time.sleep(0.02)
+        query = parse_qs(urlsplit(self.path).query)
+        page, per_page = int(query['page'][0]), int(query['per_page'][0])
+        start = (page - 1) * per_page
+        items = [{'id': i} for i in range(start, min(start + per_page, cls.list_total))]
+        body = json.dumps(items).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        last = max(1, -(-cls.list_total // per_page))
+        if cls.list_links and page < last:
+            self.send_header('Link', f'<http://127.0.0.1/list?per_page={per_page}&page={last}>; rel="last"')
+        self.end_headers()
+        self.wfile.write(body)
+        with cls.lock:
+            cls.in_flight -= 1
+            cls.list_pages.append(page)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPTransport(unittest.TestCase):
+    """測試共用 HTTP 傳輸層"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_connections_are_reused(self):
+        """測試連續的請求重複使用同一個連線"""
+        transport = HTTPTransport()
+        try:
+            for page in range(1, 6):
+                response = transport.get(f"{self.base_url}/items", params={'page': page})
+                self.assertEqual(response.json()['path'], f'/items?page={page}')
+            stats = transport.connection_stats()
+        finally:
+            transport.close()
+        self.assertEqual(stats['requests'], 5)
+        self.assertEqual(stats['connections'], {'127.0.0.1': 1})
+
+    def test_default_timeout(self):
+        """測試未指定逾時時套用預設值，指定時保留"""
+        transport = HTTPTransport(timeout=(1.0, 2.0))
+        with patch.object(transport.session, 'request') as mock_request:
+            transport.get('https://api.github.com/repos/a/b')
+            transport.post('https://discord.com/api/webhooks/x', json={}, timeout=9)
+        self.assertEqual(mock_request.call_args_list[0].kwargs['timeout'], (1.0, 2.0))
+        self.assertEqual(mock_request.call_args_list[1].kwargs['timeout'], 9)
+
+    def test_conditional_requests(self):
+        """測試未變更的資料以 304 回應並使用快取，變更後重新下載，快取跨執行保留"""
+        _Handler.versions['/pulls'] = 1
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'http.sqlite')
+            transport = HTTPTransport(cache=ResponseCache(path))
+            url = f"{self.base_url}/pulls"
+            headers = {'Authorization': 'token a'}
+            first = transport.get(url, params={'page': 1}, headers=headers)
+            self.assertEqual(first.json()['version'], 1)
+            self.assertFalse(getattr(first, 'from_cache', False))
+            transport.close()
+
+            transport = HTTPTransport(cache=ResponseCache(path))
+            before = _Handler.conditional_requests
+            second = transport.get(url, params={'page': 1}, headers=headers)
+            self.assertEqual(_Handler.conditional_requests, before + 1)
+            self.assertTrue(second.from_cache)
+            self.assertEqual((second.status_code, second.json()), (200, first.json()))
+
+            # 其他權杖不共用快取
+            transport.get(url, params={'page': 1}, headers={'Authorization': 'token b'})
+            self.assertEqual(_Handler.conditional_requests, before + 1)
+
+            _Handler.versions['/pulls'] = 2
+            third = transport.get(url, params={'page': 1}, headers=headers)
+            self.assertEqual(third.json()['version'], 2)
+            self.assertTrue(transport.get(url, params={'page': 1}, headers=headers).from_cache)
+            stats = transport.cache.stats()
+            transport.close()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (2, 2, 2))
+
+    def test_lru_eviction(self):
+        """測試超過筆數上限時淘汰最久未使用的項目"""
+        transport = HTTPTransport(cache=ResponseCache(':memory:', max_entries=2))
+        try:
+            for name in ('a', 'b', 'a', 'c', 'a', 'b'):
+                transport.get(f"{self.base_url}/{name}")
+            stats = transport.cache.stats()
+        finally:
+            transport.close()
+        # a 一直被使用，b 在 c 寫入時被淘汰，c 在 b 重新寫入時被淘汰
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['entries']), (2, 4, 2, 2))
+
+    def test_shared_transport(self):
+        """測試共用的傳輸層只建立一次，可以替換"""
+        previous = set_transport(None)
+        try:
+            with patch.dict(os.environ, {'GITHUB_HTTP_CACHE': 'off'}):
+                self.assertIs(get_transport(), get_transport())
+            self.assertIsNone(get_transport().cache)
+            replacement = HTTPTransport()
+            set_transport(replacement)
+            self.assertIs(get_transport(), replacement)
+        finally:
+            set_transport(previous)
+
+
+class TestPagination(unittest.TestCase):
+    """測試分頁引擎"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}/list"
+        cls.transport = HTTPTransport()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.transport.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _Handler.list_links = True
+        _Handler.list_pages = []
+        _Handler.max_in_flight = 0
+
+    def test_pages_fetched_concurrently_in_order(self):
+        """測試其餘頁面同時下載、依序合併，不會多請求空白頁"""
+        _Handler.list_total = 950
+        items = paginate(self.transport, self.url)
+        self.assertEqual([item['id'] for item in items], list(range(950)))
+        self.assertEqual(sorted(_Handler.list_pages), list(range(1, 11)))
+        self.assertGreater(_Handler.max_in_flight, 1)
+
+        _Handler.list_pages = []
+        self.assertEqual(len(paginate(self.transport, self.url, max_items=250)), 250)
+        self.assertEqual(sorted(_Handler.list_pages), [1, 2, 3])
+
+    def test_cutoff_stops_early(self):
+        """測試遇到截止條件後不再下載後續頁面，並依條件篩選項目"""
+        _Handler.list_total = 1000
+        items = paginate(self.transport, self.url, params={'per_page': 50},
+                         select=lambda item: item['id'] % 2 == 0, cutoff=lambda item: item['id'] >= 120)
+        self.assertEqual([item['id'] for item in items], list(range(0, 120, 2)))
+        # 批次為 1、1、2 頁：截止頁（第 3 頁）之後最多多下載同一批的一頁
+        self.assertEqual(sorted(_Handler.list_pages), [1, 2, 3, 4])
+
+        _Handler.list_pages = []
+        paginate(self.transport, self.url, params={'per_page': 50}, cutoff=lambda item: item['id'] >= 50)
+        self.assertEqual(sorted(_Handler.list_pages), [1, 2])
+
+    def test_created_before_accepts_naive_since(self):
+        """測試分析器傳入沒有時區的 since 時也能與 GitHub 的 UTC 時間比較"""
+        cutoff = _created_before(datetime.now() - timedelta(days=30))
+        self.assertFalse(cutoff({'created_at': (datetime.now(timezone.utc) - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')}))
+        self.assertTrue(cutoff({'created_at': '2020-01-01T00:00:00Z'}))
+
+    def test_without_link_header(self):
+        """測試沒有 Link 標頭時逐頁下載，遇到不滿一頁時停止"""
+        _Handler.list_total = 250
+        _Handler.list_links = False
+        self.assertEqual(len(paginate(self.transport, self.url)), 250)
+        self.assertEqual(_Handler.list_pages, [1, 2, 3])
+        self.assertEqual(_Handler.max_in_flight, 1)
+
+
+
+class TestRateLimit(unittest.TestCase):
+    """測試速率限制排程"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_secondary_rate_limit_is_retried(self):
+        """測試次要速率限制的 403 等待後重試，一般的 403 與超過重試次數時直接回傳"""
+        scheduler = RateLimitScheduler(hosts=('127.0.0.1',), max_retries=2, jitter=0.01)
+        transport = HTTPTransport(scheduler=scheduler)
+        try:
+            _Handler.limited_responses = 2
+            response = transport.get(f"{self.base_url}/limited")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(scheduler.stats()['retries'], 2)
+
+            _Handler.limited_responses = 3
+            self.assertEqual(transport.get(f"{self.base_url}/limited").status_code, 403)
+            self.assertEqual(scheduler.stats()['requests'], 6)
+        finally:
+            _Handler.limited_responses = 0
+            transport.close()
+
+        forbidden = requests.Response()
+        forbidden.status_code = 403
+        forbidden._content = b'{"message": "Resource not accessible by integration"}'
+        self.assertIsNone(scheduler.retry_delay(forbidden, 0))
+        forbidden.headers['X-RateLimit-Remaining'] = '0'
+        forbidden.headers['X-RateLimit-Reset'] = str(int(time.time()) + 30)
+        self.assertGreater(scheduler.retry_delay(forbidden, 0), 25)
+
+    def test_interactive_fails_fast(self):
+        """測試互動式請求最多重試一次，需要長時間等待時直接回傳"""
+        scheduler = RateLimitScheduler(hosts=('127.0.0.1',), jitter=0.01)
+        transport = HTTPTransport(scheduler=scheduler)
+        try:
+            _Handler.limited_responses = 3
+            response = transport.get(f"{self.base_url}/limited", priority=INTERACTIVE)
+            self.assertEqual(response.status_code, 403)
+            self.assertEqual(scheduler.stats()['requests'], 2)
+        finally:
+            _Handler.limited_responses = 0
+            transport.close()
+
+        limited = requests.Response()
+        limited.status_code = 429
+        limited.headers['Retry-After'] = '60'
+        started = time.monotonic()
+        self.assertIs(scheduler.send(lambda: limited, 'https://example.com/', priority=INTERACTIVE), limited)
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(scheduler.stats()['retries'], 1)
+
+    def test_buckets_per_token_and_resource(self):
+        """測試 search 與 core、不同權杖各自限速，其他主機不限速"""
+        scheduler = RateLimitScheduler()
+        headers = {'Authorization': 'token a'}
+        search = scheduler.bucket(headers, scheduler.resource('https://api.github.com/search/issues'))
+        self.assertEqual(search.capacity, 30)
+        self.assertIsNot(search, scheduler.bucket({'Authorization': 'token b'}, 'search'))
+        self.assertEqual(scheduler.resource('https://api.github.com/repos/a/b/pulls'), 'core')
+        self.assertIsNone(scheduler.resource('https://discord.com/api/webhooks/x'))
+
+    def test_bucket_throttles_and_syncs(self):
+        """測試權杖用完時等待補充，伺服器回報配額用完時暫停到重設時間"""
+        bucket = TokenBucket(2, 0.2)
+        self.assertLess(bucket.acquire(), 0.01)
+        bucket.acquire()
+        self.assertGreater(bucket.acquire(), 0.05)
+
+        bucket = TokenBucket(100, 1.0)
+        bucket.sync(0, time.time() + 0.2)
+        self.assertGreater(bucket.acquire(), 0.1)
+
+    def test_interactive_preempts_batch(self):
+        """測試排隊時互動式請求排在批次請求之前"""
+        bucket = TokenBucket(1, 0.3)
+        bucket.acquire()
+        order = []
+
+        def worker(name, priority):
+            bucket.acquire(priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=worker, args=('batch-1', BATCH)),
+                   threading.Thread(target=worker, args=('batch-2', BATCH)),
+                   threading.Thread(target=worker, args=('interactive', INTERACTIVE))]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.03)
+        for thread in threads:
+            thread.join()
+        self.assertEqual(order, ['interactive', 'batch-1', 'batch-2'])
+
+
+if __name__ == "__main__":
+    unittest.main()
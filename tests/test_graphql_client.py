@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+GraphQL 客戶端測試
+以模擬的傳輸層確認批次查詢、游標分頁與 REST 欄位格式的轉換
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import json
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+import requests
+
+# 添加 scripts 目錄到 Python 路徑
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from community_reporter import ContributionAnalyzer, GraphQLClient
+from community_reporter.graphql_client import GraphQLError
+
+
+def _pr(number, day, merged=True):
+    return {
+        'number': number, 'title': f'Add scene {number}', 'url': f'https://github.com/o/r/pull/{number}',
+        'state': 'MERGED' if merged else 'OPEN', 'createdAt': f'2026-10-{day:02d}T00:00:00Z',
+        'mergedAt': f'2026-10-{day:02d}T12:00:00Z' if merged else None, 'closedAt': None,
+        'changedFiles': 4, 'additions': 10, 'deletions': 2, 'author': {'login': f'user{number % 3}'},
+        'labels': {'nodes': [{'name': 'feature'}]}, 'comments': {'totalCount': 2}
+    }
+
+
+def _issue(number, day):
+    return {
+        'number': number, 'title': f'Bug {number}', 'url': f'https://github.com/o/r/issues/{number}',
+        'state': 'OPEN', 'createdAt': f'2026-10-{day:02d}T00:00:00Z', 'closedAt': None,
+        'author': None, 'labels': {'nodes': []}, 'comments': {'totalCount': 1}
+    }
+
+
+def _commit(number):
+    return {
+        'oid': f'{number:040x}', 'url': f'https://github.com/o/r/commit/{number}', 'message': 'Update',
+        'authoredDate': '2026-10-10T00:00:00Z', 'committedDate': '2026-10-10T00:00:00Z',
+        'author': {'name': 'A', 'email': 'a@example.com', 'user': {'login': 'user1'}}
+    }
+
+
+class _FakeTransport:
+    """依查詢變數中的游標回傳下一頁的 GraphQL 傳輸層"""
+
+    def __init__(self, connections, page_size):
+        self.connections = connections
+        self.page_size = page_size
+        self.queries = []
+
+    def post(self, url, json=None, headers=None):
+        self.queries.append(json)
+        cursors = {'pullRequests': 'prCursor', 'issues': 'issueCursor', 'history': 'commitCursor'}
+        repository = {}
+        for field, cursor in cursors.items():
+            if f'${cursor}:' not in json['query']:
+                continue
+            start = int(json['variables'][cursor] or 0)
+            nodes = self.connections[field][start:start + self.page_size]
+            end = start + len(nodes)
+            connection = {'nodes': nodes, 'pageInfo': {'hasNextPage': end < len(self.connections[field]),
+                                                       'endCursor': str(end)}}
+            if field == 'history':
+                repository['defaultBranchRef'] = {'target': {'history': connection}}
+            else:
+                repository[field] = connection
+        return _response({'data': {'repository': repository}})
+
+
+def _response(body):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(body).encode('utf-8')
+    return response
+
+
+class TestGraphQLClient(unittest.TestCase):
+    """測試 GraphQL 客戶端"""
+
+    def setUp(self):
+        # PR 與 Issue 由新到舊，10 月 5 日以前的項目早於 since
+        self.transport = _FakeTransport({
+            'pullRequests': [_pr(n, 30 - n) for n in range(1, 30)],
+            'issues': [_issue(n, 30 - n) for n in range(1, 8)],
+            'history': [_commit(n) for n in range(12)]
+        }, page_size=5)
+        self.client = GraphQLClient(token='t', transport=self.transport, page_size=5)
+        self.since = datetime(2026, 10, 5, tzinfo=timezone.utc)
+
+    def test_batched_cursor_pagination(self):
+        """測試三種資料在同一個查詢中分頁，完成的連線不再查詢，遇到 since 以前的項目停止"""
+        prs = self.client.get_pull_requests('o', 'r', since=self.since)
+        issues = self.client.get_issues('o', 'r', since=self.since)
+        commits = self.client.get_commits('o', 'r', since=self.since)
+
+        self.assertEqual([pr['number'] for pr in prs], list(range(1, 26)))
+        self.assertEqual(len(issues), 7)
+        self.assertEqual(len(commits), 12)
+        # 5 頁 PR（第 6 頁在 since 處停止），後續查詢只包含 PR
+        self.assertEqual(self.client.query_count, 6)
+        self.assertNotIn('$issueCursor', self.transport.queries[-1]['query'])
+        self.assertNotIn('$since', self.transport.queries[-1]['query'])
+        self.assertEqual(self.transport.queries[1]['variables']['issueCursor'], '5')
+
+    def test_rest_compatible_fields(self):
+        """測試轉換成 REST 欄位格式，PR 包含檔案變更數與評論數"""
+        pr = self.client.get_pull_requests('o', 'r', since=self.since)[0]
+        self.assertEqual((pr['state'], pr['user'], pr['changed_files'], pr['comments']),
+                         ('closed', {'login': 'user1'}, 4, 2))
+        self.assertEqual(pr['labels'], [{'name': 'feature'}])
+        self.assertEqual(self.client.get_issues('o', 'r', since=self.since)[0]['user'], {'login': 'ghost'})
+        commit = self.client.get_commits('o', 'r', since=self.since)[0]
+        self.assertEqual(commit['author'], {'login': 'user1'})
+        self.assertEqual(self.client.get_pull_requests('o', 'r', state='open', since=self.since), [])
+
+    def test_feeds_contribution_analyzer(self):
+        """測試分析器的三次呼叫共用同一批查詢結果"""
+        analysis = ContributionAnalyzer(self.client, 'o', 'r').analyze_period(days=10000)
+        stats = analysis['overall_stats']
+        self.assertEqual((stats['total_prs'], stats['merged_prs'], stats['total_issues'], stats['total_commits']),
+                         (29, 29, 7, 12))
+        self.assertEqual(self.client.query_count, 6)
+
+    def test_errors_are_raised(self):
+        """測試查詢錯誤時拋出 GraphQLError"""
+        self.transport.post = lambda url, json=None, headers=None: _response(
+            {'errors': [{'message': 'Could not resolve to a Repository'}]})
+        with self.assertRaises(GraphQLError):
+            self.client.get_issues('o', 'missing')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -278,7 +278,7 @@ class TestAnnouncementSystem(unittest.TestCase):
         self.assertIn('最佳劇情獎', announcement)
         self.assertIn('活躍貢獻者: 2 人', announcement)
     
-    @patch('requests.post')
+    @patch('github_http.HTTPTransport.post')
     def test_publish_to_discord(self, mock_post):
         """測試發布到 Discord"""
         # 設定環境變數
@@ -84,8 +84,8 @@ class TestPriorityManager(unittest.TestCase):
         self.assertEqual(final_priority['level'], 'urgent')
         self.assertEqual(final_priority['color'], 'ff0000')
     
-    @patch('requests.post')
-    @patch('requests.get')
+    @patch('github_http.HTTPTransport.post')
+    @patch('github_http.HTTPTransport.get')
     def test_set_pr_priority(self, mock_get, mock_post):
         """測試設定 PR 優先級"""
         # 模擬 API 回應
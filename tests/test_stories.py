@@ -199,8 +199,8 @@ class TestGameLogic(unittest.TestCase):
         self.game.visited_scenes.add("start")
         
         # 重新開始
-        with patch('builtins.print'), patch.object(self.game, 'play', return_value=None):
-            self.game.restart_game()
+        with patch('builtins.print'):
+            self.game.reset_state()
         
         self.assertEqual(self.game.current_scene, "start")
         self.assertEqual(self.game.score, 0)
@@ -0,0 +1,1279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tsext Adventure 故事引擎測試
+測試故事圖編譯與場景轉移
+
+作者: Tsext Adventure Team
+授權: MIT License
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from story_engine import (
+    StoryGraph, StoryFormatError, compile_story, NO_SCENE,
+    GameSession, SessionManager, SessionError, StoryServer,
+    load_story, load_story_data, clear_cache, open_pack, write_pack, StoryRegistry
+)
+from story_engine.achievements import AchievementEngine, AchievementError, load_achievements
+from story_engine.analysis import StoryAnalyzer, analyze_story
+from story_engine.binary import default_binary_path, load_binary, write_binary
+from story_engine.bundle import BundleBuilder
+from story_engine.frames import FrameCache, clear_frame_caches, frame_cache
+from story_engine.generate import StoryGenerator, generate_story
+from story_engine.jsliteral import JSLiteralError, extract_variable, parse_literal
+from story_engine.markov import AbsorbingChain, absorption_analysis
+from story_engine.progress import PlayerProgress, ProgressError, ProgressLayout, ProgressStore
+from story_engine.replay import ReplayError, SessionRecorder, choice_counts, replay_log
+from story_engine.simulate import MonteCarloSimulator, choice_weights, simulate
+from story_engine.validate import IncrementalValidator
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+SAMPLE_STORY = {
+    'start': {
+        'title': '開始',
+        'description': '你站在門口',
+        'choices': [
+            {'option': '進門', 'next_scene': 'hall'},
+            {'option': '離開', 'next_scene': 'bye'}
+        ]
+    },
+    'hall': {
+        'title': '大廳',
+        'choices': [
+            {'option': '回頭', 'next_scene': 'start'}
+        ]
+    },
+    'bye': {
+        'title': '再見',
+        'outcome': '你回家了',
+        'is_ending': True,
+        'score': 30
+    }
+}
+
+
+class TestCompileStory(unittest.TestCase):
+    """測試故事圖編譯"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.graph = compile_story(SAMPLE_STORY)
+
+    def test_scene_indices(self):
+        """測試場景 ID 轉換為整數索引"""
+        self.assertEqual(len(self.graph), 3)
+        self.assertEqual(self.graph.start, self.graph.index_of('start'))
+        self.assertEqual(self.graph.index_of('nonexistent'), NO_SCENE)
+        self.assertIn('hall', self.graph)
+
+    def test_transitions(self):
+        """測試場景轉移"""
+        start = self.graph.start
+        self.assertEqual(self.graph.choice_count(start), 2)
+        self.assertEqual(self.graph.choice_options(start), ('進門', '離開'))
+        self.assertEqual(self.graph.next_scene(start, 0), self.graph.index_of('hall'))
+        self.assertEqual(self.graph.next_scene(start, 1), self.graph.index_of('bye'))
+        self.assertEqual(self.graph.next_scene(start, 2), NO_SCENE)
+        self.assertEqual(list(self.graph.successors(start)),
+                         [self.graph.index_of('hall'), self.graph.index_of('bye')])
+
+    def test_endings_and_scores(self):
+        """測試結局旗標與分數"""
+        bye = self.graph.index_of('bye')
+        self.assertTrue(self.graph.is_ending(bye))
+        self.assertFalse(self.graph.has_choices(bye))
+        self.assertEqual(self.graph.scores[bye], 30)
+        self.assertEqual(self.graph.outcomes[bye], '你回家了')
+        self.assertEqual(self.graph.ending_indices(), [bye])
+
+    def test_broken_link(self):
+        """測試斷裂連結"""
+        story = dict(SAMPLE_STORY)
+        story['hall'] = {'choices': [{'option': '迷路', 'next_scene': 'nowhere'}]}
+
+        with self.assertRaises(StoryFormatError):
+            compile_story(story)
+
+        graph = compile_story(story, strict=False)
+        self.assertEqual(graph.next_scene(graph.index_of('hall'), 0), NO_SCENE)
+        self.assertEqual(graph.broken_links, (('hall', 0, 'nowhere'),))
+
+    def test_invalid_data(self):
+        """測試格式錯誤的故事資料"""
+        with self.assertRaises(StoryFormatError):
+            compile_story({})
+        with self.assertRaises(StoryFormatError):
+            compile_story({'start': []})
+        with self.assertRaises(StoryFormatError):
+            compile_story({'start': {'choices': [{'option': '缺少目標'}]}})
+        with self.assertRaises(StoryFormatError):
+            compile_story({'other': {}})
+
+    def test_empty_graph(self):
+        """測試空的故事圖"""
+        graph = StoryGraph()
+        self.assertEqual(len(graph), 0)
+        self.assertEqual(graph.index_of('start'), NO_SCENE)
+
+    def test_halloween_story(self):
+        """測試萬聖節故事可以完整編譯"""
+        with open('stories/halloween.json', 'r', encoding='utf-8') as f:
+            story_data = json.load(f)
+
+        graph = compile_story(story_data)
+        self.assertEqual(len(graph), len(story_data))
+        for scene_id, scene_data in story_data.items():
+            scene = graph.index_of(scene_id)
+            self.assertEqual(graph.is_ending(scene), bool(scene_data.get('is_ending', False)))
+            self.assertEqual(graph.choice_count(scene), len(scene_data.get('choices', [])))
+
+
+class TestSharedStory(unittest.TestCase):
+    """測試共用故事資料"""
+
+    def setUp(self):
+        """設定測試環境"""
+        clear_cache()
+
+    def test_loaded_once(self):
+        """測試同一檔案只載入一次"""
+        graph = load_story('stories/halloween.json')
+        self.assertIs(load_story(os.path.abspath('stories/halloween.json')), graph)
+        self.assertIs(load_story_data('stories/halloween.json'), load_story_data('stories/halloween.json'))
+
+    def test_games_share_story(self):
+        """測試遊戲實例共用故事資料"""
+        from main import HalloweenAdventure
+
+        first, second = HalloweenAdventure(), HalloweenAdventure()
+        with unittest.mock.patch('builtins.print'):
+            first.load_stories()
+            second.load_stories()
+        self.assertIs(first.graph, second.graph)
+        self.assertIs(first.story_data, second.story_data)
+
+    def test_fast_start_loads_in_background(self):
+        """測試快速啟動在背景載入故事，並記錄啟動計時"""
+        from main import HalloweenAdventure
+
+        game = HalloweenAdventure(fast_start=True)
+        game.preload_stories()
+        with unittest.mock.patch('builtins.print'):
+            game.load_stories()
+            game.display_scene('start')
+        self.assertIs(game.graph, load_story('stories/halloween.json'))
+        self.assertIsNone(game._loader)
+        report = game.startup_report()
+        self.assertTrue(report['fast_start'])
+        self.assertLessEqual(report['marks']['imports'], report['marks']['init'])
+        self.assertLessEqual(report['marks']['init'], report['marks']['first_scene'])
+
+    def test_start_from_snapshot(self):
+        """測試指定預編譯檔時直接載入，不讀取故事 JSON"""
+        from main import HalloweenAdventure
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot = os.path.join(temp_dir, 'story.tsxs')
+            write_binary(compile_story(SAMPLE_STORY), snapshot)
+            game = HalloweenAdventure(fast_start=True, snapshot=snapshot)
+            game.preload_stories()
+            with unittest.mock.patch('builtins.print'):
+                game.load_stories()
+            self.assertEqual(len(game.graph), len(SAMPLE_STORY))
+
+            game = HalloweenAdventure(snapshot=os.path.join(temp_dir, 'missing.tsxs'))
+            with unittest.mock.patch('builtins.print'), self.assertRaises(SystemExit):
+                game.load_stories()
+
+    def test_prefers_fresh_binary(self):
+        """測試有較新的預編譯檔時直接載入"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = os.path.join(temp_dir, 'story.json')
+            with open(source, 'w', encoding='utf-8') as f:
+                json.dump(SAMPLE_STORY, f, ensure_ascii=False)
+            self.assertIsInstance(load_story(source).scene_ids, tuple)
+
+            clear_cache()
+            write_binary(compile_story(SAMPLE_STORY), default_binary_path(source))
+            self.assertNotIsInstance(load_story(source).scene_ids, tuple)
+
+            clear_cache()
+            os.utime(source, (os.path.getmtime(source) + 10,) * 2)
+            self.assertIsInstance(load_story(source).scene_ids, tuple)
+
+    def test_broken_link_stops_game(self):
+        """測試選到斷裂連結時停止遊戲，不會跳到其他場景"""
+        from main import HalloweenAdventure
+
+        story = {
+            'start': {'title': '開始', 'choices': [{'option': '前往', 'next_scene': 'missing'}]},
+            'last': {'title': 'LAST SCENE', 'is_ending': True}
+        }
+        game = HalloweenAdventure()
+        game.graph = compile_story(story, strict=False)
+        game.current_scene = 'start'
+        with unittest.mock.patch('builtins.print') as mock_print, \
+                unittest.mock.patch('builtins.input', side_effect=['1']):
+            game.play()
+        printed = ' '.join(str(call.args[0]) for call in mock_print.call_args_list if call.args)
+        self.assertIn('找不到場景資料', printed)
+        self.assertNotIn('LAST SCENE', printed)
+        self.assertEqual(game.current_scene, 'start')
+
+    def test_missing_file(self):
+        """測試找不到故事檔案"""
+        with self.assertRaises(FileNotFoundError):
+            load_story('stories/nonexistent.json')
+
+
+class TestBinaryStory(unittest.TestCase):
+    """測試預編譯二進位故事格式"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'story.tsxs')
+        self.graph = compile_story(SAMPLE_STORY)
+        write_binary(self.graph, self.path)
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def test_round_trip(self):
+        """測試寫入後載入的內容一致"""
+        loaded = load_binary(self.path)
+        self.assertEqual(len(loaded), len(self.graph))
+        self.assertEqual(tuple(loaded.scene_ids), self.graph.scene_ids)
+        self.assertEqual(tuple(loaded.descriptions), self.graph.descriptions)
+        self.assertEqual(loaded.choice_options(loaded.start), ('進門', '離開'))
+        self.assertEqual(list(loaded.scores), list(self.graph.scores))
+        for scene_id in SAMPLE_STORY:
+            self.assertEqual(loaded.index_of(scene_id), self.graph.index_of(scene_id))
+        self.assertEqual(loaded.index_of('nonexistent'), NO_SCENE)
+
+    def test_session_on_binary(self):
+        """測試工作階段可以直接使用二進位故事"""
+        session = GameSession(load_binary(self.path))
+        scene = session.step(1)
+        self.assertEqual(scene['outcome'], '你回家了')
+        self.assertEqual(scene['score'], 30)
+
+    def test_invalid_file(self):
+        """測試格式或版本不符的檔案"""
+        with open(self.path, 'r+b') as f:
+            f.seek(4)
+            f.write(b'\xff\x00')
+        with self.assertRaises(StoryFormatError):
+            load_binary(self.path)
+
+        with open(self.path, 'wb') as f:
+            f.write(b'not a story file at all')
+        with self.assertRaises(StoryFormatError):
+            load_binary(self.path)
+
+    def test_default_binary_path(self):
+        """測試預編譯檔路徑"""
+        self.assertEqual(default_binary_path(os.path.join('stories', 'halloween.json')),
+                         os.path.join('stories', 'build', 'halloween.tsxs'))
+
+
+class TestStoryPack(unittest.TestCase):
+    """測試延遲載入的故事包"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, 'story.tspack')
+        write_pack(SAMPLE_STORY, self.path)
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def test_scenes_parsed_on_demand(self):
+        """測試場景在存取時才解析"""
+        graph = open_pack(self.path)
+        self.assertEqual(len(graph.pack.cache), 0)
+        self.assertTrue(graph.is_ending(graph.index_of('bye')))
+        self.assertEqual(graph.scores[graph.index_of('bye')], 30)
+        self.assertEqual(len(graph.pack.cache), 0)
+
+        self.assertEqual(graph.titles[graph.start], '開始')
+        self.assertEqual(graph.choice_options(graph.start), ('進門', '離開'))
+        self.assertEqual(len(graph.pack.cache), 1)
+
+    def test_cache_is_bounded(self):
+        """測試 LRU 快取有上限"""
+        graph = open_pack(self.path, cache_size=2)
+        session = GameSession(graph)
+        session.step(0)
+        session.render()
+        session.step(0)
+        session.render()
+        scene = session.step(1)
+        self.assertEqual(scene['outcome'], '你回家了')
+        self.assertLessEqual(len(graph.pack.cache), 2)
+        self.assertGreater(graph.pack.misses, 0)
+
+    def test_invalid_pack(self):
+        """測試格式不符的故事包"""
+        with open(self.path, 'wb') as f:
+            f.write(b'{"format": "other"}\n')
+        with self.assertRaises(StoryFormatError):
+            open_pack(self.path)
+
+    def test_load_story_opens_pack(self):
+        """測試 load_story 可以直接開啟故事包"""
+        clear_cache()
+        graph = load_story(self.path)
+        self.assertIs(load_story(self.path), graph)
+        self.assertEqual(graph.titles[graph.index_of('hall')], '大廳')
+        clear_cache()
+
+
+class TestStoryRegistry(unittest.TestCase):
+    """測試故事包註冊表"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.story_path = os.path.join(self.temp_dir.name, 'sample.json')
+        self.write_story(SAMPLE_STORY)
+        with open(os.path.join(self.temp_dir.name, 'common.json'), 'w', encoding='utf-8') as f:
+            json.dump({'common_puns': ['雙關語']}, f, ensure_ascii=False)
+        self.registry = StoryRegistry([self.temp_dir.name])
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def write_story(self, story, mtime_offset=0):
+        """寫入故事檔並調整修改時間"""
+        with open(self.story_path, 'w', encoding='utf-8') as f:
+            json.dump(story, f, ensure_ascii=False)
+        mtime = os.path.getmtime(self.story_path) + mtime_offset
+        os.utime(self.story_path, (mtime, mtime))
+
+    def test_discovery(self):
+        """測試只探索場景格式的故事"""
+        self.assertEqual(self.registry.refresh(), ['sample'])
+        self.assertEqual(self.registry.names(), ['sample'])
+        self.assertEqual(self.registry.refresh(), [])
+
+    def test_hot_reload_keeps_running_sessions(self):
+        """測試熱抽換不影響進行中的工作階段"""
+        self.registry.refresh()
+        old_session = GameSession(self.registry.get('sample'))
+        old_version = self.registry.info('sample').version
+
+        story = json.loads(json.dumps(SAMPLE_STORY))
+        story['bye']['score'] = 99
+        self.write_story(story, mtime_offset=10)
+        self.assertEqual(self.registry.refresh(), ['sample'])
+        self.assertGreater(self.registry.info('sample').version, old_version)
+
+        self.assertEqual(old_session.step(1)['score'], 30)
+        self.assertEqual(GameSession(self.registry.get('sample')).step(1)['score'], 99)
+
+    def test_invalid_update_keeps_current_version(self):
+        """測試無效的更新保留目前版本"""
+        self.registry.refresh()
+        graph = self.registry.get('sample')
+        with open(self.story_path, 'w', encoding='utf-8') as f:
+            f.write('{ broken')
+        os.utime(self.story_path, (os.path.getmtime(self.story_path) + 10,) * 2)
+        self.assertEqual(self.registry.refresh(), [])
+        self.assertIs(self.registry.get('sample'), graph)
+
+        # 同一個無效版本不會在每次檢查時重新解析
+        with unittest.mock.patch('story_engine.registry.load_pack_file') as mock_load:
+            self.assertEqual(self.registry.refresh(), [])
+        mock_load.assert_not_called()
+
+    def test_watch_refreshes_off_event_loop(self):
+        """測試定期檢查在執行緒中重新載入，不阻塞事件迴圈"""
+        threads = []
+        self.registry.refresh = lambda: threads.append(threading.get_ident())
+
+        async def run():
+            task = asyncio.ensure_future(self.registry.watch(interval=0.01))
+            for _ in range(500):
+                if threads or task.done():
+                    break
+                await asyncio.sleep(0.01)
+            task.cancel()
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+        self.assertTrue(threads)
+        self.assertNotEqual(threads[0], loop_thread)
+
+    def test_removed_pack(self):
+        """測試移除故事包"""
+        self.registry.refresh()
+        packs = self.registry.packs
+        os.remove(self.story_path)
+        self.assertEqual(self.registry.refresh(), ['sample'])
+        self.assertNotIn('sample', self.registry)
+        # 變更發布在新的字典中，已取得的舊字典不會被修改
+        self.assertIn('sample', packs)
+
+    def test_repository_packs(self):
+        """測試專案中的故事包"""
+        registry = StoryRegistry()
+        registry.refresh()
+        self.assertIn('halloween', registry)
+        self.assertIn('christmas_scenes', registry)
+        self.assertNotIn('common', registry)
+        self.assertNotIn('achievements', registry)
+
+
+class TestStoryAnalyzer(unittest.TestCase):
+    """測試故事圖分析器"""
+
+    def test_acyclic_story(self):
+        """測試沒有循環的故事"""
+        story = {
+            'start': {'choices': [
+                {'option': 'A', 'next_scene': 'left'},
+                {'option': 'B', 'next_scene': 'right'},
+                {'option': 'C', 'next_scene': 'end'}
+            ]},
+            'left': {'choices': [{'option': 'A', 'next_scene': 'end'}]},
+            'right': {'choices': [
+                {'option': 'A', 'next_scene': 'left'},
+                {'option': 'B', 'next_scene': 'end'}
+            ]},
+            'end': {'is_ending': True, 'outcome': '完'},
+            'lost': {'is_ending': True, 'outcome': '迷失'}
+        }
+        result = analyze_story(compile_story(story))
+
+        self.assertEqual(result['cycles'], [])
+        self.assertEqual(result['unreachable'], ['lost'])
+        self.assertEqual(result['unreachable_endings'], ['lost'])
+        ending = result['endings']['end']
+        self.assertEqual(ending['shortest'], 1)
+        self.assertEqual(ending['shortest_path'], ['start', 'end'])
+        self.assertEqual(ending['longest'], 3)
+        self.assertEqual(ending['playthroughs'], 4)
+        self.assertFalse(ending['through_cycle'])
+        self.assertEqual(result['total_playthroughs'], 4)
+        self.assertFalse(result['unbounded_playthroughs'])
+
+    def test_cycle_detection(self):
+        """測試循環偵測"""
+        result = analyze_story(compile_story(SAMPLE_STORY))
+        self.assertEqual([sorted(cycle) for cycle in result['cycles']], [['hall', 'start']])
+        self.assertTrue(result['endings']['bye']['through_cycle'])
+        self.assertTrue(result['unbounded_playthroughs'])
+        self.assertIsNone(result['endings']['bye']['longest'])
+
+    def test_longest_never_below_shortest(self):
+        """測試萬聖節故事每個結局的最長路徑不短於最短路徑（經過循環時沒有上限）"""
+        result = analyze_story(load_story('stories/halloween.json'))
+        self.assertTrue(any(ending['through_cycle'] for ending in result['endings'].values()))
+        for scene_id, ending in result['endings'].items():
+            with self.subTest(ending=scene_id):
+                self.assertEqual(ending['longest'] is None, ending['through_cycle'])
+                self.assertTrue(ending['longest'] is None or ending['longest'] >= ending['shortest'])
+
+    def test_dead_ends(self):
+        """測試沒有選項的非結局場景"""
+        story = {
+            'start': {'choices': [{'option': 'A', 'next_scene': 'stuck'}]},
+            'stuck': {'title': '卡住了'}
+        }
+        self.assertEqual(analyze_story(compile_story(story))['dead_ends'], ['stuck'])
+
+    def test_large_story_without_recursion(self):
+        """測試超過遞迴上限的長鏈故事"""
+        count = sys.getrecursionlimit() * 5
+        story = {
+            f's{i}': {'choices': [
+                {'option': 'A', 'next_scene': f's{i + 1}'},
+                {'option': 'B', 'next_scene': f's{min(i + 2, count)}'}
+            ]}
+            for i in range(count)
+        }
+        story[f's{count}'] = {'is_ending': True, 'outcome': '完'}
+        analyzer = StoryAnalyzer(compile_story(story, start='s0'))
+        result = analyzer.analyze()
+        self.assertEqual(result['reachable_scenes'], count + 1)
+        self.assertEqual(result['endings'][f's{count}']['longest'], count)
+        self.assertEqual(len(analyzer.strongly_connected_components()), count + 1)
+
+
+class TestAbsorbingChain(unittest.TestCase):
+    """測試吸收馬可夫鏈分析"""
+
+    def test_sample_story(self):
+        """測試結局機率與期望步數"""
+        graph = compile_story(SAMPLE_STORY)
+        result = absorption_analysis(graph)
+        self.assertEqual(result['endings'], [{'id': 'bye', 'probability': 1.0, 'score': 30}])
+        # 每回到起點一次有一半機率離開：期望步數為 3
+        self.assertAlmostEqual(result['expected_steps'], 3.0)
+        self.assertAlmostEqual(result['steps_to_ending']['hall'], 4.0)
+        self.assertEqual((result['trapped'], result['broken_links'], result['dead_ends']), (0.0, 0.0, {}))
+
+        visits, trapped = AbsorbingChain(graph).expected_visits()
+        self.assertAlmostEqual(visits[graph.index_of('start')], 2.0)
+        self.assertEqual(trapped, 0.0)
+
+    def test_unfinished_playthroughs(self):
+        """測試斷裂連結、死路與沒有出口的循環"""
+        story = dict(SAMPLE_STORY, hall={'choices': [{'option': '迷路', 'next_scene': 'nowhere'}]})
+        result = absorption_analysis(compile_story(story, strict=False))
+        self.assertAlmostEqual(result['broken_links'], 0.5)
+        self.assertAlmostEqual(result['expected_steps'], 1.5)
+
+        story = dict(SAMPLE_STORY, hall={'title': '大廳'})
+        self.assertEqual(absorption_analysis(compile_story(story))['dead_ends'], {'hall': 0.5})
+
+        # 永遠進門：起點與大廳形成沒有出口的循環
+        result = absorption_analysis(compile_story(SAMPLE_STORY), weights=[1, 0, 1])
+        self.assertEqual((result['trapped'], result['expected_steps']), (1.0, None))
+        self.assertEqual(sorted(result['trapped_scenes']), ['hall', 'start'])
+        self.assertEqual(result['unreached_endings'], ['bye'])
+
+        # 從起點到不了的循環不列在 trapped_scenes 中
+        story = dict(SAMPLE_STORY, loop_a={'choices': [{'option': '繞', 'next_scene': 'loop_b'}]},
+                     loop_b={'choices': [{'option': '繞', 'next_scene': 'loop_a'}]})
+        result = absorption_analysis(compile_story(story))
+        self.assertEqual((result['trapped'], result['trapped_scenes']), (0.0, []))
+
+    def test_iterative_solver(self):
+        """測試大型循環區塊改用迭代法時結果一致"""
+        with open('stories/halloween.json', 'r', encoding='utf-8') as f:
+            graph = compile_story(json.load(f))
+        story = dict(SAMPLE_STORY, hall={'choices': [{'option': '回頭', 'next_scene': 'start'},
+                                                     {'option': '原地', 'next_scene': 'hall'}]})
+        for graph in (graph, compile_story(story)):
+            direct = absorption_analysis(graph)
+            with unittest.mock.patch('story_engine.markov.DIRECT_LIMIT', 0):
+                iterative = absorption_analysis(graph)
+            self.assertAlmostEqual(direct['expected_steps'], iterative['expected_steps'], places=9)
+            for exact, approximate in zip(direct['endings'], iterative['endings']):
+                self.assertAlmostEqual(exact['probability'], approximate['probability'], places=9)
+
+
+class TestJSLiteral(unittest.TestCase):
+    """測試 JavaScript 物件常值解析器"""
+
+    def test_js_syntax(self):
+        """測試 JSON 以外的 JavaScript 語法"""
+        source = """{
+            // 行註解
+            start: {
+                'title': '它\\'s 開始',  /* 區塊註解 */
+                "description": "第一行\\n第二行 \\u0041\\uD83C\\uDF83",
+                choices: [
+                    {option: `樣板`, next_scene: "end"},
+                ],
+                score: -1.5e1,
+                hex: 0x1F,
+                missing: undefined,
+            },
+        }"""
+        value, _ = parse_literal(source)
+        scene = value['start']
+        self.assertEqual(scene['title'], "它's 開始")
+        self.assertEqual(scene['description'], '第一行\n第二行 A🎃')
+        self.assertEqual(scene['choices'], [{'option': '樣板', 'next_scene': 'end'}])
+        self.assertEqual(scene['score'], -15.0)
+        self.assertEqual(scene['hex'], 31)
+        self.assertIsNone(scene['missing'])
+
+    def test_extract_variable_stops_at_literal(self):
+        """測試擷取變數常值後停止"""
+        source = 'let other = 1;\nconst storyData = {"a": [1, 2]};\nfunction broken( {'
+        self.assertEqual(extract_variable(source, 'storyData'), {'a': [1, 2]})
+        with self.assertRaises(KeyError):
+            extract_variable(source, 'missing')
+
+    def test_errors(self):
+        """測試格式錯誤的常值"""
+        for source in ('{"a": }', '{"a" 1}', '[1 2]', '{"a": 1', '{a: `${x}`}', '{a: foo}'):
+            with self.subTest(source=source):
+                with self.assertRaises(JSLiteralError):
+                    parse_literal(source)
+
+        with self.assertRaises(JSLiteralError) as context:
+            parse_literal('{\n  a: "x\\u{110000}"\n}')
+        self.assertEqual((context.exception.line, context.exception.column), (2, 8))
+
+    def test_web_story_data(self):
+        """測試擷取網頁版的故事資料"""
+        with open('web/index.html', 'r', encoding='utf-8') as f:
+            story_data = extract_variable(f.read(), 'storyData')
+        self.assertIn('start', story_data)
+        compile_story(story_data, strict=False)
+
+
+class TestWebBundle(unittest.TestCase):
+    """測試網頁版故事建置"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.story_path = self.path('sample.json')
+        self.extra_path = self.path('extra.json')
+        self.html_path = self.path('index.html')
+        self.write_json(self.story_path, SAMPLE_STORY)
+        self.write_json(self.extra_path, {'bonus': {'title': '彩蛋', 'is_ending': True, 'score': 5}})
+        with open(self.html_path, 'w', encoding='utf-8') as f:
+            f.write('<script>\n        const storyData = {"old": {}};\n        let x = 1;\n</script>\n')
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.temp_dir.name, name)
+
+    def write_json(self, path, data):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def builder(self):
+        return BundleBuilder([self.story_path, self.extra_path], [self.html_path], self.path('build'))
+
+    def test_build_replaces_story_data(self):
+        """測試產生的 storyData 與 JSON 來源一致，其餘內容不變"""
+        result = self.builder().build()
+        self.assertEqual(result['targets'], {self.html_path: 'written'})
+        with open(self.html_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        expected = dict(SAMPLE_STORY, bonus={'title': '彩蛋', 'is_ending': True, 'score': 5})
+        self.assertEqual(extract_variable(html, 'storyData'), expected)
+        self.assertTrue(html.endswith(';\n        let x = 1;\n</script>\n'))
+
+    def test_incremental_build(self):
+        """測試只重新渲染有變更的故事包，內容相同時不寫入目標"""
+        self.builder().build()
+        os.utime(self.html_path, (1, 1))
+
+        result = self.builder().build()
+        self.assertEqual(set(result['packs'].values()), {'cached'})
+        self.assertEqual(result['targets'], {self.html_path: 'unchanged'})
+        self.assertEqual(os.path.getmtime(self.html_path), 1)
+
+        story = json.loads(json.dumps(SAMPLE_STORY))
+        story['bye']['score'] = 99
+        self.write_json(self.story_path, story)
+        builder = self.builder()
+        self.assertEqual(builder.stale_targets(), [self.html_path])
+        result = builder.build()
+        self.assertEqual(result['packs'], {self.story_path: 'rebuilt', self.extra_path: 'cached'})
+        self.assertEqual(result['targets'], {self.html_path: 'written'})
+        self.assertEqual(len(os.listdir(self.path('build'))), 3)
+
+    def test_duplicate_scene_ids(self):
+        """測試故事包之間場景 ID 重複"""
+        self.write_json(self.extra_path, {'start': {'title': '重複', 'is_ending': True}})
+        with self.assertRaises(StoryFormatError):
+            self.builder().build()
+
+    def test_web_targets_in_sync(self):
+        """測試專案中的 HTML 目標與故事 JSON 一致"""
+        with tempfile.TemporaryDirectory() as build_dir:
+            self.assertEqual(BundleBuilder(build_dir=build_dir).stale_targets(), [])
+
+
+class TestIncrementalValidator(unittest.TestCase):
+    """測試增量故事驗證"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.story_path = os.path.join(self.temp_dir.name, 'sample.json')
+        self.story = json.loads(json.dumps(SAMPLE_STORY))
+        self.write_story()
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def write_story(self):
+        with open(self.story_path, 'w', encoding='utf-8') as f:
+            json.dump(self.story, f, ensure_ascii=False, indent=2)
+
+    def validate(self, force=False):
+        validator = IncrementalValidator(self.story_path, cache_dir=os.path.join(self.temp_dir.name, 'build'))
+        return validator.validate(force=force)
+
+    def test_only_changed_scenes_rechecked(self):
+        """測試檔案沒有變更時使用快取，變更時只重新檢查變更的場景"""
+        result = self.validate()
+        self.assertEqual((result['status'], result['checked'], result['errors']), ('full', 3, []))
+        result = self.validate()
+        self.assertEqual((result['status'], result['checked']), ('cached', 0))
+
+        self.story['hall']['description'] = '空蕩蕩的大廳'
+        self.write_story()
+        result = self.validate()
+        self.assertEqual((result['status'], result['changed'], result['checked']), ('incremental', ['hall'], 1))
+        self.assertEqual(result['errors'], [])
+
+    def test_removed_and_unreachable_scenes(self):
+        """測試移除場景後連到它的場景變成斷裂連結，移除連結後結局無法到達"""
+        self.story['secret'] = {'title': '密室', 'outcome': '你找到寶藏', 'is_ending': True, 'score': 80}
+        self.story['hall']['choices'].append({'option': '推開書櫃', 'next_scene': 'secret'})
+        self.write_story()
+        self.assertEqual(self.validate()['errors'], [])
+
+        del self.story['bye']
+        self.write_story()
+        result = self.validate()
+        self.assertEqual((result['removed'], result['checked']), (['bye'], 1))
+        self.assertEqual(result['broken_links'], [('start', 1, 'bye')])
+
+        self.story['start']['choices'].pop()
+        self.story['hall']['choices'].pop()
+        self.write_story()
+        result = self.validate()
+        self.assertEqual(result['broken_links'], [])
+        self.assertEqual(result['newly_unreachable'], ['secret'])
+        self.assertEqual(self.validate(force=True)['errors'], result['errors'])
+
+    def test_score_sanity(self):
+        """測試分數不是整數為錯誤，非結局場景的分數為警告"""
+        self.story['bye']['score'] = '30'
+        self.story['hall']['score'] = 10
+        self.write_story()
+        result = self.validate()
+        self.assertEqual(result['errors'], ['場景 bye 的 score 應該是整數'])
+        self.assertEqual(result['warnings'], ['場景 hall 不是結局，score 不會被計入'])
+
+
+class TestStoryGenerator(unittest.TestCase):
+    """測試合成故事產生器"""
+
+    def test_generated_story_is_fully_reachable(self):
+        """測試產生的故事可以嚴格編譯，所有場景都能到達且沒有死路"""
+        graph = compile_story(dict(StoryGenerator(500, cycle_ratio=0.1).scenes()), strict=True)
+        report = analyze_story(graph)
+        self.assertEqual(report['total_scenes'], 500)
+        self.assertEqual((report['unreachable'], report['dead_ends']), ([], []))
+        self.assertTrue(report['cycles'])
+        self.assertAlmostEqual(len(report['endings']) / 500, 0.1, delta=0.03)
+
+    def test_streamed_file_matches_scenes(self):
+        """測試寫入的檔案是合法 JSON，相同種子產生相同的故事"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'large.json')
+            stats = generate_story(path, 300, branching=2, seed=7)
+            with open(path, encoding='utf-8') as f:
+                story = json.load(f)
+        self.assertEqual(story, dict(StoryGenerator(300, branching=2, seed=7).scenes()))
+        self.assertNotEqual(story, dict(StoryGenerator(300, branching=2, seed=8).scenes()))
+        self.assertEqual(stats['endings'], sum(1 for scene in story.values() if scene.get('is_ending')))
+
+    def test_invalid_parameters(self):
+        """測試參數超出範圍時拋出 ValueError"""
+        with self.assertRaises(ValueError):
+            StoryGenerator(1)
+        with self.assertRaises(ValueError):
+            StoryGenerator(100, ending_ratio=1.5)
+
+
+class TestAchievementEngine(unittest.TestCase):
+    """測試成就引擎"""
+
+    ACHIEVEMENTS = {
+        'goodbye': {'name': '再見', 'condition': 'ending_bye', 'points': 10},
+        'tourist': {'name': '觀光客', 'condition': 'scene_hall', 'points': 5},
+        'rich': {'name': '富翁', 'condition': 'score_50_plus', 'points': 20},
+        'two_of_three': {'name': '三選二', 'condition': 'some_endings', 'endings': ['bye', 'a', 'b'], 'count': 2},
+        'completionist': {'name': '全破', 'condition': 'all_endings_unlocked'},
+        'night_owl': {'name': '夜貓子', 'condition': 'play_at_night'}
+    }
+
+    def setUp(self):
+        """設定測試環境"""
+        self.graph = compile_story(SAMPLE_STORY)
+        self.engine = AchievementEngine(self.ACHIEVEMENTS, [self.graph])
+
+    def test_indexed_rules(self):
+        """測試結局、場景、分數與群組條件"""
+        player = self.engine.new_player()
+        self.assertEqual(self.engine.unsupported, ['night_owl'])
+        self.assertEqual(self.engine.visit(player, 'hall'), ['tourist'])
+        self.assertEqual(self.engine.visit(player, 'hall'), [])
+
+        self.assertEqual(sorted(self.engine.finish(player, 'bye', 30)), ['completionist', 'goodbye'])
+        self.assertEqual(self.engine.finish(player, 'bye', 30), ['rich'])
+        self.assertEqual(self.engine.finish(player, 'a'), ['two_of_three'])
+        self.assertEqual(self.engine.finish(player, 'b'), [])
+        self.assertEqual(self.engine.points(player), 35)
+        self.assertEqual(self.engine.describe('rich')['name'], '富翁')
+
+    def test_invalid_group_count(self):
+        """測試群組條件的數量超過成員數"""
+        with self.assertRaises(AchievementError):
+            AchievementEngine({'x': {'condition': 'all', 'endings': ['bye'], 'count': 2}})
+
+    def test_project_achievements(self):
+        """測試專案的成就檔都能編譯，且結局條件都指向存在的結局"""
+        graph = load_story('stories/halloween.json')
+        engine = load_achievements(graphs=[graph])
+        self.assertEqual(engine.unsupported, [])
+        player = engine.new_player()
+        for scene in graph.ending_indices():
+            engine.finish(player, graph.scene_ids[scene], graph.scores[scene])
+        for achievement_id, achievement in engine.achievements.items():
+            if 'scenes' not in achievement:
+                self.assertIn(achievement_id, player.unlocked)
+
+    def test_server_awards_achievements(self):
+        """測試伺服器在結局回應中附上新成就"""
+        server = StoryServer(self.graph, achievements=self.engine)
+        session_id = server.sessions.create()
+        server.players[session_id] = self.engine.new_player()
+        response = server.handle_line(session_id, '2')
+        self.assertEqual(sorted(item['id'] for item in response['achievements']), ['completionist', 'goodbye'])
+        server.handle_line(session_id, 'restart')
+        self.assertEqual(server.handle_line(session_id, '1')['achievements'][0]['id'], 'tourist')
+        server.handle_line(session_id, '1')
+        self.assertNotIn('achievements', server.handle_line(session_id, '1'))
+
+
+class TestPlayerProgress(unittest.TestCase):
+    """測試位元集合玩家進度與延遲批次寫入"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.layout = ProgressLayout.for_graph(compile_story(SAMPLE_STORY), ['goodbye', 'tourist'])
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'progress.db')
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def played(self, layout=None):
+        progress = PlayerProgress(layout or self.layout)
+        self.assertTrue(progress.visit('hall'))
+        self.assertFalse(progress.visit('hall'))
+        self.assertTrue(progress.finish('bye', 30))
+        self.assertFalse(progress.finish('bye', 30))
+        self.assertTrue(progress.unlock('tourist'))
+        return progress
+
+    def test_round_trip(self):
+        """測試編碼與解碼"""
+        data = self.played().encode()
+        self.assertLess(len(data), 20)
+        progress = PlayerProgress.decode(data, self.layout)
+        self.assertEqual(progress.visited_scenes(), ['hall', 'bye'])
+        self.assertEqual(progress.unlocked_endings(), ['bye'])
+        self.assertEqual(progress.unlocked_achievements(), ['tourist'])
+        self.assertEqual((progress.play_count, progress.total_score), (2, 60))
+
+        for broken in (b'', b'XX' + data[2:], data[:2] + b'\x09' + data[3:], data[:-1]):
+            with self.subTest(data=broken):
+                with self.assertRaises(ProgressError):
+                    PlayerProgress.decode(broken, self.layout)
+
+    def test_write_behind(self):
+        """測試累積到批次大小才寫入，並在佈局改變後依 ID 重新對應"""
+        store = ProgressStore(self.db_path, self.layout, batch_size=2)
+        store.save('p1', self.played())
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.get('p1').play_count, 2)
+        store.save('p2', PlayerProgress(self.layout))
+        self.assertEqual(len(store), 2)
+        store.close()
+
+        # 新版本的故事在最前面多了一個場景，場景索引改變
+        layout = ProgressLayout(['intro'] + list(SAMPLE_STORY), ['tourist'])
+        store = ProgressStore(self.db_path, layout)
+        progress = store.get('p1')
+        self.assertIs(progress.layout, layout)
+        self.assertEqual(progress.visited_scenes(), ['hall', 'bye'])
+        self.assertEqual(progress.unlocked_achievements(), ['tourist'])
+        self.assertEqual(store.get('nobody').play_count, 0)
+        store.close()
+
+
+class TestSessionReplay(unittest.TestCase):
+    """測試遊玩紀錄與重播"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.graph = compile_story(SAMPLE_STORY)
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.temp_dir.name, 'sessions.log')
+
+    def tearDown(self):
+        """清理測試環境"""
+        self.temp_dir.cleanup()
+
+    def record(self, paths):
+        """以選擇序列記錄遊玩"""
+        recorder = SessionRecorder(self.log_path)
+        for choices in paths:
+            trace = recorder.begin(self.graph)
+            session = GameSession(self.graph)
+            for choice in choices:
+                session.step(choice)
+                trace.step(choice, session.scene)
+            recorder.end(trace)
+        recorder.close()
+
+    def test_replay_same_story(self):
+        """測試在同一故事上重播全部一致，並略過不完整的最後一筆"""
+        self.record([[1], [0, 0, 1]])
+        self.record([[0]] * 3)
+        with open(self.log_path, 'ab') as f:
+            f.write(b'S\x40\x00')
+
+        result = replay_log(self.log_path, self.graph, chunk_sessions=2)
+        self.assertEqual((result['sessions'], result['matched'], result['layouts']), (5, 5, 1))
+        self.assertTrue(result['truncated'])
+
+        self.record([[1]])
+        self.assertFalse(replay_log(self.log_path, self.graph)['truncated'])
+
+    def test_divergences(self):
+        """測試回報斷裂連結、改變的連結與結局分數"""
+        self.record([[1], [1], [0, 0, 1], [0]])
+        story = json.loads(json.dumps(SAMPLE_STORY))
+        story['intro'] = {'title': '序章', 'choices': [{'option': '開始', 'next_scene': 'start'}]}
+        story['bye']['score'] = 50
+        story['hall']['choices'] = [{'option': '迷路', 'next_scene': 'nowhere'}]
+        graph = compile_story(story, strict=False)
+
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                result = replay_log(self.log_path, graph, workers=workers, chunk_sessions=1)
+                self.assertEqual(result['matched'], 1)
+                self.assertEqual(result['kinds'], {'changed_score': 2, 'dead_link': 1})
+                self.assertEqual(result['samples'][0], {
+                    'kind': 'changed_score', 'scene_id': 'bye', 'choice': None,
+                    'expected': 30, 'actual': 50, 'sessions': 2
+                })
+
+        # 大廳變成結局：停在大廳的遊玩與從大廳繼續的遊玩都改變了結局
+        story = json.loads(json.dumps(SAMPLE_STORY))
+        story['hall'] = {'title': '大廳', 'is_ending': True}
+        result = replay_log(self.log_path, compile_story(story))
+        self.assertEqual(result['kinds'], {'changed_ending': 2})
+
+    def test_invalid_log(self):
+        """測試不是紀錄檔"""
+        with open(self.log_path, 'wb') as f:
+            f.write(b'not a log')
+        with self.assertRaises(ReplayError):
+            replay_log(self.log_path, self.graph)
+        with self.assertRaises(ReplayError):
+            SessionRecorder(self.log_path)
+
+
+@unittest.skipIf(numpy is None, "需要 NumPy")
+class TestMonteCarloSimulator(unittest.TestCase):
+    """測試蒙地卡羅遊玩模擬"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.graph = compile_story(SAMPLE_STORY)
+
+    def test_uniform(self):
+        """測試均等選擇的結局分布與路徑長度"""
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                result = simulate(self.graph, 20000, workers=workers, seed=1, batch_size=3000)
+                self.assertEqual(result['endings'], [{'id': 'bye', 'count': 20000, 'probability': 1.0, 'score': 30}])
+                self.assertEqual(result['score_distribution'], {30: 20000})
+                # 每回到起點一次有一半機率離開：期望步數為 3
+                self.assertAlmostEqual(result['mean_length'], 3.0, delta=0.1)
+                self.assertEqual(result['length_percentiles'][90], 7)
+
+    def test_weights(self):
+        """測試選項權重、步數上限與斷裂連結"""
+        # 永遠直接離開
+        result = simulate(self.graph, 1000, weights=[0, 1, 1], seed=1)
+        self.assertEqual((result['mean_length'], result['length_percentiles'][99]), (1.0, 1))
+
+        # 永遠進門，困在循環中
+        result = simulate(self.graph, 1000, weights=[1, 0, 0], seed=1, max_steps=50)
+        self.assertEqual((result['unfinished'], result['endings']), (1000, []))
+        self.assertEqual(result['never_reached'], ['bye'])
+
+        story = dict(SAMPLE_STORY, hall={'choices': [{'option': '迷路', 'next_scene': 'nowhere'}]})
+        result = simulate(compile_story(story, strict=False), 10000, seed=1)
+        self.assertAlmostEqual(result['broken_links'] / 10000, 0.5, delta=0.05)
+
+        with self.assertRaises(ValueError):
+            MonteCarloSimulator(self.graph, weights=[1, -1, 1])
+
+    def test_weights_from_log(self):
+        """測試由遊玩紀錄學習選項權重"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = os.path.join(temp_dir, 'sessions.log')
+            recorder = SessionRecorder(log_path)
+            for choices in ([1], [1], [0, 0, 1]):
+                trace = recorder.begin(self.graph)
+                session = GameSession(self.graph)
+                for choice in choices:
+                    session.step(choice)
+                    trace.step(choice, session.scene)
+                recorder.end(trace)
+            recorder.close()
+
+            counts = choice_counts(log_path, self.graph)
+        self.assertEqual(list(counts), [1, 3, 1])
+        self.assertEqual(list(choice_weights(self.graph, counts, prior=0.5)), [1.5, 3.5, 1.5])
+
+
+class TestFrameCache(unittest.TestCase):
+    """測試終端機場景畫面快取"""
+
+    def setUp(self):
+        """設定測試環境"""
+        clear_frame_caches()
+        self.graph = compile_story(SAMPLE_STORY)
+
+    def test_frame_content(self):
+        """測試畫面內容與語系"""
+        cache = FrameCache(self.graph, width=4)
+        self.assertEqual(cache.frame(self.graph.start),
+                         '\n====\n🎃 開始 🎃\n====\n\n你站在門口\n\n你的選擇：\n1. 進門\n2. 離開\n')
+        self.assertEqual(cache.frame(self.graph.index_of('bye')), '\n====\n🎃 再見 🎃\n====\n')
+        english = FrameCache(self.graph, width=4, locale='en_US')
+        self.assertIn('Your choices:', english.frame(self.graph.start))
+
+    def test_lru_eviction(self):
+        """測試超過上限時淘汰最久未使用的畫面"""
+        cache = FrameCache(self.graph, max_frames=2)
+        start, hall, bye = (self.graph.index_of(scene_id) for scene_id in ('start', 'hall', 'bye'))
+        cache.frame(start)
+        cache.frame(hall)
+        cache.frame(start)
+        cache.frame(bye)
+        self.assertEqual(list(cache.frames), [start, bye])
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_shared_cache(self):
+        """測試同一故事版本、寬度與語系共用快取"""
+        cache = frame_cache(self.graph)
+        self.assertIs(frame_cache(self.graph), cache)
+        self.assertIsNot(frame_cache(self.graph, width=80), cache)
+        self.assertIsNot(frame_cache(compile_story(SAMPLE_STORY)), cache)
+
+
+class TestGameSession(unittest.TestCase):
+    """測試無頭遊戲工作階段"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.graph = compile_story(SAMPLE_STORY)
+        self.session = GameSession(self.graph)
+
+    def test_initial_scene(self):
+        """測試起始場景"""
+        scene = self.session.render()
+        self.assertEqual(scene['scene_id'], 'start')
+        self.assertEqual(scene['options'], ['進門', '離開'])
+        self.assertEqual(scene['visited_count'], 1)
+        self.assertFalse(scene['finished'])
+
+    def test_step_to_ending(self):
+        """測試走到結局"""
+        scene = self.session.step(0)
+        self.assertEqual(scene['scene_id'], 'hall')
+        scene = self.session.step(0)
+        self.assertEqual(scene['scene_id'], 'start')
+        scene = self.session.step(1)
+        self.assertTrue(scene['is_ending'])
+        self.assertTrue(scene['finished'])
+        self.assertEqual(scene['outcome'], '你回家了')
+        self.assertEqual(scene['score'], 30)
+        self.assertEqual(scene['visited_count'], 2)
+
+        with self.assertRaises(SessionError):
+            self.session.step(0)
+
+    def test_invalid_choice(self):
+        """測試無效的選擇"""
+        with self.assertRaises(SessionError):
+            self.session.step(5)
+        with self.assertRaises(SessionError):
+            self.session.step(-1)
+        self.assertEqual(self.session.render()['scene_id'], 'start')
+
+    def test_restart(self):
+        """測試重新開始不會遞迴並重設狀態"""
+        for _ in range(1000):
+            self.session.step(1)
+            scene = self.session.restart()
+        self.assertEqual(scene['scene_id'], 'start')
+        self.assertEqual(scene['score'], 0)
+        self.assertFalse(scene['finished'])
+
+
+class TestSessionManager(unittest.TestCase):
+    """測試工作階段管理器"""
+
+    def setUp(self):
+        """設定測試環境"""
+        self.manager = SessionManager(compile_story(SAMPLE_STORY), max_sessions=3)
+
+    def test_independent_sessions(self):
+        """測試工作階段彼此獨立"""
+        first = self.manager.create()
+        second = self.manager.create()
+        self.assertNotEqual(first, second)
+
+        self.manager.step(first, 1)
+        self.assertTrue(self.manager.render(first)['finished'])
+        self.assertFalse(self.manager.render(second)['finished'])
+        self.assertIs(self.manager.get(first).graph, self.manager.get(second).graph)
+
+    def test_eviction(self):
+        """測試超過上限時淘汰最久未使用者"""
+        ids = [self.manager.create() for _ in range(3)]
+        self.manager.get(ids[0])
+        self.manager.create()
+        self.assertEqual(len(self.manager), 3)
+        self.assertIn(ids[0], self.manager)
+        self.assertNotIn(ids[1], self.manager)
+
+    def test_close_and_missing(self):
+        """測試關閉與不存在的工作階段"""
+        session_id = self.manager.create('player')
+        with self.assertRaises(SessionError):
+            self.manager.create('player')
+        self.assertTrue(self.manager.close(session_id))
+        self.assertFalse(self.manager.close(session_id))
+        with self.assertRaises(SessionError):
+            self.manager.step(session_id, 0)
+
+
+class TestStoryServer(unittest.IsolatedAsyncioTestCase):
+    """測試非同步遊戲伺服器"""
+
+    async def asyncSetUp(self):
+        """設定測試環境"""
+        self.server = StoryServer(compile_story(SAMPLE_STORY), max_connections=2, idle_timeout=0.2)
+        self.host, self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        """清理測試環境"""
+        await self.server.close()
+
+    async def request(self, reader, writer, command):
+        """送出一行指令並讀取回應"""
+        writer.write(command.encode('utf-8') + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    async def test_play_session(self):
+        """測試透過連線遊玩"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        scene = json.loads(await reader.readline())
+        self.assertEqual(scene['scene_id'], 'start')
+
+        scene = await self.request(reader, writer, '2')
+        self.assertTrue(scene['finished'])
+        self.assertIn('error', await self.request(reader, writer, '1'))
+        self.assertIn('error', await self.request(reader, writer, 'dance'))
+        scene = await self.request(reader, writer, 'restart')
+        self.assertEqual(scene['scene_id'], 'start')
+
+        writer.write(b'quit\n')
+        await writer.drain()
+        self.assertEqual(await reader.readline(), b'')
+        writer.close()
+        await writer.wait_closed()
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.server.active_connections, 0)
+        self.assertEqual(len(self.server.sessions), 0)
+
+    async def test_idle_timeout(self):
+        """測試閒置逾時"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        await reader.readline()
+        message = json.loads(await reader.readline())
+        self.assertIn('error', message)
+        self.assertEqual(await reader.readline(), b'')
+        writer.close()
+        await writer.wait_closed()
+
+    async def test_connection_limit(self):
+        """測試連線數上限"""
+        connections = []
+        for _ in range(2):
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+            await reader.readline()
+            connections.append(writer)
+
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        self.assertIn('error', json.loads(await reader.readline()))
+        self.assertEqual(await reader.readline(), b'')
+
+        for conn in connections + [writer]:
+            conn.close()
+            await conn.wait_closed()
+
+
+class TestStoryServerRegistry(unittest.IsolatedAsyncioTestCase):
+    """測試使用故事包註冊表的伺服器"""
+
+    async def asyncSetUp(self):
+        """設定測試環境"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        for name, story in (('halloween', SAMPLE_STORY), ('other', {'start': {'is_ending': True, 'outcome': '完'}})):
+            with open(os.path.join(self.temp_dir.name, name + '.json'), 'w', encoding='utf-8') as f:
+                json.dump(story, f, ensure_ascii=False)
+        registry = StoryRegistry([self.temp_dir.name])
+        registry.refresh()
+        self.server = StoryServer(registry=registry)
+        self.host, self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        """清理測試環境"""
+        await self.server.close()
+        self.temp_dir.cleanup()
+
+    async def test_switch_pack(self):
+        """測試切換故事包"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        scene = json.loads(await reader.readline())
+        self.assertEqual(scene['title'], '開始')
+
+        writer.write(b'packs\n')
+        await writer.drain()
+        self.assertEqual(json.loads(await reader.readline())['packs'], ['halloween', 'other'])
+
+        writer.write(b'pack other\n')
+        await writer.drain()
+        self.assertTrue(json.loads(await reader.readline())['finished'])
+
+        writer.write(b'pack missing\n')
+        await writer.drain()
+        self.assertIn('error', json.loads(await reader.readline()))
+
+        writer.close()
+        await writer.wait_closed()
+
+
+if __name__ == "__main__":
+    unittest.main()